@@ -5,21 +5,32 @@ Based on randomness
 
 import sys
 import os
-import json
+import io
+import signal
+import contextlib
+import functools
+import multiprocessing
 sys.path.insert(0, os.path.abspath('..'))
 import libs.assets
-import pandas as pd
+import libs.datacore
+import libs.fetcher
+import libs.correlation
+import libs.outcomes
+import libs.recstore
+import libs.rng
+import libs.service
 import configs.alphaconf
 from pprint import pprint
-from datetime import datetime
+from datetime import datetime, timedelta
 import fire
 
 
 class ADVISOR(object):
     """Stocks Advisor"""
 
-    def __init__(self, datatype='m', plot_anomaly=False, caching=True):
+    def __init__(self, datatype='m', plot_anomaly=False, caching=True, seed=None):
         self.plot_anomaly = plot_anomaly
+        self.seed = libs.rng.get_seed(seed)
         self.datatype = datatype
         self.watchdata, self.source, self.asset_type = self.get_assettype(datatype=self.datatype)
         self.key = configs.alphaconf.key
@@ -28,11 +39,25 @@ class ADVISOR(object):
         self.tobuy = dict()
         self.tosell = dict()
 
+        # The latest scan of every symbol, reused by a resident advisor until a new bar, see serve
+        self.warm = False
+        self.scans = dict()
+        self.pool = None
+        self.pool_size = 0
+        self.cacheage = 3600*12  # Age of stored bars to fetch new ones, see serve
+
         self.min_goal = 0.1
         self.min_RewardRiskRatio = 10
         self.atr_multiplier = 5
         self.accepted_goal_chance = 0.33
 
+    def __getstate__(self):
+        """Pool workers get the advisor without scans and the pool"""
+        state = self.__dict__.copy()
+        state['scans'] = dict()
+        state['pool'] = None
+        return state
+
     def get_assettype(self, datatype='ms'):
         if datatype == 'ms':
             watchdata = configs.alphaconf.symbols_m
@@ -57,58 +82,46 @@ class ADVISOR(object):
         return watchdata, source, asset_type
 
     def test_strategy(self):
-        """ Test predictions"""
+        """
+        Test predictions, see libs.outcomes
+
+        Returns:
+            Outcome of every recommendation
+        """
         watchdata, source, asset_type = self.get_assettype(datatype=self.datatype)
 
-        # Get prediction dates
-        prediction_dates = list()
-        sep = '-'
-        dirpath = os.path.join('', 'recommendations')
-        for filename in os.listdir(dirpath):
-            if filename.endswith('.json') and filename.startswith(self.datatype + '-' + source):
-                items = filename.split(sep)
-                prediction_date = items[2] + sep + items[3] + sep + items[4]
-                prediction_date = prediction_date.strip('.json')
-                prediction_dates.append(prediction_date)
-
-        # print('Date', 'Status', 'Prediction_date', 'Delta', 'Symbol', 'Exit_price', 'Success_count', 'Max/Min')
-
-        # Check predictions
-        for prediction_date in prediction_dates:
-            today = datetime.today().strftime("%Y-%m-%d")
-            delta = datetime.today() - datetime.strptime(prediction_date, "%Y-%m-%d")
-            filename = self.datatype + '-' + source + '-' + prediction_date + '.json'
-            filepath = os.path.join(dirpath, filename)
-            if os.path.exists(filepath):
-                with open(filepath, 'r') as infile:
-                    data = json.load(infile)
-            else:
-                return
-
-            for item in data:
-                symbol = list(item.keys())[0]
-                stop_loss = item[symbol]['stop_loss']
-                exit_price = item[symbol]['exit_price']
-
-                asset = libs.assets.ASSET(symbol=symbol, source=source, asset_type=asset_type, key=self.key,
-                                          cacheage=3600*48, caching=self.caching)
-                asset.get_data()
-
-                df = pd.concat([asset.df['date'], asset.df['Close']], axis=1)
-                df.date = pd.to_datetime(df['date'], format='%Y-%m-%d')
-                df = df.set_index('date')
-
-                filtered = df[prediction_date:].copy()
-
-                filtered['Success'] = filtered.Close > exit_price
-                if filtered['Success'].sum() > 0:
-                    print(today + ' Succeeded', prediction_date, delta.days, symbol, exit_price, filtered['Success'].sum(),
-                          filtered.Close.max())
-
-                filtered['Bust'] = filtered.Close < stop_loss
-                if filtered['Bust'].sum() > 0:
-                    print(today + ' Busted', prediction_date, delta.days, symbol, stop_loss, filtered['Bust'].sum(),
-                          filtered.Close.min())
+        store = self.get_recstore()
+        recommendations = store.query(datatype=self.datatype, source=source)
+        store.close()
+        if recommendations.empty:
+            return recommendations
+
+        assets = [libs.assets.ASSET(symbol=symbol, source=source, asset_type=asset_type, key=self.key,
+                                    cacheage=3600*48, caching=self.caching)
+                  for symbol in recommendations['symbol'].unique()]
+        closes = libs.outcomes.get_closes(assets, recommendations['date'].min())
+        outcomes = libs.outcomes.evaluate(recommendations, closes)
+
+        today = datetime.today()
+        for row in outcomes.itertuples():
+            delta = (today - row.date).days
+            if row.success_count > 0:
+                print(today.strftime("%Y-%m-%d") + ' Succeeded', row.date.strftime("%Y-%m-%d"), delta, row.symbol,
+                      row.exit_price, row.success_count, row.max)
+            if row.bust_count > 0:
+                print(today.strftime("%Y-%m-%d") + ' Busted', row.date.strftime("%Y-%m-%d"), delta, row.symbol,
+                      row.stop_loss, row.bust_count, row.min)
+
+        return outcomes
+
+    def get_recstore(self, dirpath='recommendations'):
+        """Recommendation store, JSON files of older versions are imported when it is created"""
+        path = os.path.join(dirpath, 'recommendations.db')
+        exists = os.path.isfile(path)
+        store = libs.recstore.RECSTORE(path)
+        if not exists:
+            store.import_json(dirpath)
+        return store
 
     def correlation(self, datatype1='mc', symbol1='USD000UTSTOM',
                     datatype2='me', symbol2='FXRU', extended=False):
@@ -120,12 +133,9 @@ class ADVISOR(object):
         asset2 = libs.assets.ASSET(symbol=symbol2, source=source2, asset_type=asset_type2,
                                    key=self.key, caching=self.caching)
 
-        asset1.get_data()
-        asset2.get_data()
-
-        df = pd.DataFrame()
-        df['A'] = asset1.df['Close'].copy()
-        df['B'] = asset2.df['Close'].copy()
+        # Dates both assets were traded at
+        closes = libs.correlation.get_closes([asset1, asset2], names=['A', 'B'])
+        df = libs.correlation.align(closes, how='inner')
 
         correlation = df['A'].corr(df['B'])
         if extended:
@@ -133,117 +143,312 @@ class ADVISOR(object):
         else:
             return correlation
 
-    def check_watchlist(self, symbol_overide=''):
-        """Do magic"""
-
-        results = list()
+    def correlation_matrix(self, symbols, datatype='me', method='pearson', datatype2='mc', symbol2='USD000UTSTOM'):
+        """
+        Correlations between all symbols and with a base asset, each symbol is loaded once
+
+        Args:
+            symbols: Symbols of the datatype
+            datatype: Datatype of the symbols
+            method: pearson or spearman
+            datatype2: Datatype of the base asset
+            symbol2: Base asset, USD/RUB by default, no base column if empty
+
+        Returns:
+            DataFrame of correlations, a column per symbol and the USD/RUB column
+        """
+        watchdata, source, asset_type = self.get_assettype(datatype=datatype)
+        assets = [libs.assets.ASSET(symbol=symbol, source=source, asset_type=asset_type, key=self.key,
+                                    caching=self.caching) for symbol in symbols]
+        if symbol2:
+            watchdata2, source2, asset_type2 = self.get_assettype(datatype=datatype2)
+            assets.append(libs.assets.ASSET(symbol=symbol2, source=source2, asset_type=asset_type2, key=self.key,
+                                            caching=self.caching))
+
+        closes = libs.correlation.get_closes(assets)
+        matrix = libs.correlation.get_matrix(closes, method=method)
+
+        df = matrix.loc[symbols, symbols].copy()
+        if symbol2:
+            df['USD/RUB' if symbol2 == 'USD000UTSTOM' else symbol2] = matrix.loc[symbols, symbol2]
+        return df
+
+    def prefetch(self, symbol_overide=''):
+        """Refresh expired caches of the watchlist concurrently, bounded by the providers rate limits"""
+        assets = list()
         for item in self.watchdata:
-
             symbol, entry_price, limit, dividend = configs.alphaconf.get_symbol(item)
-
-            if symbol_overide:
-                if symbol != symbol_overide:
-                    continue
-
-            print()
-            print(symbol)
-
-            if symbol == 'TCS':
+            if symbol_overide and symbol != symbol_overide:
                 continue
-
-            asset = libs.assets.ASSET(symbol=symbol, source=self.source, asset_type=self.asset_type, key=self.key,
-                                      min_goal=self.min_goal, atr_multiplier=self.atr_multiplier, cacheage=3600*12)
-
-            # Fetch data from the source
-            asset.get_data()
-
-            # Perform static analysis
-            asset.static_analysis(printoutput=True)
-            if asset.stoploss <= 0:
-                asset.stoploss = asset.lastprice * 0.5
-
-            # # Check 10% theory
-            # asset.df['PCT'] = asset.df['Close'].pct_change().fillna(0)
-            # asset.df['PCT10'] = asset.df['PCT'] > 0.1
-            #
-            # pd.options.display.max_rows = 200
-            #
-            # if asset.df['PCT10'].sum() > 1:
-            #     print(asset.df['PCT10'].sum())
-            #     print(asset.df[['PCT', 'PCT10']])
-            # else:
-            #     continue
-
-            # usd_rub_correlation = round(self.correlation(datatype2=self.datatype, symbol2=symbol), 2)
-            # print('USD-RUB-Correlation:', usd_rub_correlation)
-
-            # print(asset.df)
-            # exit()
-
-            # Calculate chances
-            asset.get_bust_chance(bust=asset.stoplosspercent, sims=10000, goal=self.min_goal)
-            print('Bust chance:', round(asset.bust_chance, 2))
-            print('Goal chance:', round(asset.goal_chance, 2))
-
-            # Reward-risk ratio
-            if asset.goal_chance > self.accepted_goal_chance:
-                asset.get_reward_risk_ratio()
-                print('Reward-Risk ratio:', asset.rewardriskratio)
-
-            if asset.anomalies > 0 and self.plot_anomaly:
-                print('Anomaly detected')
-                asset.plot('Anomaly:')
-
-            # Check EMA200
-            if self.datatype == 'a':
-                ema200 = asset.get_ema200_alpha(key=self.key)
-                print('EMA200:', ema200)
-                if ema200 and asset.lastprice > ema200:
-                    ema200_diff = round(100 * (asset.lastprice - ema200) / asset.lastprice, 1)
-                    print('Price above EMA200', ema200_diff, '%')
-
-            # Can we sell something?
-            if asset.lastprice > entry_price > 0:
-                income = round((asset.lastprice / entry_price - 1) * 100, 2)
-                if income > self.min_goal*100:
-                    self.tosell[symbol] = str(income) + '%'
-                    print('Time to sell, income:', str(income) + '%')
+            assets.append(libs.assets.ASSET(symbol=symbol, source=self.source, asset_type=self.asset_type,
+                                            key=self.key, cacheage=self.cacheage))
+
+        # USD/RUB is used by the correlation check of every symbol
+        assets.append(libs.assets.ASSET(symbol='USD000UTSTOM', source='moex', asset_type='currency',
+                                        key=self.key, caching=self.caching))
+
+        stale = [asset for asset in assets if asset.caching and not asset.is_cached()]
+
+        # Market wide requests per trading date are cheaper than requests per symbol for big watchlists
+        coroutines = list()
+        for boardid in sorted(set(asset.boardid for asset in stale if asset.source == 'moex')):
+            board = [asset for asset in stale if asset.source == 'moex' and asset.boardid == boardid]
+            store = board[0].get_store()
+            starts = list()
+            for asset in board:
+                since = store.last_date('moex', boardid, asset.symbol)
+                if since is None:
+                    since = datetime.now() - timedelta(days=100)
+                starts.append(max(since, datetime.now() - timedelta(days=100)))
+            start = min(starts)
+            requests = sum(libs.fetcher.symbol_requests(since) for since in starts)
+            if libs.fetcher.board_requests(boardid, start) < requests:
+                symbols = [asset.symbol for asset in board]
+                coroutines.append(libs.fetcher.aupdate_board(store, boardid=boardid, start=start, symbols=symbols))
+                stale = [asset for asset in stale if asset not in board]
+
+        coroutines += [asset.prefetch() for asset in stale]
+        libs.fetcher.run(coroutines)
+
+    def check_symbol(self, item, symbol_overide='', plot=True):
+        """Analyse a single watchlist item, returns the asset results if it is worth to buy"""
+
+        symbol, entry_price, limit, dividend = configs.alphaconf.get_symbol(item)
+
+        if symbol_overide:
+            if symbol != symbol_overide:
+                return None
+
+        print()
+        print(symbol)
+
+        if symbol == 'TCS':
+            return None
+
+        asset = libs.assets.ASSET(symbol=symbol, source=self.source, asset_type=self.asset_type, key=self.key,
+                                  min_goal=self.min_goal, atr_multiplier=self.atr_multiplier, cacheage=self.cacheage,
+                                  seed=self.seed)
+
+        # Fetch data from the source
+        asset.get_data()
+
+        # Perform static analysis
+        asset.static_analysis(printoutput=True)
+        if asset.stoploss <= 0:
+            asset.stoploss = asset.lastprice * 0.5
+
+        # # Check 10% theory
+        # asset.df['PCT'] = asset.df['Close'].pct_change().fillna(0)
+        # asset.df['PCT10'] = asset.df['PCT'] > 0.1
+        #
+        # pd.options.display.max_rows = 200
+        #
+        # if asset.df['PCT10'].sum() > 1:
+        #     print(asset.df['PCT10'].sum())
+        #     print(asset.df[['PCT', 'PCT10']])
+        # else:
+        #     continue
+
+        # usd_rub_correlation = round(self.correlation(datatype2=self.datatype, symbol2=symbol), 2)
+        # print('USD-RUB-Correlation:', usd_rub_correlation)
+
+        # print(asset.df)
+        # exit()
+
+        # Calculate chances
+        asset.get_bust_chance(bust=asset.stoplosspercent, sims=100000, goal=self.min_goal, tolerance=0.005)
+        print('Bust chance:', round(asset.bust_chance, 2))
+        print('Goal chance:', round(asset.goal_chance, 2))
+
+        # Reward-risk ratio
+        if asset.goal_chance > self.accepted_goal_chance:
+            asset.get_reward_risk_ratio()
+            print('Reward-Risk ratio:', asset.rewardriskratio)
+
+        if asset.anomalies > 0 and self.plot_anomaly and plot:
+            print('Anomaly detected')
+            asset.plot('Anomaly:')
+
+        # Check EMA200
+        if self.datatype == 'a':
+            ema200 = asset.get_last_ema(period=200)
+            print('EMA200:', ema200)
+            if ema200 and asset.lastprice > ema200:
+                ema200_diff = round(100 * (asset.lastprice - ema200) / asset.lastprice, 1)
+                print('Price above EMA200', ema200_diff, '%')
+
+        # Can we sell something?
+        if asset.lastprice > entry_price > 0:
+            income = round((asset.lastprice / entry_price - 1) * 100, 2)
+            if income > self.min_goal*100:
+                self.tosell[symbol] = str(income) + '%'
+                print('Time to sell, income:', str(income) + '%')
+                if plot:
                     asset.plot('Sell:')
 
-            asset.get_fair_price(dividend=dividend)
-            print('Fair price:', asset.fairprice)
-            print('USD/RUB Correlation:', round(self.correlation(datatype2=self.datatype, symbol2=symbol), 1))
-
-            if symbol_overide:
-                asset.plot('Manual:')
-
-            # Filter out too risky stuff
-            if asset.rewardriskratio >= self.min_RewardRiskRatio and asset.goal_chance > self.accepted_goal_chance:
-                results.append(asset.get_results())
-
-                # Ignore too expensive stuff
-                # if asset.fairprice > asset.lastprice:
-                #     asset.plot('Cheap:')
-                if limit == 0:
-                    limit = asset.fairprice
-                if asset.lastprice > limit > 0:
-                    continue
-                if entry_price > 0 and asset.lastprice > 0.9 * entry_price:
-                    # We have the asset already
-                    continue
+        asset.get_fair_price(dividend=dividend)
+        print('Fair price:', asset.fairprice)
+        print('USD/RUB Correlation:', round(self.correlation(datatype2=self.datatype, symbol2=symbol), 1))
+
+        if symbol_overide and plot:
+            asset.plot('Manual:')
+
+        # Filter out too risky stuff
+        if asset.rewardriskratio < self.min_RewardRiskRatio or asset.goal_chance <= self.accepted_goal_chance:
+            return None
+
+        result = asset.get_results()
+
+        # Ignore too expensive stuff
+        # if asset.fairprice > asset.lastprice:
+        #     asset.plot('Cheap:')
+        if limit == 0:
+            limit = asset.fairprice
+        if asset.lastprice > limit > 0:
+            return result
+        if entry_price > 0 and asset.lastprice > 0.9 * entry_price:
+            # We have the asset already
+            return result
+
+        if plot:
+            asset.plot('Buy:')
+
+        return result
+
+    def get_scan_key(self, item):
+        """
+        Scan results of a watchlist item are the same until a new bar, a new day or new parameters
+
+        The last stored bar is taken as it is, prefetch refreshes the stores of the whole watchlist before
+        """
+        symbol, entry_price, limit, dividend = configs.alphaconf.get_symbol(item)
+        asset = libs.assets.ASSET(symbol=symbol, source=self.source, asset_type=self.asset_type, key=self.key,
+                                  cacheage=self.cacheage)
+        df = asset.get_store().load(asset.source, asset.get_board(), symbol)
+        bar = None
+        if df is not None and len(df):
+            df = libs.datacore.fix_alpha_columns(df)
+            bar = (str(df['date'].iloc[-1]), float(df['Close'].iloc[-1]), len(df))
+        return (symbol, entry_price, limit, dividend, self.seed, self.min_goal, self.atr_multiplier,
+                self.accepted_goal_chance, datetime.now().strftime('%Y-%m-%d'), bar)
+
+    def scan_warm(self, symbol_overide='', workers=1):
+        """
+        check_symbol of watchlist items, only items with new bars are analysed again
+
+        Returns:
+            Results of assets worth to buy
+        """
+        items = [item for item in self.watchdata
+                 if not symbol_overide or configs.alphaconf.get_symbol(item)[0] == symbol_overide]
+        keys = [self.get_scan_key(item) for item in items]
+        missing = [(item, key) for item, key in zip(items, keys) if self.scans.get(key[0], (None,))[0] != key]
+
+        if workers > 1 and len(missing) > 1:
+            scanned = self.get_pool(workers).map(functools.partial(_check_symbol, self, symbol_overide=symbol_overide),
+                                                 [item for item, key in missing])
+        else:
+            scanned = [_check_symbol(self, item, symbol_overide=symbol_overide) for item, key in missing]
+        for (item, key), (result, tosell, output) in zip(missing, scanned):
+            # The latest scan of a symbol only
+            self.scans[key[0]] = key, result, {key[0]: tosell[key[0]]} if key[0] in tosell else dict(), output
 
-                asset.plot('Buy:')
+        results = list()
+        for key in keys:
+            key, result, tosell, output = self.scans[key[0]]
+            print(output, end='')
+            self.tosell.update(tosell)
+            if result:
+                results.append(result)
+        return results
+
+    def check_watchlist(self, symbol_overide='', workers=1):
+        """Do magic
+
+        Args:
+            symbol_overide: Check the only symbol
+            workers: Number of processes to scan the watchlist, plots are disabled if more than one
+
+        The same seed and data give the same results, see ADVISOR(seed=...)
+        """
+
+        self.prefetch(symbol_overide=symbol_overide)
+        print('Seed:', self.seed)
+
+        if self.warm:
+            self.tosell = dict()
+            results = self.scan_warm(symbol_overide=symbol_overide, workers=workers)
+        elif workers > 1:
+            # Every symbol has its own random stream, results do not depend on a worker
+            with multiprocessing.Pool(processes=workers) as pool:
+                scanned = pool.map(functools.partial(_check_symbol, self, symbol_overide=symbol_overide),
+                                   self.watchdata)
+            results = list()
+            for result, tosell, output in scanned:
+                print(output, end='')
+                self.tosell.update(tosell)
+                if result:
+                    results.append(result)
+        else:
+            results = list()
+            for item in self.watchdata:
+                result = self.check_symbol(item, symbol_overide=symbol_overide)
+                if result:
+                    results.append(result)
 
         print('Results:')
         pprint(results)
 
         # Save results
-        today = datetime.today()
-        filename = self.datatype + '-' + self.source + '-' + str(today.strftime("%Y-%m-%d")) + '.json'
-        filepath = os.path.join('', 'recommendations', filename)
         if len(results) > 0:
-            with open(filepath, 'w') as outfile:
-                json.dump(results, outfile, indent=4)
+            store = self.get_recstore()
+            store.append(results, datetime.today(), datatype=self.datatype, source=self.source)
+            store.close()
+
+    def get_pool(self, workers):
+        """Pool of a resident advisor, the workers keep their frames and indicators between requests"""
+        if self.pool is not None and self.pool_size != workers:
+            self.pool.terminate()
+            self.pool = None
+        if self.pool is None:
+            # Ctrl+C stops the server, the pool is terminated then
+            self.pool = multiprocessing.Pool(processes=workers, initializer=signal.signal,
+                                             initargs=(signal.SIGINT, signal.SIG_IGN))
+            self.pool_size = workers
+        return self.pool
+
+    def serve(self, host='127.0.0.1', port=8765, cacheage=900):
+        """
+        Resident advisor, prices, indicators and scan results are kept in memory between requests
+
+        GET /<method>?<argument>=<value>&... runs a method of SERVED and responds with its output, e.g.
+        curl 'http://127.0.0.1:8765/check_watchlist?symbol_overide=MSFT'
+        Requests are handled one by one, plots are disabled
+
+        Args:
+            cacheage: Age of stored bars to fetch new ones, seconds, bars of the trading day are updated as well
+        """
+        self.warm = True
+        self.cacheage = cacheage
+        print('Advisor', self.datatype)
+        try:
+            libs.service.serve(self, SERVED, host=host, port=port)
+        finally:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool = None
+
+
+# Methods of a resident advisor
+SERVED = ['check_watchlist', 'correlation', 'correlation_matrix', 'test_strategy', 'prefetch']
+
+
+def _check_symbol(advisor, item, symbol_overide=''):
+    """Pool worker, returns results, assets to sell and the captured output of a single symbol"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = advisor.check_symbol(item, symbol_overide=symbol_overide, plot=False)
+    return result, advisor.tosell, output.getvalue()
 
 
 if __name__ == "__main__":
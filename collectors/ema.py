@@ -4,86 +4,91 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath('..'))
-import datetime
+import re
 import time
 import logging
 import fire
 import requests
 from influxdb import InfluxDBClient
+import libs.datacore
 import configs.alphaconf
 import configs.influx
 import configs.fxit
 
 
-def get_ema200(symbol, age=5*23*3600):
+# One client per process, its HTTP session keeps connections to InfluxDB open
+influx_client = None
 
-    influx_client = InfluxDBClient(
-        configs.influx.HOST,
-        configs.influx.PORT,
-        configs.influx.DBUSER,
-        configs.influx.DBPWD,
-        configs.influx.DBNAME,
-        timeout=5
-    )
-    query = 'SELECT last("ema200") FROM "data" WHERE ("symbol"=~ /^' + symbol + '$/)'
-    result = influx_client.query(query)
-    ema200_date = result.raw['series'][0]['values'][0][0]
-    tmp = ema200_date.split('.')
-    ema200_date = tmp[0]
-    ema200_date = datetime.datetime.strptime(ema200_date, '%Y-%m-%dT%H:%M:%S')
-    now = datetime.datetime.utcnow()
-    diff = now - ema200_date
-    if diff.total_seconds() < age:
-        ema200 = result.raw['series'][0]['values'][0][1]
-    else:
-        ema200 = None
-    return ema200
 
+def get_client():
+    global influx_client
+    if influx_client is None:
+        influx_client = InfluxDBClient(
+            configs.influx.HOST,
+            configs.influx.PORT,
+            configs.influx.DBUSER,
+            configs.influx.DBPWD,
+            configs.influx.DBNAME,
+            timeout=5
+        )
+    return influx_client
 
-def get_price(symbol, age=23*3600):
 
-    influx_client = InfluxDBClient(
-        configs.influx.HOST,
-        configs.influx.PORT,
-        configs.influx.DBUSER,
-        configs.influx.DBPWD,
-        configs.influx.DBNAME,
-        timeout=5
-    )
-
-    # influx_client.drop_measurement('data')
-    # exit()
-
-    query = 'SELECT last("price") FROM "data" WHERE ("symbol"=~ /^' + symbol + '$/)'
-    result = influx_client.query(query)
-    price_date = result.raw['series'][0]['values'][0][0]
-    tmp = price_date.split('.')
-    price_date = tmp[0]
-    price_date = datetime.datetime.strptime(price_date, '%Y-%m-%dT%H:%M:%S')
-    now = datetime.datetime.utcnow()
-    diff = now - price_date
-    if diff.total_seconds() < age:
-        price = result.raw['series'][0]['values'][0][1]
-    else:
-        price = None
+def get_last(symbols, price_age=23*3600, ema200_age=5*23*3600):
+    """
+    Last stored prices, change percents and EMA200 of all symbols in one request
 
-    query = 'SELECT last("change_percent") FROM "data" WHERE ("symbol"=~ /^' + symbol + '$/)'
-    result = influx_client.query(query)
-    change_percent = result.raw['series'][0]['values'][0][1]
+    Args:
+        symbols: Symbols to look up
+        price_age: Max age of a price, seconds
+        ema200_age: Max age of an EMA200, seconds
 
-    return price, change_percent
+    Returns:
+        Dict of symbol: dict with price, change_percent and ema200, a value is missing if it is older than its age
+    """
+    pattern = '/^(' + '|'.join(re.escape(symbol) for symbol in symbols) + ')$/'
+    query = 'SELECT last("price") AS "price", last("change_percent") AS "change_percent" FROM "data" ' + \
+            'WHERE "symbol" =~ {} AND time > now() - {}s GROUP BY "symbol"; '.format(pattern, int(price_age)) + \
+            'SELECT last("ema200") AS "ema200" FROM "data" ' + \
+            'WHERE "symbol" =~ {} AND time > now() - {}s GROUP BY "symbol"'.format(pattern, int(ema200_age))
+
+    # Both statements are sent at once, the last values of a statement have the same time
+    results = get_client().query(query)
+    if not isinstance(results, list):
+        results = [results]
+
+    last = {symbol: dict() for symbol in symbols}
+    for result in results:
+        for (measurement, tags), points in result.items():
+            for point in points:
+                last[tags['symbol']].update((key, value) for key, value in point.items()
+                                            if key != 'time' and value is not None)
+    return last
+
+
+def get_ema200(symbol, age=5*23*3600):
+    return get_last([symbol], ema200_age=age)[symbol].get('ema200')
+
+
+def get_price(symbol, age=23*3600):
+    last = get_last([symbol], price_age=age)[symbol]
+    return last.get('price'), last.get('change_percent')
 
 
-def fetch_ema200_alpha(symbol, key=configs.alphaconf.key):
+def fetch_ema200_alpha(symbol, key=configs.alphaconf.key, cached=None):
+    """EMA200 from the cached value of get_last, from InfluxDB if it is not given or from the WEB"""
     url = 'https://www.alphavantage.co/query?function=' + \
           'EMA&symbol={}&interval=daily&time_period=200&series_type=close&apikey={}'.format(symbol, key)
     retry = 0
 
     # Check cache
-    try:
-        ema200 = get_ema200(symbol)
-    except:
-        ema200 = None
+    if cached is not None:
+        ema200 = cached.get('ema200')
+    else:
+        try:
+            ema200 = get_ema200(symbol)
+        except:
+            ema200 = None
 
     if ema200:
         logging.info(symbol + ' Got EMA200 from InfluxDB: ' + str(ema200))
@@ -110,16 +115,44 @@ def fetch_ema200_alpha(symbol, key=configs.alphaconf.key):
     return ema200
 
 
-def fetch_price_alpha(symbol, key=configs.alphaconf.key):
+def fetch_local(symbol, key=configs.alphaconf.key, cached=None, cachebase='..'):
+    """
+    Price, change percent and EMA200 of the cached daily history, a single Alpha Vantage call updates all of them
+
+    Values of get_last are used as they are if they are fresh, the history is not updated then
+    """
+    cached = cached or dict()
+    if cached.get('price') and cached.get('ema200'):
+        logging.info(symbol + ' Got price and EMA200 from InfluxDB')
+        return cached['price'], cached.get('change_percent'), cached['ema200']
+
+    try:
+        core = libs.datacore.DATACORE(symbol=symbol, source='alpha', key=key, cachebase=cachebase)
+        ema200 = core.get_last_ema(200)
+        # Bars are stored by get_last_ema, the fresh store is not updated again
+        closes = libs.datacore.fix_alpha_columns(core.load('alpha', bars=200))['Close'].values
+        price = float(closes[-1])
+        change_percent = round(float(100 * (closes[-1] / closes[-2] - 1)), 4)
+    except:
+        logging.error('Can not calculate price and EMA200 of ' + symbol)
+        return None, None, None
+    return price, change_percent, ema200
+
+
+def fetch_price_alpha(symbol, key=configs.alphaconf.key, cached=None):
+    """Price and change percent from the cached values of get_last, from InfluxDB if they are not given or the WEB"""
     url = 'https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={}&apikey={}'.format(symbol, key)
     retry = 0
 
     # Check cache
-    try:
-        price, change_percent = get_price(symbol)
-    except:
-        price = None
-        change_percent = None
+    if cached is not None:
+        price, change_percent = cached.get('price'), cached.get('change_percent')
+    else:
+        try:
+            price, change_percent = get_price(symbol)
+        except:
+            price = None
+            change_percent = None
 
     if price:
         logging.info(symbol + ' Got price from InfluxDB: ' + str(price))
@@ -147,29 +180,36 @@ def fetch_price_alpha(symbol, key=configs.alphaconf.key):
     return price, change_percent
 
 
-def fetch(write_to_influx=True, datatype='fxit'):
-    if write_to_influx:
-        influx_client = InfluxDBClient(
-            configs.influx.HOST,
-            configs.influx.PORT,
-            configs.influx.DBUSER,
-            configs.influx.DBPWD,
-            configs.influx.DBNAME,
-            timeout=5
-        )
+def fetch(write_to_influx=True, datatype='fxit', batch_size=100, local_ema=True):
+    """
+    Collect prices and EMA200 of symbols
 
+    Args:
+        write_to_influx: Write points to InfluxDB, batch_size points at once
+        datatype: fxit or portfolio symbols
+        local_ema: Take the price, change percent and EMA200 from the cached daily history,
+                   Alpha Vantage quote and EMA are used otherwise
+    """
     if datatype == 'fxit':
         symbols = configs.fxit.holdings
     if datatype == 'portfolio':
-        symbols = configs.alphaconf.symbols
+        symbols = [list(symbol.keys())[0] for symbol in configs.alphaconf.symbols]
 
-    for symbol in symbols:
-        if datatype == 'portfolio':
-            symbol = list(symbol.keys())[0]
+    # Values stored by the previous runs, a request for all symbols
+    try:
+        cached = get_last(symbols)
+    except:
+        logging.error('Can not read InfluxDB')
+        cached = {symbol: dict() for symbol in symbols}
 
-        price, change_percent = fetch_price_alpha(symbol)
+    points = list()
+    for symbol in symbols:
+        if local_ema:
+            price, change_percent, ema200 = fetch_local(symbol, cached=cached[symbol])
+        else:
+            price, change_percent = fetch_price_alpha(symbol, cached=cached[symbol])
+            ema200 = fetch_ema200_alpha(symbol, cached=cached[symbol])
         logging.info(symbol + ' price: ' + str(price))
-        ema200 = fetch_ema200_alpha(symbol)
         logging.info(symbol + ' ema200: ' + str(ema200))
 
         if type(ema200) != float:
@@ -188,7 +228,7 @@ def fetch(write_to_influx=True, datatype='fxit'):
             symbol_type = 'Portfolio'
 
         if write_to_influx:
-            json_body = [
+            points.append(
                 {
                     "measurement": "data",
                     "tags": {
@@ -202,8 +242,13 @@ def fetch(write_to_influx=True, datatype='fxit'):
                         "change_percent": change_percent,
                     }
                 }
-            ]
-            influx_client.write_points(json_body)
+            )
+            if len(points) >= batch_size:
+                get_client().write_points(points)
+                points = list()
+
+    if points:
+        get_client().write_points(points)
 
 
 if __name__ == "__main__":
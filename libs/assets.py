@@ -5,54 +5,46 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath('..'))
 import pandas as pd
-import pandas_datareader as pdr
-from datetime import datetime, timedelta
 from pprint import pprint
 import matplotlib.pyplot as plt
-import talib
-import pandas_montecarlo
-from alpha_vantage.timeseries import TimeSeries
+import libs.montecarlo
+import libs.rng
+import libs.fetcher
+import libs.datacore
 import collections
 import json
 import numpy as np
-import requests
 from pandas.plotting import register_matplotlib_converters
 register_matplotlib_converters()
 
 
-class ASSET(object):
+class ASSET(libs.datacore.DATACORE):
     """Single asset"""
 
     def __init__(self, symbol='', source='moex', asset_type='stock', key='demo', min_goal=0.1,
                  volumefield='VOLUME', atr_multiplier=5, cacheage=3600*12, cachebase='',
-                 kc_channel=2, caching=True):
+                 kc_channel=2, caching=True, seed=None):
         """
         source: moex, alpha
         type: stock, futures
+        seed: Seed of simulations, the symbol has its own stream of it, see libs.rng
         """
-        self.symbol = symbol
+        boardid = 'TQBR'
+        if asset_type == 'futures':
+            boardid = 'RFUD'
+        if asset_type == 'currency':
+            boardid = 'CETS'
+            volumefield = 'VOLRUR'
+        if asset_type == 'etf':
+            boardid = 'TQTF'
+
+        super().__init__(symbol=symbol, source=source, boardid=boardid, volumefield=volumefield, key=key,
+                         cacheage=cacheage, cachebase=cachebase, caching=caching, kc_channel=kc_channel)
         self.asset_type = asset_type
-        self.source = source
-        self.volumefield = volumefield
-        self.cacheage = cacheage
-        self.caching = caching
-        self.key = key
-        self.cachebase = cachebase
         self.min_goal = min_goal
         self.atr_multiplier = atr_multiplier
-        self.kc_channel = kc_channel
-
-        if self.asset_type == 'stock':
-            self.boardid = 'TQBR'
-        if self.asset_type == 'futures':
-            self.boardid = 'RFUD'
-        if self.asset_type == 'currency':
-            self.boardid = 'CETS'
-            self.volumefield = 'VOLRUR'
-        if self.asset_type == 'etf':
-            self.boardid = 'TQTF'
-
-        self.df = None
+        self.seed = libs.rng.get_seed(seed)
+
         self.trend = ''
         self.anomalies = 0
         self.lastprice = 0
@@ -91,10 +83,7 @@ class ASSET(object):
         # Calculate some stats
         self.get_lastprice()
         self.get_goalprice()
-        self.get_atr(period=5)
-        self.get_ema(period=5)
-        self.get_ema(period=20)
-        self.get_kc()
+        self.get_indicators(period=5)
 
         # Stop loss
         self.get_stoploss()
@@ -131,6 +120,7 @@ class ASSET(object):
         result[self.symbol]['reward_risk_ratio'] = self.rewardriskratio
         result[self.symbol]['trend'] = self.trend
         result[self.symbol]['anomalies'] = float(self.anomalies)
+        result[self.symbol]['seed'] = self.seed
         return result
 
     def get_goalprice(self):
@@ -152,122 +142,13 @@ class ASSET(object):
 
     def get_data(self):
         if self.source == 'moex':
-            self.get_data_from_moex(cachedir=os.path.join(self.cachebase, 'cache-m'))
+            self.get_data_from_moex()
         if self.source == 'alpha':
-            self.get_prices_from_alpha(key=self.key, cachedir=os.path.join(self.cachebase, 'cache'))
+            self.get_prices_from_alpha(key=self.key)
             self.fix_alpha_columns()
         self.df = self.df.fillna(method='ffill')
         self.df = self.df.fillna(method='bfill')
 
-    def get_prices_from_alpha(self, key='', cachedir='cache'):
-        if self.caching:
-            if not os.path.isdir(cachedir):
-                os.mkdir(cachedir)
-            filename = self.symbol + '.csv'
-            filepath = os.path.join(cachedir, filename)
-            if os.path.isfile(filepath):
-                age = time.time() - os.path.getmtime(filepath)
-                if age > self.cacheage:
-                    os.remove(filepath)
-                else:
-                    data = pd.read_csv(filepath, index_col='date')
-                    self.df = data
-                    return data
-
-        data = self.fetch_alpha(key=key, size='compact')
-        if self.caching:
-            data.to_csv(filepath)
-
-        self.df = data
-        return data
-
-    def get_ema200_alpha(self, key='demo'):
-        url = 'https://www.alphavantage.co/query?function=' + \
-            'EMA&symbol={}&interval=daily&time_period=200&series_type=close&apikey={}'.format(self.symbol, key)
-        try:
-            r = requests.get(url=url)
-            data = r.json()
-            last = data['Meta Data']['3: Last Refreshed']
-            ema200 = float(data['Technical Analysis: EMA'][last]['EMA'])
-        except:
-            ema200 = None
-        return ema200
-
-    def fetch_alpha(self, key='demo', size='compact', timeout=5):
-        ts = TimeSeries(key=key, output_format='pandas')
-        retry = 0
-        while True:
-            try:
-                if self.symbol == 'TCS':
-                    symbol = 'LON:TCS'
-                else:
-                    symbol = self.symbol
-                data, meta_data = ts.get_daily_adjusted(symbol=symbol, outputsize=size)
-                break
-            except:
-                retry += 1
-                if retry > 10:
-                    exit('Can not fetch ' + self.symbol)
-                time.sleep(timeout)
-                continue
-        return data
-
-    def fix_alpha_columns(self):
-        df = self.df
-        df = df.rename(index=str, columns={'3. low': 'Low'})
-        df = df.rename(index=str, columns={'2. high': 'High'})
-        df = df.rename(index=str, columns={'1. open': 'Open'})
-        df = df.rename(index=str, columns={'4. close': 'Close'})
-        df = df.rename(index=str, columns={'6. volume': 'Volume'})
-        df = df.rename(index=str, columns={'5. adjusted close': 'Adjusted close'})
-
-        self.df = df
-        self.df = df.reset_index()
-
-    def fetch_moex(self, days=100, timeout=1):
-        date_N_days_ago = datetime.now() - timedelta(days=days)
-        start = date_N_days_ago.strftime('%m/%d/%Y')
-
-        df = pdr.get_data_moex(self.symbol, pause=timeout, start=start)
-        df = df.reset_index()
-        df = df.query('BOARDID == @self.boardid')
-        filtered = pd.DataFrame()
-        filtered['date'] = df['TRADEDATE']
-        filtered['Open'] = df['OPEN']
-        filtered['Low'] = df['LOW']
-        filtered['High'] = df['HIGH']
-        filtered['Close'] = df['CLOSE']
-        filtered['Volume'] = df[self.volumefield]
-        if self.boardid =='RFUD':
-            filtered['Openpositions'] = df['OPENPOSITION']
-            filtered['Openpositionsvalue'] = df['OPENPOSITIONVALUE']
-
-        return filtered
-
-    def get_data_from_moex(self, cachedir='cache-m', timeout=3, days=100):
-        if self.caching:
-            if not os.path.isdir(cachedir):
-                os.mkdir(cachedir)
-            filename = self.symbol + '.csv'
-            filepath = os.path.join(cachedir, filename)
-            if os.path.isfile(filepath):
-                age = time.time() - os.path.getmtime(filepath)
-                if age > self.cacheage:
-                    os.remove(filepath)
-                else:
-                    data = pd.read_csv(filepath)
-                    self.df = data
-                    return data
-
-        data = self.fetch_moex(days=days, timeout=timeout)
-        self.df = data
-        if self.caching:
-            filepath = os.path.join(cachedir, filename)
-            data.to_csv(filepath, index=False)
-
-        time.sleep(timeout)
-        return data
-
     def plot(self, msg=''):
         columns = self.df.columns
         df = pd.concat([self.df['date'], self.df['Close'], self.df['Volume'], self.df['BreakoutUp'],
@@ -347,39 +228,23 @@ class ASSET(object):
         fig.tight_layout()
         plt.show()
 
-    def get_atr(self, period=5):
-        pricedata = self.df
-        high = pricedata['High'].values
-        low = pricedata['Low'].values
-        close = pricedata['Close'].values
-        low = low.astype(float)
-        high = high.astype(float)
-        close = close.astype(float)
-        output = talib.ATR(high, low, close, timeperiod=period)
-        self.df['ATR'] = output
-        return output
-
-    def get_ema(self, period=5):
-        pricedata = self.df
-        close = pricedata['Close'].values
-        close = close.astype(float)
-        output = talib.EMA(close, timeperiod=period)
-        self.df['EMA' + str(period)] = output
-        return output
-
-    def get_kc(self, period=5):
-        self.df['KC_LOW'] = self.df['EMA' + str(period)] - self.kc_channel * self.df['ATR']
-        self.df['KC_HIGH'] = self.df['EMA' + str(period)] + self.kc_channel * self.df['ATR']
-
-    def get_bust_chance(self, sims=1000, bust=0.1, goal=0.1, plot=False):
-        # Monte-Carlo
+    def get_bust_chance(self, sims=1000, bust=0.1, goal=0.1, plot=False, chunk=1000, tolerance=0):
+        """
+        Monte-Carlo, see libs.montecarlo.simulate_chunked
+
+        Args:
+            sims: Maximum number of simulated paths
+            tolerance: Half width of the bust chance confidence interval to stop at, 0 runs all sims
+        """
         self.df['Return'] = self.df['Close'].pct_change().fillna(0)
 
         # print('Real returns stats:')
         # pprint(self.df['Return'].describe())
         # print()
 
-        mc = self.df['Return'].montecarlo(sims=sims, bust=-1 * bust, goal=goal)
+        mc = libs.montecarlo.simulate_chunked(self.df['Return'].values, sims=sims, bust=bust, goal=goal, chunk=chunk,
+                                              tolerance=tolerance,
+                                              rng=libs.rng.get_generator(self.seed, self.symbol))
 
         # pprint(mc.stats)
         self.bust_chance = mc.stats['bust']
@@ -402,6 +267,38 @@ class ASSET(object):
 
         return self.bust_chance, self.goal_chance
 
+    def get_level_chances(self, goals, busts, sims=10000, chunk=1000):
+        """
+        Chances of every goal and bust level from one simulation, see libs.montecarlo.simulate_levels
+
+        Returns:
+            Series of bust chances by bust level, DataFrame of goal chances by goal and bust levels
+        """
+        returns = self.df['Close'].pct_change().fillna(0).values
+        bust_chances, goal_chances = libs.montecarlo.simulate_levels(returns, goals, busts, sims=sims, chunk=chunk,
+                                                                     rng=libs.rng.get_generator(self.seed, self.symbol))
+
+        # Paranoid on, as get_bust_chance
+        bust_chances = pd.Series(bust_chances + self.blackswan_chance, index=busts)
+        goal_chances = pd.DataFrame(np.minimum(goal_chances, 0.9), index=goals, columns=busts)
+        return bust_chances, goal_chances
+
+    def get_reward_risk_curve(self, goals, sims=10000):
+        """
+        Reward-risk ratio of every goal at the stop loss, get_reward_risk_ratio is the min_goal point of it
+
+        Returns:
+            DataFrame of goal chance, bust chance and reward-risk ratio by goal
+        """
+        bust_chances, goal_chances = self.get_level_chances(goals, [self.stoplosspercent], sims=sims)
+        risk = bust_chances.iloc[0] * (self.df['Close'] - self.df['StopLoss'])
+
+        df = pd.DataFrame({'goal_chance': goal_chances.iloc[:, 0].values}, index=pd.Index(goals, name='goal'))
+        df['bust_chance'] = bust_chances.iloc[0]
+        df['reward_risk_ratio'] = [round((chance * goal * (round(self.lastprice * (1 + goal), 2) - self.df['Close']) /
+                                          risk).mean(), 2) for goal, chance in zip(goals, df['goal_chance'])]
+        return df
+
     def count_anomalies(self):
 
         self.anomaly_filter_up = self.df.Close > (self.df.EMA5 + self.kc_channel * self.df.ATR)
@@ -0,0 +1,160 @@
+"""
+Strategies backtest
+Every symbol is loaded once and all strategies are checked against the same forward profit
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import json
+import functools
+import multiprocessing
+import numpy as np
+import pandas as pd
+import configs.alphaconf
+import libs.stockslib as sl
+import libs.strategy
+import libs.indicatorcache
+
+
+def get_price_type(datatype='m'):
+    if datatype == 'm':
+        return 'Close'
+    return 'Adjusted close'
+
+
+def get_watchdata(datatype='m'):
+    if datatype == 'm':
+        return configs.alphaconf.symbols_m
+    return configs.alphaconf.symbols
+
+
+def get_frame(symbol, window=20, datatype='m', basedir='..'):
+    """Last 5 years of prices with the MAX price of the next window bars"""
+    price_type = get_price_type(datatype)
+    res = sl.RESOURCE(symbol=symbol, cachebase=basedir)
+
+    if datatype == 'm':
+        res.history = res.get_prices_from_moex(days=365 * 5, cacheage=3600*24)
+    else:
+        res.get_prices_from_alpha(key=configs.alphaconf.key, cacheage=3600*24*7)
+        res.get_history_from_alpha(key=configs.alphaconf.key, cacheage=3600*24)
+        res.fix_alpha_columns()
+        res.fix_alpha_history_columns()
+
+    # Cut last data
+    df = res.history.tail(365*5)
+    df = df.reset_index()
+    df = df.drop(axis=1, columns='date')
+
+    # Get Max values
+    MAX = pd.Series(df[price_type].iloc[::-1].rolling(window=window).max(), name='MAX')
+    df = df.join(MAX[::-1])
+    df = df.dropna()
+    df = df.reset_index()
+    df = df.drop(axis=1, columns='index')
+    return df
+
+
+def check_frame(df, strategies, price_type='Close', profit=5):
+    """
+    Ratio of good buys of every strategy
+
+    Args:
+        df: Prices with the MAX column
+        strategies: Strategy names from libs.strategy
+        price_type: Price column
+        profit: Percent to get within the MAX window for a good buy
+
+    Returns:
+        Dictionary strategy: ratio, None if the strategy failed
+    """
+    price = df[price_type].values
+    result = 100 * (df['MAX'].values - price) / price > profit
+    cache = libs.indicatorcache.INDICATORCACHE(df)
+
+    ratios = dict()
+    for name in strategies:
+        # A failed strategy does not stop others
+        try:
+            strategy = getattr(libs.strategy, name)
+            buy = strategy(df, pricetype=price_type, cache=cache)['buy'].values.astype(bool)
+        except Exception as error:
+            print(name, 'failed:', repr(error))
+            ratios[name] = None
+            continue
+        good = np.count_nonzero(buy & result)
+        bad = np.count_nonzero(buy & ~result)
+        if good == 0 and bad == 0:
+            ratios[name] = 0
+        else:
+            ratios[name] = round(good / (good + bad), 2)
+    return ratios
+
+
+def run(strategies=None, window=20, profit=5, max_ratio=0.51, datatype='m', workers=1, basedir='..'):
+    """
+    Check strategies over all watchlist symbols and write data/<datatype>/<strategy>.json
+
+    Args:
+        strategies: Strategy names, all strategies of the config by default
+        window: Bars to look for the MAX price
+        profit: Percent to get within the window for a good buy
+        max_ratio: Ratio of a symbol to count the strategy good for it
+        datatype: m - MOEX, a - Alpha Vantage
+        workers: Processes to check symbols, prices are loaded in the main process
+        basedir: Directory with caches and data
+
+    Returns:
+        Dictionary strategy: {symbol: ratio}, the ratio is None if the strategy failed for the symbol
+    """
+    if strategies is None:
+        strategies = list(configs.alphaconf.ratios.keys())
+    price_type = get_price_type(datatype)
+    watchdata = get_watchdata(datatype)
+
+    # Prices are fetched sequentially to keep providers rate limits
+    symbols = list()
+    frames = list()
+    for item in watchdata:
+        if type(item) == dict:
+            symbol = list(item.keys())[0]
+        else:
+            symbol = item
+        symbols.append(symbol)
+        frames.append(get_frame(symbol, window=window, datatype=datatype, basedir=basedir))
+
+    check = functools.partial(check_frame, strategies=strategies, price_type=price_type, profit=profit)
+    if workers > 1:
+        with multiprocessing.Pool(processes=workers) as pool:
+            checked = pool.map(check, frames)
+    else:
+        checked = [check(df) for df in frames]
+
+    ratios = {name: dict() for name in strategies}
+    for symbol, symbol_ratios in zip(symbols, checked):
+        for name in strategies:
+            ratios[name][symbol] = symbol_ratios[name]
+
+    datadir = os.path.join(basedir, 'data', datatype)
+    if not os.path.isdir(datadir):
+        os.makedirs(datadir)
+
+    for name in strategies:
+        failed = [symbol for symbol, ratio in ratios[name].items() if ratio is None]
+        checked = {symbol: ratio for symbol, ratio in ratios[name].items() if ratio is not None}
+        good_ratio = len([ratio for ratio in checked.values() if ratio > max_ratio])
+        print(name, good_ratio, len(watchdata))
+        print(ratios[name])
+        if failed:
+            print('Failed:', failed)
+        print()
+
+        # Ratio files have weights of checked symbols only
+        if not checked:
+            continue
+        ratiopath = os.path.join(datadir, name + '.json')
+        with open(ratiopath, 'w') as outfile:
+            json.dump(checked, outfile, indent=4)
+
+    return ratios
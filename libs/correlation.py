@@ -0,0 +1,120 @@
+"""
+Correlations between assets
+Prices of every asset are loaded once and aligned on date in a single wide frame
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import numpy as np
+import pandas as pd
+import libs.fetcher
+
+
+def get_closes(assets, names=None):
+    """
+    Close prices of assets aligned on date
+
+    Args:
+        assets: ASSET objects, expired caches are refreshed concurrently
+        names: Column names, asset symbols by default
+
+    Returns:
+        DataFrame with a date index and a column per asset, NaN where an asset has no bar
+    """
+    stale = [asset for asset in assets if asset.caching and not asset.is_cached()]
+    if stale:
+        libs.fetcher.run([asset.prefetch() for asset in stale])
+
+    if names is None:
+        names = [asset.symbol for asset in assets]
+
+    closes = dict()
+    for name, asset in zip(names, assets):
+        asset.get_data()
+        closes[name] = pd.Series(asset.df['Close'].values, index=pd.to_datetime(asset.df['date']))
+    return pd.DataFrame(closes).sort_index()
+
+
+def align(closes, how='inner'):
+    """
+    Common trading calendar of assets
+
+    Args:
+        closes: Wide frame of prices with gaps
+        how: inner - dates all assets were traded at,
+             ffill - all dates, a missing price is the previous close
+
+    Returns:
+        DataFrame without gaps
+    """
+    if how == 'ffill':
+        closes = closes.ffill()
+    return closes.dropna()
+
+
+def get_returns(closes):
+    """Daily returns of every column"""
+    return (closes / closes.shift(1) - 1).iloc[1:]
+
+
+def get_matrix(closes, method='pearson', min_periods=1):
+    """
+    Correlation of every pair of columns
+
+    Args:
+        closes: Wide frame of prices
+        method: pearson or spearman
+        min_periods: Minimum common bars of a pair, used if some prices are missing
+
+    Returns:
+        Symmetric DataFrame of correlations
+    """
+    if closes.isnull().values.any():
+        return closes.corr(method=method, min_periods=min_periods)
+
+    # Without gaps all pairs are calculated in one call
+    values = closes.values.astype(float)
+    if method == 'spearman':
+        values = closes.rank().values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        matrix = np.corrcoef(values, rowvar=False)
+    return pd.DataFrame(np.atleast_2d(matrix), index=closes.columns, columns=closes.columns)
+
+
+def get_correlation(closes, market):
+    """Correlation of every column with the market column, pairs with a missing price are skipped"""
+    return closes.drop(columns=market).corrwith(closes[market])
+
+
+def get_beta(returns, market):
+    """
+    Beta of every column against the market column
+
+    Args:
+        returns: Wide frame of returns, pairs with a missing return are skipped
+        market: Benchmark column
+
+    Returns:
+        Series of betas
+    """
+    stocks = returns.drop(columns=market)
+    valid = stocks.notnull() & returns[[market]].notnull().values
+    stocks = stocks.where(valid)
+    market = pd.DataFrame(np.repeat(returns[[market]].values, len(stocks.columns), axis=1),
+                          index=stocks.index, columns=stocks.columns).where(valid)
+
+    covariance = ((stocks - stocks.mean()) * (market - market.mean())).sum()
+    variance = ((market - market.mean()) ** 2).sum()
+    return covariance / variance
+
+
+def get_rolling_correlation(closes, market, window=20):
+    """Correlation of every column with the market column over the last window bars"""
+    return closes.drop(columns=market).rolling(window).corr(closes[market])
+
+
+def get_rolling_beta(returns, market, window=20):
+    """Beta of every column against the market column over the last window bars"""
+    covariance = returns.drop(columns=market).rolling(window).cov(returns[market])
+    return covariance.div(returns[market].rolling(window).var(), axis=0)
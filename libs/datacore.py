@@ -0,0 +1,298 @@
+"""
+Data access core of ASSET, FUTURES and RESOURCE
+A symbol has a single store per source, bars are fetched by one pipeline,
+indicators are calculated once per frame
+"""
+
+import asyncio
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import json
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import libs.fetcher
+import libs.pricestore
+import libs.indicatorcache
+import libs.streaming
+
+# Alpha Vantage columns of the stored bars
+ALPHA_COLUMNS = {'1. open': 'Open', '2. high': 'High', '3. low': 'Low', '4. close': 'Close',
+                 '5. adjusted close': 'Adjusted close', '6. volume': 'Volume'}
+
+
+def fix_alpha_columns(df):
+    return df.rename(columns=ALPHA_COLUMNS)
+
+
+# Start of an Alpha Vantage full history, it has all bars of a symbol
+HISTORY_START = '1970-01-01'
+
+
+def is_covered(stored, source, days=100, bars=100, start=None):
+    """
+    Stored bars cover the history
+
+    Args:
+        stored: Stored bars with a date column, None if nothing is stored
+        days: MOEX history, a couple of weeks is left for holidays
+        bars: Alpha Vantage history
+        start: Date the stored history was fetched since, a symbol listed later has less bars
+    """
+    if stored is None or len(stored) == 0:
+        return False
+    if source == 'moex':
+        if start is not None and start <= datetime.now() - timedelta(days=days - 14):
+            return True
+        return (stored['date'].iloc[-1] - stored['date'].iloc[0]).days >= days - 14
+    return len(stored) >= bars or start is not None
+
+
+class DATACORE(object):
+    """Prices and indicators of a single symbol"""
+
+    def __init__(self, symbol='', source='moex', boardid='TQBR', volumefield='VOLUME', key='demo',
+                 cacheage=3600*12, cachebase='', caching=True, kc_channel=2):
+        """
+        source: moex, alpha
+        cacheage: Age of stored bars to use them without an update, seconds
+        cachebase: Directory of the cache and cache-m stores
+        """
+        self.symbol = symbol
+        self.source = source
+        self.boardid = boardid
+        self.volumefield = volumefield
+        self.key = key
+        self.cacheage = cacheage
+        self.cachebase = cachebase
+        self.caching = caching
+        self.kc_channel = kc_channel
+
+        self.df = None
+        self.indicators = None
+
+    def get_board(self, source=None):
+        """Price store board, Alpha Vantage has the only daily board"""
+        if (source or self.source) == 'moex':
+            return self.boardid
+        return 'daily'
+
+    def get_store(self, source=None, cachedir=None):
+        if cachedir is None:
+            cachedir = os.path.join(self.cachebase, 'cache-m' if (source or self.source) == 'moex' else 'cache')
+        return libs.pricestore.PRICESTORE(cachedir)
+
+    def is_cached(self, source=None, cachedir=None):
+        source = source or self.source
+        age = self.get_store(source, cachedir).age(source, self.get_board(source), self.symbol)
+        return age is not None and age <= self.cacheage
+
+    async def prefetch(self):
+        """Refresh the expired cache, get_data will read it afterwards"""
+        if not self.caching or self.is_cached():
+            return
+        await self.aupdate(self.get_store())
+
+    async def afetch_alpha(self, key='demo', size='compact'):
+        if self.symbol == 'TCS':
+            symbol = 'LON:TCS'
+        else:
+            symbol = self.symbol
+        try:
+            data = await libs.fetcher.afetch_alpha(symbol, key=key, size=size)
+        except IOError as error:
+            raise IOError('Can not fetch ' + self.symbol) from error
+        return data
+
+    def fetch_alpha(self, key='demo', size='compact'):
+        return asyncio.run(self.afetch_alpha(key=key, size=size))
+
+    async def afetch_moex(self, days=100, start=None):
+        if start is None:
+            start = datetime.now() - timedelta(days=days)
+        start = start.strftime('%Y-%m-%d')
+
+        df = await libs.fetcher.afetch_moex(self.symbol, boardid=self.boardid, start=start)
+        return libs.fetcher.moex_bars(df, boardid=self.boardid, volumefield=self.volumefield)
+
+    def fetch_moex(self, days=100, start=None):
+        return asyncio.run(self.afetch_moex(days=days, start=start))
+
+    async def aupdate(self, store, days=100, bars=100, source=None):
+        """
+        Fetch bars since the last stored one and append them to the store
+
+        Args:
+            store: Price store
+            days: MOEX history, all of it is fetched if stored bars cover less days
+            bars: Alpha Vantage history, the full one is fetched if less bars are stored
+            source: moex or alpha, the asset source by default
+
+        Returns:
+            All stored bars with a date column
+        """
+        source = source or self.source
+        board = self.get_board(source)
+        stored = store.load(source, board, self.symbol)
+        covered = is_covered(stored, source, days=days, bars=bars, start=store.get_start(source, board, self.symbol))
+        since = None if stored is None else stored['date'].iloc[-1]
+
+        # A whole history is fetched since the start, later updates fetch bars since the last stored one
+        start = None
+        if source == 'moex':
+            if not covered:
+                since = None
+                start = datetime.now() - timedelta(days=days)
+            data = await self.afetch_moex(days=days, start=since if since is not None else start)
+        if source == 'alpha':
+            size = libs.fetcher.alpha_outputsize(since)
+            if stored is not None and not covered:
+                size = 'full'
+            if size == 'full':
+                start = HISTORY_START
+            data = await self.afetch_alpha(key=self.key, size=size)
+        stored = store.append(source, board, self.symbol, data)
+        if start is not None:
+            store.set_start(source, board, self.symbol, start)
+        return stored
+
+    def load(self, source=None, cachedir=None, days=100, bars=100):
+        """
+        Bars of the symbol, the store is updated first if it is expired or does not cover the history
+
+        Returns:
+            DataFrame with a date column
+        """
+        source = source or self.source
+        self.source = source
+        if not self.caching:
+            if source == 'moex':
+                return self.fetch_moex(days=days)
+            return self.fetch_alpha(key=self.key, size='full' if bars > 100 else 'compact').reset_index()
+
+        store = self.get_store(source, cachedir)
+        if self.is_cached(source, cachedir):
+            board = self.get_board(source)
+            stored = store.load(source, board, self.symbol)
+            # Fresh bars stored for a shorter history are updated as expired ones
+            if is_covered(stored, source, days=days, bars=bars, start=store.get_start(source, board, self.symbol)):
+                return stored
+        return asyncio.run(self.aupdate(store, days=days, bars=bars, source=source))
+
+    def get_prices_from_alpha(self, key='', cachedir=None, bars=100):
+        if key:
+            self.key = key
+        data = self.load('alpha', cachedir=cachedir, bars=bars).set_index('date').tail(bars)
+        self.df = data
+        return data
+
+    def get_data_from_moex(self, cachedir=None, days=100):
+        data = self.load('moex', cachedir=cachedir, days=days)
+        data = data[data['date'] >= datetime.now() - timedelta(days=days)].reset_index(drop=True)
+        self.df = data
+        return data
+
+    def fix_alpha_columns(self):
+        self.df = fix_alpha_columns(self.df).reset_index()
+
+    def get_frame(self):
+        """Prices indicators are calculated on"""
+        return self.df
+
+    def get_indicator(self, indicator, column='Close', **params):
+        """
+        talib indicator of the prices, see libs.indicatorcache
+
+        Args:
+            indicator: talib function name, EMA, SMA, RSI, ATR, MACD...
+            column: Price column or (indicator, column, output) of another indicator
+            params: talib parameters, timeperiod...
+        """
+        frame = self.get_frame()
+        if self.indicators is None or self.indicators.df is not frame:
+            self.indicators = libs.indicatorcache.INDICATORCACHE(frame)
+        return self.indicators.get(indicator, column=column, **params)
+
+    def get_atr(self, period=5):
+        output = self.get_indicator('ATR', timeperiod=period)
+        self.df['ATR'] = output
+        return output
+
+    def get_ema(self, period=5):
+        output = self.get_indicator('EMA', timeperiod=period)
+        self.df['EMA' + str(period)] = output
+        return output
+
+    def get_kc(self, period=5):
+        self.df['KC_LOW'] = self.df['EMA' + str(period)] - self.kc_channel * self.df['ATR']
+        self.df['KC_HIGH'] = self.df['EMA' + str(period)] + self.kc_channel * self.df['ATR']
+
+    def get_indicators(self, period=5):
+        """
+        ATR, EMA and Keltner channel, same formulas as get_atr, get_ema and get_kc
+
+        Indicator states are kept next to the cached prices,
+        so only bars after the previous run are calculated
+        """
+        indicators = [libs.streaming.ATR(period=period), libs.streaming.EMA(period=period),
+                      libs.streaming.EMA(period=20), libs.streaming.KC(period=period, multiplier=self.kc_channel)]
+        path = None
+        if self.caching:
+            path = self.get_store().path(self.source, self.get_board(), self.symbol).replace('.npy', '.indicators')
+
+        output = libs.streaming.INDICATORS(indicators, path=path).run(self.df)
+        for column in output.columns:
+            self.df[column] = output[column].values
+        return output
+
+    def get_last_ema(self, period=200, source=None, cachedir=None):
+        """
+        EMA of the stored daily closes, the same value the Alpha Vantage EMA endpoint returns
+
+        The whole history is calculated once with talib, the EMA state is kept next to the cached prices
+        and only bars after the previous call are pushed to it
+
+        Returns:
+            Last EMA value, None if there are less bars than the period
+        """
+        source = source or self.source
+        # A short store is updated once, the full Alpha Vantage history is fetched then
+        days, bars = period * 2, period
+        df = fix_alpha_columns(self.load(source, cachedir, days=days, bars=bars))
+        if len(df) < period:
+            return None
+
+        dates = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d').values
+        closes = df['Close'].values.astype(float)
+        ema = libs.streaming.EMA(period=period)
+
+        path = None
+        state = None
+        if self.caching:
+            store = self.get_store(source, cachedir)
+            path = store.path(source, self.get_board(source), self.symbol)
+            path = path.replace('.npy', '.ema' + str(period) + '.json')
+            if os.path.isfile(path):
+                with open(path) as infile:
+                    state = json.load(infile)
+
+        # Continue from the last calculated bar if it is unchanged, otherwise calculate everything again
+        start = None
+        if state is not None:
+            last = np.flatnonzero(dates == state['date'])
+            if len(last) == 1 and closes[last[0]] == state['close']:
+                start = last[0] + 1
+                ema.set_state(state['ema'])
+        if start is None:
+            ema.set_state({'count': len(closes), 'total': 0.0,
+                           'value': float(libs.indicatorcache.INDICATORCACHE(df).get('EMA', timeperiod=period)[-1])})
+        else:
+            for price in closes[start:]:
+                ema.push(price)
+
+        if path and start != len(closes):
+            with open(path + '.tmp', 'w') as outfile:
+                json.dump({'date': dates[-1], 'close': float(closes[-1]), 'ema': ema.get_state()}, outfile)
+            os.replace(path + '.tmp', path)
+        return round(float(ema.value), 4)
@@ -0,0 +1,289 @@
+"""
+Concurrent MOEX ISS and Alpha Vantage fetcher
+https://iss.moex.com/iss/reference/
+https://www.alphavantage.co/documentation/
+
+Requests are throttled by a token bucket per provider instead of fixed sleeps,
+so a cold cache refresh is bounded by the providers rate limits only
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import math
+import time
+import asyncio
+import functools
+import threading
+import requests
+import pandas as pd
+
+MOEX_URL = 'https://iss.moex.com/iss'
+ALPHA_URL = 'https://www.alphavantage.co/query'
+
+# Requests per second and burst size, Alpha Vantage free key allows 5 calls per minute
+RATES = {
+    'moex': (5, 5),
+    'alpha': (5 / 60, 1),
+}
+
+# MOEX ISS engine and market of a board
+BOARDS = {
+    'TQBR': ('stock', 'shares'),
+    'TQTF': ('stock', 'shares'),
+    'CETS': ('currency', 'selt'),
+    'RFUD': ('futures', 'forts'),
+}
+
+# ISS history page size and approximate number of securities traded on a board at a date
+ISS_PAGESIZE = 100
+BOARD_SECURITIES = {
+    'TQBR': 260,
+    'TQTF': 150,
+    'CETS': 40,
+    'RFUD': 500,
+}
+
+ALPHA_COLUMNS = ['1. open', '2. high', '3. low', '4. close', '5. adjusted close', '6. volume',
+                 '7. dividend amount', '8. split coefficient']
+
+
+class TOKENBUCKET(object):
+    """Token bucket rate limiter, usable from threads and coroutines"""
+
+    def __init__(self, rate=1, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, returns seconds to wait before it may be used"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def wait(self):
+        time.sleep(self.reserve())
+
+    async def acquire(self):
+        await asyncio.sleep(self.reserve())
+
+
+limiters = dict()
+
+
+def limiter(provider):
+    if provider not in limiters:
+        rate, capacity = RATES[provider]
+        limiters[provider] = TOKENBUCKET(rate=rate, capacity=capacity)
+    return limiters[provider]
+
+
+def set_rate(provider, rate, capacity=1):
+    """Override a provider rate limit, requests per second"""
+    RATES[provider] = (rate, capacity)
+    limiters[provider] = TOKENBUCKET(rate=rate, capacity=capacity)
+
+
+async def get_json(provider, url, params=None, timeout=10, retries=10, backoff=1, max_backoff=60):
+    """
+    Rate limited GET in the default executor
+
+    Network, server and rate limit errors and Alpha Vantage notes are retried, a retry waits backoff seconds
+    doubled by every next one up to max_backoff. Client errors and Alpha Vantage error and information messages
+    fail at once, retries of them would spend the provider quota only
+    """
+    loop = asyncio.get_running_loop()
+    retry = 0
+    while True:
+        await limiter(provider).acquire()
+        try:
+            r = await loop.run_in_executor(None, functools.partial(requests.get, url, params=params,
+                                                                   timeout=timeout))
+            if 400 <= r.status_code < 500 and r.status_code != 429:
+                raise IOError('Can not fetch {}, HTTP {}'.format(url, r.status_code))
+            r.raise_for_status()
+            data = r.json()
+            # Information is a daily quota or a premium endpoint message, it does not pass by waiting
+            for message in ['Error Message', 'Information']:
+                if message in data:
+                    raise IOError('Can not fetch {}, {}'.format(url, data[message]))
+            if 'Note' in data:
+                raise ValueError(data['Note'])
+            return data
+        except (requests.RequestException, ValueError):
+            retry += 1
+            if retry > retries:
+                raise IOError('Can not fetch ' + url)
+            await asyncio.sleep(min(backoff * 2 ** (retry - 1), max_backoff))
+
+
+def iss_frame(block):
+    return pd.DataFrame(block['data'], columns=block['columns'])
+
+
+async def get_pages(path, params):
+    """All pages of an ISS history request, pages after the first one are fetched concurrently"""
+    async def get_page(start):
+        data = await get_json('moex', path, params=dict(params, start=start))
+        return iss_frame(data['history']), iss_frame(data['history.cursor'])
+
+    page, cursor = await get_page(0)
+    pages = [page]
+    if not cursor.empty:
+        index, total, pagesize = cursor.iloc[0][['INDEX', 'TOTAL', 'PAGESIZE']]
+        rest = await asyncio.gather(*[get_page(start) for start in range(index + pagesize, total, pagesize)])
+        pages += [page for page, cursor in rest]
+
+    return pd.concat(pages, ignore_index=True)
+
+
+async def afetch_moex(symbol, boardid='TQBR', start=None, till=None, url=MOEX_URL):
+    """
+    Daily history of a security on a single board
+
+    Args:
+        symbol: Security ID
+        boardid: TQBR, TQTF, CETS or RFUD
+        start: First date, YYYY-MM-DD
+        till: Last date, YYYY-MM-DD
+
+    Returns:
+        ISS history rows, all columns
+    """
+    engine, market = BOARDS[boardid]
+    path = '{}/history/engines/{}/markets/{}/boards/{}/securities/{}.json'.format(url, engine, market, boardid,
+                                                                               symbol)
+    params = {'iss.meta': 'off', 'iss.only': 'history,history.cursor'}
+    if start:
+        params['from'] = start
+    if till:
+        params['till'] = till
+
+    return await get_pages(path, params)
+
+
+async def afetch_moex_board(boardid='TQBR', date=None, url=MOEX_URL):
+    """
+    Daily history of all securities traded on a board at the date
+
+    Args:
+        boardid: TQBR, TQTF, CETS or RFUD
+        date: Trading date, YYYY-MM-DD
+
+    Returns:
+        ISS history rows, all columns
+    """
+    engine, market = BOARDS[boardid]
+    path = '{}/history/engines/{}/markets/{}/boards/{}/securities.json'.format(url, engine, market, boardid)
+    params = {'iss.meta': 'off', 'iss.only': 'history,history.cursor', 'date': date}
+    return await get_pages(path, params)
+
+
+def moex_bars(df, boardid='TQBR', volumefield='VOLUME'):
+    """Daily bars from ISS history rows"""
+    filtered = pd.DataFrame()
+    filtered['date'] = pd.to_datetime(df['TRADEDATE'])
+    filtered['Open'] = df['OPEN']
+    filtered['Low'] = df['LOW']
+    filtered['High'] = df['HIGH']
+    filtered['Close'] = df['CLOSE']
+    filtered['Volume'] = df[volumefield]
+    if boardid == 'RFUD':
+        filtered['Openpositions'] = df['OPENPOSITION']
+        filtered['Openpositionsvalue'] = df['OPENPOSITIONVALUE']
+    return filtered
+
+
+def board_requests(boardid, start, till=None):
+    """Requests of aupdate_board, every trading date takes a page per ISS_PAGESIZE securities of the board"""
+    dates = len(pd.bdate_range(start, till if till is not None else pd.Timestamp.now()))
+    return dates * math.ceil(BOARD_SECURITIES.get(boardid, ISS_PAGESIZE) / ISS_PAGESIZE)
+
+
+def symbol_requests(start, till=None):
+    """Requests of afetch_moex, a page per ISS_PAGESIZE bars"""
+    dates = len(pd.bdate_range(start, till if till is not None else pd.Timestamp.now()))
+    return max(1, math.ceil(dates / ISS_PAGESIZE))
+
+
+async def aupdate_board(store, boardid='TQBR', start=None, till=None, symbols=None, url=MOEX_URL):
+    """
+    Fetch market wide history of a board date by date and append it to the per symbol store,
+    a handful of requests per date instead of requests per symbol
+
+    Args:
+        store: Price store
+        boardid: TQBR, TQTF, CETS or RFUD
+        start: First date
+        till: Last date, today by default
+        symbols: Symbols to store, all traded symbols by default
+
+    Returns:
+        Updated symbols
+    """
+    if till is None:
+        till = pd.Timestamp.now()
+    dates = [date.strftime('%Y-%m-%d') for date in pd.bdate_range(start, till)]
+    pages = await asyncio.gather(*[afetch_moex_board(boardid, date=date, url=url) for date in dates])
+    df = pd.concat(pages, ignore_index=True)
+    if df.empty:
+        return list()
+
+    if symbols is not None:
+        df = df[df['SECID'].isin(symbols)]
+    volumefield = 'VOLRUR' if boardid == 'CETS' else 'VOLUME'
+
+    updated = list()
+    for symbol, rows in df.groupby('SECID'):
+        store.append('moex', boardid, symbol, moex_bars(rows, boardid=boardid, volumefield=volumefield))
+        updated.append(symbol)
+    return updated
+
+
+async def afetch_alpha(symbol, key='demo', size='compact', url=ALPHA_URL):
+    """Daily adjusted prices, same frame as alpha_vantage TimeSeries.get_daily_adjusted"""
+    params = {'function': 'TIME_SERIES_DAILY_ADJUSTED', 'symbol': symbol, 'outputsize': size, 'apikey': key}
+    data = await get_json('alpha', url, params=params)
+    df = pd.DataFrame.from_dict(data['Time Series (Daily)'], orient='index', dtype=float)
+    df = df[ALPHA_COLUMNS].sort_index()
+    df.index = pd.to_datetime(df.index)
+    df.index.name = 'date'
+    return df
+
+
+def alpha_outputsize(since=None):
+    """Compact output has the last 100 bars, enough to continue a history stored since the date"""
+    if since is not None and (pd.Timestamp.now() - since).days < 140:
+        return 'compact'
+    return 'full'
+
+
+def fetch_moex(symbol, boardid='TQBR', start=None, till=None, url=MOEX_URL):
+    return asyncio.run(afetch_moex(symbol, boardid=boardid, start=start, till=till, url=url))
+
+
+def fetch_alpha(symbol, key='demo', size='compact', url=ALPHA_URL):
+    return asyncio.run(afetch_alpha(symbol, key=key, size=size, url=url))
+
+
+def fetch_moex_board(boardid='TQBR', date=None, url=MOEX_URL):
+    return asyncio.run(afetch_moex_board(boardid=boardid, date=date, url=url))
+
+
+def update_board(store, boardid='TQBR', start=None, till=None, symbols=None, url=MOEX_URL):
+    return asyncio.run(aupdate_board(store, boardid=boardid, start=start, till=till, symbols=symbols, url=url))
+
+
+def run(coroutines):
+    """Run coroutines concurrently, returns their results in the same order"""
+    async def gather():
+        return await asyncio.gather(*coroutines)
+    return asyncio.run(gather())
@@ -0,0 +1,84 @@
+"""
+In-memory frame cache
+Frames loaded in a process are kept by key until the cache size limit is reached,
+the least recently used ones are evicted first
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import threading
+import collections
+
+
+class FRAMECACHE(object):
+    """LRU cache of DataFrames bounded by their memory size"""
+
+    def __init__(self, maxbytes=256 * 1024 * 1024):
+        self.maxbytes = maxbytes
+        self.frames = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, stamp=None):
+        """
+        Copy of a cached frame
+
+        Args:
+            key: Frame key
+            stamp: Version of the frame source, a frame cached with another stamp is dropped
+
+        Returns:
+            DataFrame, None if the frame is not cached
+        """
+        with self.lock:
+            if key in self.frames:
+                cached_stamp, df, size = self.frames[key]
+                if cached_stamp == stamp:
+                    self.frames.move_to_end(key)
+                    self.hits += 1
+                    return df.copy()
+                self.remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, df, stamp=None):
+        """Cache a copy of the frame, frames bigger than the cache are not kept"""
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self.lock:
+            if key in self.frames:
+                self.remove(key)
+            if size > self.maxbytes:
+                return
+            self.frames[key] = (stamp, df.copy(), size)
+            self.size += size
+            while self.size > self.maxbytes:
+                self.remove(next(iter(self.frames)))
+
+    def discard(self, key):
+        with self.lock:
+            if key in self.frames:
+                self.remove(key)
+
+    def remove(self, key):
+        stamp, df, size = self.frames.pop(key)
+        self.size -= size
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.size = 0
+
+
+# Cache shared by all price stores of the process
+frames = FRAMECACHE()
+
+
+def set_size(maxbytes):
+    """Change the process frame cache limit, bytes"""
+    with frames.lock:
+        frames.maxbytes = maxbytes
+        while frames.size > frames.maxbytes:
+            frames.remove(next(iter(frames.frames)))
@@ -10,116 +10,24 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath('..'))
 import pandas as pd
-import pandas_datareader as pdr
-from datetime import datetime, timedelta
 from pprint import pprint
 import matplotlib.pyplot as plt
-import talib
-import pandas_montecarlo
-from alpha_vantage.timeseries import TimeSeries
+import libs.montecarlo
+import libs.rng
+import libs.datacore
 
-class FUTURES(object):
+
+class FUTURES(libs.datacore.DATACORE):
     """Single futures"""
 
-    def __init__(self, symbol='', boardid='RFUD', volumefield='VOLUME', cacheage=3600*24*5):
-        self.symbol = symbol
-        self.df = None
-        self.boardid = boardid
-        self.volumefield = volumefield
-        self.cacheage = cacheage
+    def __init__(self, symbol='', boardid='RFUD', volumefield='VOLUME', cacheage=3600*24*5, cachebase='',
+                 seed=None):
+        super().__init__(symbol=symbol, boardid=boardid, volumefield=volumefield, cacheage=cacheage,
+                         cachebase=cachebase, kc_channel=2)
+        self.seed = libs.rng.get_seed(seed)
 
         self.trend = ''
 
-    def get_prices_from_alpha(self, key='', cachedir='cache'):
-        if not os.path.isdir(cachedir):
-            os.mkdir(cachedir)
-        filename = self.symbol + '.csv'
-        filepath = os.path.join(cachedir, filename)
-        if os.path.isfile(filepath):
-            age = time.time() - os.path.getmtime(filepath)
-            if age > self.cacheage:
-                os.remove(filepath)
-            else:
-                data = pd.read_csv(filepath, index_col='date')
-                self.df = data
-                return data
-
-        data = self.fetch_alpha(key=key, size='compact')
-        data.to_csv(filepath)
-
-        self.df = data
-        return data
-
-    def fetch_alpha(self, key='demo', size='compact', timeout=5):
-        ts = TimeSeries(key=key, output_format='pandas')
-        retry = 0
-        while True:
-            try:
-                data, meta_data = ts.get_daily_adjusted(symbol=self.symbol, outputsize=size)
-                break
-            except:
-                retry += 1
-                if retry > 10:
-                    exit('Can not fetch ' + self.symbol)
-                time.sleep(timeout)
-                continue
-        return data
-
-    def fix_alpha_columns(self):
-        df = self.df
-        df = df.rename(index=str, columns={'3. low': 'Low'})
-        df = df.rename(index=str, columns={'2. high': 'High'})
-        df = df.rename(index=str, columns={'1. open': 'Open'})
-        df = df.rename(index=str, columns={'4. close': 'Close'})
-        df = df.rename(index=str, columns={'6. volume': 'Volume'})
-        df = df.rename(index=str, columns={'5. adjusted close': 'Adjusted close'})
-
-        self.df = df
-        self.df = df.reset_index()
-
-    def fetch_moex(self, days=100, timeout=1):
-        date_N_days_ago = datetime.now() - timedelta(days=days)
-        start = date_N_days_ago.strftime('%m/%d/%Y')
-
-        df = pdr.get_data_moex(self.symbol, pause=timeout, start=start)
-        df = df.reset_index()
-        df = df.query('BOARDID == @self.boardid')
-        filtered = pd.DataFrame()
-        filtered['date'] = df['TRADEDATE']
-        filtered['Open'] = df['OPEN']
-        filtered['Low'] = df['LOW']
-        filtered['High'] = df['HIGH']
-        filtered['Close'] = df['CLOSE']
-        filtered['Volume'] = df[self.volumefield]
-        if self.boardid =='RFUD':
-            filtered['Openpositions'] = df['OPENPOSITION']
-            filtered['Openpositionsvalue'] = df['OPENPOSITIONVALUE']
-
-        return filtered
-
-    def get_data_from_moex(self, cachedir='cache-m', timeout=3, days=100):
-        if not os.path.isdir(cachedir):
-            os.mkdir(cachedir)
-        filename = self.symbol + '.csv'
-        filepath = os.path.join(cachedir, filename)
-        if os.path.isfile(filepath):
-            age = time.time() - os.path.getmtime(filepath)
-            if age > self.cacheage:
-                os.remove(filepath)
-            else:
-                data = pd.read_csv(filepath)
-                self.df = data
-                return data
-
-        data = self.fetch_moex(days=days, timeout=timeout)
-        self.df = data
-        filepath = os.path.join(cachedir, filename)
-        data.to_csv(filepath, index=False)
-
-        time.sleep(timeout)
-
-        return data
-
     def plot(self):
         columns = self.df.columns
         df = pd.concat([self.df['date'], self.df['Close'], self.df['Volume']], axis=1)
@@ -178,39 +86,23 @@ class FUTURES(object):
         fig.tight_layout()
         plt.show()
 
-    def get_atr(self, period=5):
-        pricedata = self.df
-        high = pricedata['High'].values
-        low = pricedata['Low'].values
-        close = pricedata['Close'].values
-        low = low.astype(float)
-        high = high.astype(float)
-        close = close.astype(float)
-        output = talib.ATR(high, low, close, timeperiod=period)
-        self.df['ATR'] = output
-        return output
-
-    def get_ema(self, period=5):
-        pricedata = self.df
-        close = pricedata['Close'].values
-        close = close.astype(float)
-        output = talib.EMA(close, timeperiod=period)
-        self.df['EMA' + str(period)] = output
-        return output
-
-    def get_kc(self, period=5):
-        self.df['KC_LOW'] = self.df['EMA' + str(period)] - 2 * self.df['ATR']
-        self.df['KC_HIGH'] = self.df['EMA' + str(period)] + 2 * self.df['ATR']
-
-    def get_bust_chance(self, sims=1000, bust=0.1, goal=0.1, plot=False):
-        # Monte-Carlo
+    def get_bust_chance(self, sims=1000, bust=0.1, goal=0.1, plot=False, chunk=1000, tolerance=0):
+        """
+        Monte-Carlo, see libs.montecarlo.simulate_chunked
+
+        Args:
+            sims: Maximum number of simulated paths
+            tolerance: Half width of the bust chance confidence interval to stop at, 0 runs all sims
+        """
         self.df['Return'] = self.df['Close'].pct_change().fillna(0)
 
         # print('Real returns stats:')
         # pprint(self.df['Return'].describe())
         # print()
 
-        mc = self.df['Return'].montecarlo(sims=sims, bust=-1 * bust, goal=goal)
+        mc = libs.montecarlo.simulate_chunked(self.df['Return'].values, sims=sims, bust=bust, goal=goal, chunk=chunk,
+                                              tolerance=tolerance,
+                                              rng=libs.rng.get_generator(self.seed, self.symbol))
 
         # pprint(mc.stats)
         bust_chance = mc.stats['bust']
@@ -224,15 +116,38 @@ class FUTURES(object):
 
         return bust_chance, goal_chance
 
+    def get_level_chances(self, goals, busts, sims=10000, chunk=1000):
+        """
+        Chances of every goal and bust level from one simulation, see libs.montecarlo.simulate_levels
+
+        Returns:
+            Series of bust chances by bust level, DataFrame of goal chances by goal and bust levels
+        """
+        returns = self.df['Close'].pct_change().fillna(0).values
+        bust_chances, goal_chances = libs.montecarlo.simulate_levels(returns, goals, busts, sims=sims, chunk=chunk,
+                                                                     rng=libs.rng.get_generator(self.seed, self.symbol))
+        return pd.Series(bust_chances, index=busts), pd.DataFrame(goal_chances, index=goals, columns=busts)
+
+    def get_reward_risk_curve(self, goals, bust=0.1, sims=10000):
+        """
+        Reward-risk ratio of every goal, the data must have StopLoss
+
+        Returns:
+            DataFrame of goal chance, bust chance and reward-risk ratio by goal
+        """
+        bust_chances, goal_chances = self.get_level_chances(goals, [bust], sims=sims)
+        bust_chance = max(bust_chances.iloc[0], 0.001)
+        risk = (self.df['Close'] / (bust_chance * (self.df['Close'] - self.df['StopLoss']))).mean()
+
+        df = pd.DataFrame({'goal_chance': goal_chances.iloc[:, 0].values}, index=pd.Index(goals, name='goal'))
+        df['bust_chance'] = bust_chances.iloc[0]
+        df['reward_risk_ratio'] = df['goal_chance'] * df.index * risk
+        return df
+
     def count_anomalies(self, period=5, ratio=2):
-        low = self.df['Low'].values
-        low = low.astype(float)
-        high = self.df['High'].values
-        high = high.astype(float)
-        close = self.df['Close'].values
-        close = close.astype(float)
-        atr = talib.ATR(high, low, close, timeperiod=period)
-        ema = talib.EMA(close, timeperiod=period)
+        close = self.df['Close'].values.astype(float)
+        atr = self.get_indicator('ATR', timeperiod=period)
+        ema = self.get_indicator('EMA', timeperiod=period)
 
         ema = ema[period:]
         atr = atr[period:]
@@ -0,0 +1,53 @@
+"""
+Indicator cache
+Indicators of a price frame are calculated once and shared by all strategies
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import talib
+
+# Indicators which take High and Low besides the price column
+HLC = ['ATR', 'NATR', 'TRANGE', 'ADX', 'CCI', 'WILLR']
+
+
+class INDICATORCACHE(object):
+    """Memoized talib indicators of a single price frame"""
+
+    def __init__(self, df):
+        self.df = df
+        self.values = dict()
+        self.misses = 0
+
+    def get_input(self, column):
+        """Frame column or an output of another indicator given as (indicator, column, output)"""
+        if isinstance(column, tuple):
+            indicator, column, output = column
+            return self.get(indicator, column=column)[output]
+        return self.df[column].values.astype(float)
+
+    def get(self, indicator, column='Close', **params):
+        """
+        Indicator values, calculated on the first call only
+
+        Args:
+            indicator: talib function name, EMA, SMA, RSI, ATR, MACD...
+            column: Price column or (indicator, column, output) of another cached indicator
+            params: talib parameters, timeperiod...
+
+        Returns:
+            Array, tuple of arrays for indicators with several outputs
+        """
+        key = (indicator, tuple(sorted(params.items())), column)
+        if key not in self.values:
+            self.misses += 1
+            method = getattr(talib, indicator)
+            price = self.get_input(column)
+            if indicator in HLC:
+                high = self.df['High'].values.astype(float)
+                low = self.df['Low'].values.astype(float)
+                self.values[key] = method(high, low, price, **params)
+            else:
+                self.values[key] = method(price, **params)
+        return self.values[key]
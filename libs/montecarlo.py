@@ -0,0 +1,320 @@
+"""
+Monte-Carlo simulations
+Bootstraps daily returns into a (sims x horizon) array of price paths,
+replaces pandas_montecarlo which builds a DataFrame per simulation
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import statistics
+import numpy as np
+import matplotlib.pyplot as plt
+import libs.rng
+
+
+class MCRESULT(object):
+    """Monte-Carlo simulation results"""
+
+    def __init__(self, data=None, stats=None):
+        self.data = data
+        self.stats = stats
+
+    def plot(self, title='Monte Carlo Simulation Results', figsize=None, paths=100):
+        fig, ax = plt.subplots(figsize=figsize)
+        ax.plot(self.data[:paths].T, lw=1, alpha=.8)
+        ax.axhline(0, color='black')
+        ax.set_title(title, fontweight='bold')
+        plt.ylabel('Results')
+        plt.xlabel('Occurrences')
+        plt.show()
+        plt.close()
+
+
+def first_hit(mask):
+    """Index of the first True day of every path, -1 if the level was never hit"""
+    day = mask.argmax(axis=1)
+    day[~mask.any(axis=1)] = -1
+    return day
+
+
+def get_stats(total, dd, bust_day, goal_day):
+    """Stats of simulated paths from their final results, drawdowns and first hit days"""
+    busted = bust_day >= 0
+    reached = (goal_day >= 0) & (~busted | (goal_day < bust_day))
+
+    stats = dict()
+    stats['min'] = total.min()
+    stats['max'] = total.max()
+    stats['mean'] = total.mean()
+    stats['median'] = np.median(total)
+    stats['std'] = total.std()
+    stats['maxdd'] = dd.min()
+    stats['bust'] = busted.sum() / len(total)
+    stats['goal'] = reached.sum() / len(total)
+    stats['bust_day'] = bust_day[busted].mean() if busted.any() else np.nan
+    stats['goal_day'] = goal_day[reached].mean() if reached.any() else np.nan
+    return stats
+
+
+def get_hits(paths, bust=0.1, goal=0.1):
+    """Final results, drawdowns and first bust and goal days of paths"""
+    return paths[:, -1], paths.min(axis=1), first_hit(paths <= -abs(bust)), first_hit(paths >= abs(goal))
+
+
+def simulate(returns, sims=1000, bust=0.1, goal=0.1, horizon=0, rng=None):
+    """
+    Bootstrap simulation of compounded returns
+
+    Args:
+        returns: Daily returns, 0.01 is 1%
+        sims: Number of simulated paths
+        bust: Loss level, 0.1 is -10%
+        goal: Profit level, 0.1 is +10%
+        horizon: Days in every path, length of returns by default
+        rng: numpy Generator, see libs.rng, a new stream by default
+
+    Returns:
+        MCRESULT, stats['bust'] is a share of paths hit the bust level,
+        stats['goal'] is a share of paths hit the goal before the bust
+    """
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]
+    if not horizon:
+        horizon = len(returns)
+    if rng is None:
+        rng = libs.rng.get_generator()
+
+    draws = rng.integers(0, len(returns), size=(sims, horizon))
+    paths = np.cumprod(1 + returns[draws], axis=1) - 1
+
+    stats = get_stats(*get_hits(paths, bust=bust, goal=goal))
+    return MCRESULT(data=paths, stats=stats)
+
+
+class MCSTATS(object):
+    """Running stats of simulated paths, memory does not depend on the number of paths"""
+
+    def __init__(self, sample=10000, rng=None):
+        self.rng = libs.rng.get_generator() if rng is None else rng
+        self.sims = 0
+        self.busted = 0
+        self.reached = 0
+        self.bust_days = 0
+        self.goal_days = 0
+        self.sum = 0.0
+        self.squares = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.maxdd = np.inf
+
+        # Uniform sample of final results for quantiles
+        self.sample = np.empty(sample)
+
+    def update(self, total, dd, bust_day, goal_day):
+        busted = bust_day >= 0
+        reached = (goal_day >= 0) & (~busted | (goal_day < bust_day))
+
+        self.busted += busted.sum()
+        self.reached += reached.sum()
+        self.bust_days += bust_day[busted].sum()
+        self.goal_days += goal_day[reached].sum()
+        self.sum += total.sum()
+        self.squares += (total ** 2).sum()
+        self.min = min(self.min, total.min())
+        self.max = max(self.max, total.max())
+        self.maxdd = min(self.maxdd, dd.min())
+
+        # Reservoir sampling, a result replaces a random one with chance size / paths seen
+        size = len(self.sample)
+        fill = max(0, min(size - self.sims, len(total)))
+        self.sample[self.sims:self.sims + fill] = total[:fill]
+        if fill < len(total):
+            seen = self.sims + np.arange(fill, len(total))
+            slots = (self.rng.random(len(seen)) * (seen + 1)).astype(int)
+            kept = slots < size
+            self.sample[slots[kept]] = total[fill:][kept]
+        self.sims += len(total)
+
+    def get_bust_interval(self, confidence=0.95):
+        """Half width of the Wilson interval of the bust chance"""
+        z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        p = self.busted / self.sims
+        n = self.sims
+        return z / (1 + z ** 2 / n) * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))
+
+    def get_stats(self, quantiles=(0.05, 0.95), confidence=0.95):
+        sample = self.sample[:min(self.sims, len(self.sample))]
+        mean = self.sum / self.sims
+
+        stats = dict()
+        stats['min'] = self.min
+        stats['max'] = self.max
+        stats['mean'] = mean
+        stats['median'] = np.median(sample)
+        stats['std'] = np.sqrt(max(0.0, self.squares / self.sims - mean ** 2))
+        stats['maxdd'] = self.maxdd
+        stats['bust'] = self.busted / self.sims
+        stats['goal'] = self.reached / self.sims
+        stats['bust_day'] = self.bust_days / self.busted if self.busted else np.nan
+        stats['goal_day'] = self.goal_days / self.reached if self.reached else np.nan
+        stats['sims'] = self.sims
+        stats['bust_interval'] = self.get_bust_interval(confidence=confidence)
+        for q in quantiles:
+            stats['q%g' % (100 * q)] = np.quantile(sample, q)
+        return stats
+
+
+def simulate_chunked(returns, sims=1000000, bust=0.1, goal=0.1, horizon=0, chunk=1000, tolerance=0.005,
+                     confidence=0.95, sample=10000, rng=None):
+    """
+    Bootstrap simulation of compounded returns in chunks,
+    stops early when the bust chance is known with the tolerance
+
+    Args:
+        returns: Daily returns, 0.01 is 1%
+        sims: Maximum number of simulated paths
+        bust: Loss level, 0.1 is -10%
+        goal: Profit level, 0.1 is +10%
+        horizon: Days in every path, length of returns by default
+        chunk: Paths simulated at once, memory is chunk x horizon
+        tolerance: Half width of the bust chance confidence interval to stop at, 0 runs all sims
+        confidence: Confidence level of the interval
+        sample: Final results kept for quantiles
+        rng: numpy Generator, see libs.rng, a new stream by default
+
+    Returns:
+        MCRESULT with paths of the first chunk, stats as simulate has and
+        sims done, bust_interval and q5, q95 quantiles of the final result
+    """
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]
+    if not horizon:
+        horizon = len(returns)
+
+    if rng is None:
+        rng = libs.rng.get_generator()
+
+    data = None
+    running = MCSTATS(sample=sample, rng=rng)
+    while running.sims < sims:
+        size = min(chunk, sims - running.sims)
+        draws = rng.integers(0, len(returns), size=(size, horizon))
+        paths = np.cumprod(1 + returns[draws], axis=1) - 1
+        if data is None:
+            data = paths
+
+        running.update(*get_hits(paths, bust=bust, goal=goal))
+        if tolerance and running.get_bust_interval(confidence=confidence) < tolerance:
+            break
+
+    return MCRESULT(data=data, stats=running.get_stats(confidence=confidence))
+
+
+def get_level_hits(paths, levels):
+    """First days paths reached every level, levels are positive for goals and negative for busts"""
+    days = np.empty((len(paths), len(levels)), dtype=int)
+    high = np.maximum.accumulate(paths, axis=1)
+    low = np.minimum.accumulate(paths, axis=1)
+    for i, level in enumerate(levels):
+        days[:, i] = first_hit(high >= level) if level > 0 else first_hit(low <= level)
+    return days
+
+
+def simulate_levels(returns, goals, busts, sims=10000, horizon=0, chunk=1000, rng=None):
+    """
+    Bootstrap simulation of compounded returns, chances of every goal and bust level from the same paths
+
+    Args:
+        returns: Daily returns, 0.01 is 1%
+        goals: Profit levels, 0.1 is +10%
+        busts: Loss levels, 0.1 is -10%
+        sims: Number of simulated paths
+        horizon: Days in every path, length of returns by default
+        chunk: Paths simulated at once
+        rng: numpy Generator, see libs.rng, a new stream by default
+
+    Returns:
+        Bust chances of every bust level,
+        goals x busts chances to hit the goal before the bust as simulate has
+    """
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]
+    goals = np.abs(np.asarray(goals, dtype=float))
+    busts = -np.abs(np.asarray(busts, dtype=float))
+    if not horizon:
+        horizon = len(returns)
+    if rng is None:
+        rng = libs.rng.get_generator()
+
+    busted = np.zeros(len(busts))
+    reached = np.zeros((len(goals), len(busts)))
+    for start in range(0, sims, chunk):
+        size = min(chunk, sims - start)
+        draws = rng.integers(0, len(returns), size=(size, horizon))
+        paths = np.cumprod(1 + returns[draws], axis=1) - 1
+
+        goal_day = get_level_hits(paths, goals)[:, :, None]
+        bust_day = get_level_hits(paths, busts)[:, None, :]
+        busted += (bust_day[:, 0] >= 0).sum(axis=0)
+        reached += ((goal_day >= 0) & ((bust_day < 0) | (goal_day < bust_day))).sum(axis=0)
+
+    return busted / sims, reached / sims
+
+
+def simulate_portfolio(returns, weights, sims=1000, bust=0.1, goal=0.1, horizon=0, block=5, chunk=1000,
+                       confidence=0.95, rng=None):
+    """
+    Block bootstrap simulation of a buy and hold portfolio,
+    whole days of returns of all assets are drawn together to keep their correlations
+
+    Args:
+        returns: Days x assets daily returns aligned on date, days with a missing return are skipped
+        weights: Asset weights at the start, the rest is cash, 0.2 is 20%
+        sims: Number of simulated paths
+        bust: Loss level, 0.1 is -10%
+        goal: Profit level, 0.1 is +10%
+        horizon: Days in every path, number of days of returns by default
+        block: Days in a drawn block
+        chunk: Paths simulated at once, memory is chunk x horizon x assets
+        confidence: VaR and CVaR confidence level
+        rng: numpy Generator, see libs.rng, a new stream by default
+
+    Returns:
+        MCRESULT with paths of the first chunk, stats as simulate has and VaR, CVaR of the final result
+    """
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns).any(axis=1)]
+    weights = np.asarray(weights, dtype=float)
+    if not horizon:
+        horizon = len(returns)
+    block = min(block, len(returns))
+    blocks = -(-horizon // block)
+    if rng is None:
+        rng = libs.rng.get_generator()
+
+    data = None
+    total = np.empty(sims)
+    dd = np.empty(sims)
+    bust_day = np.empty(sims, dtype=int)
+    goal_day = np.empty(sims, dtype=int)
+    for start in range(0, sims, chunk):
+        size = min(chunk, sims - start)
+
+        # Consecutive days from random block starts
+        starts = rng.integers(0, len(returns) - block + 1, size=(size, blocks))
+        draws = (starts[:, :, None] + np.arange(block)).reshape(size, blocks * block)[:, :horizon]
+        paths = np.cumprod(1 + returns[draws], axis=1) @ weights - weights.sum()
+        if data is None:
+            data = paths
+
+        hits = get_hits(paths, bust=bust, goal=goal)
+        total[start:start + size], dd[start:start + size] = hits[:2]
+        bust_day[start:start + size], goal_day[start:start + size] = hits[2:]
+
+    stats = get_stats(total, dd, bust_day, goal_day)
+    var = np.quantile(total, 1 - confidence)
+    stats['var'] = -var
+    stats['cvar'] = -total[total <= var].mean()
+
+    return MCRESULT(data=data, stats=stats)
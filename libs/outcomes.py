@@ -0,0 +1,116 @@
+"""
+Outcomes of recommendations
+All recommendation files are loaded into one table and checked against a date aligned price panel at once
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import re
+import json
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import libs.fetcher
+import libs.datacore
+import libs.montecarlo
+
+
+def load_recommendations(dirpath='recommendations', prefix=''):
+    """
+    Recommendations of every file
+
+    Args:
+        dirpath: Directory of <datatype>-<source>-<date>.json files
+        prefix: <datatype>-<source>- of files to load, all files by default
+
+    Returns:
+        DataFrame with date, symbol, datatype and source columns and a column per recommendation field
+    """
+    rows = list()
+    for filename in sorted(os.listdir(dirpath)):
+        match = re.match(r'^([a-z]+)-([a-z]+)-(\d{4}-\d{2}-\d{2})\.json$', filename)
+        if not match or not filename.startswith(prefix):
+            continue
+        datatype, source, date = match.groups()
+        with open(os.path.join(dirpath, filename)) as infile:
+            for item in json.load(infile):
+                for symbol, fields in item.items():
+                    rows.append(dict(fields, date=pd.Timestamp(date), symbol=symbol, datatype=datatype, source=source))
+
+    df = pd.DataFrame(rows)
+    columns = ['date', 'symbol', 'datatype', 'source']
+    if df.empty:
+        return pd.DataFrame(columns=columns + ['stop_loss', 'exit_price'])
+    return df[columns + [column for column in df.columns if column not in columns]]
+
+
+def get_closes(assets, start):
+    """
+    Close prices of assets since the date, stored history is used, not only the last bars
+
+    Returns:
+        DataFrame with a date index and a column per asset symbol
+    """
+    stale = [asset for asset in assets if asset.caching and not asset.is_cached()]
+    if stale:
+        libs.fetcher.run([asset.prefetch() for asset in stale])
+
+    days = (datetime.now() - start).days + 1
+    closes = dict()
+    for asset in assets:
+        df = libs.datacore.fix_alpha_columns(asset.load(days=days, bars=days))
+        df = df[df['date'] >= start]
+        closes[asset.symbol] = pd.Series(df['Close'].values, index=pd.to_datetime(df['date']))
+    return pd.DataFrame(closes).sort_index()
+
+
+def evaluate(recommendations, closes):
+    """
+    First days every recommendation hit the exit price and the stop loss
+
+    Args:
+        recommendations: Table of load_recommendations
+        closes: Wide frame of prices with a date index and a column per symbol
+
+    Returns:
+        recommendations with success and bust dates, days to them and counts of days above the exit price
+        and below the stop loss, max and min prices since the recommendation date and max favourable
+        and adverse excursions from the last price, %
+    """
+    df = recommendations.reset_index(drop=True)
+    dates = closes.index.values
+    columns = closes.columns.get_indexer(df['symbol'])
+
+    # Predictions x days paths, days before the recommendation and unknown symbols are NaN
+    paths = closes.values[:, np.maximum(columns, 0)].T.astype(float)
+    starts = np.searchsorted(dates, df['date'].values)
+    paths[(np.arange(paths.shape[1]) < starts[:, None]) | (columns < 0)[:, None]] = np.nan
+
+    success = paths > df['exit_price'].values[:, None]
+    bust = paths < df['stop_loss'].values[:, None]
+    df['success_count'] = success.sum(axis=1)
+    df['bust_count'] = bust.sum(axis=1)
+
+    for name, mask in (('success', success), ('bust', bust)):
+        day = libs.montecarlo.first_hit(mask) if mask.shape[1] else np.full(len(df), -1)
+        hit = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        hit[day >= 0] = dates[day[day >= 0]]
+        df[name + '_date'] = hit
+        df[name + '_days'] = (hit - df['date']).dt.days
+
+    valid = ~np.isnan(paths).all(axis=1) if paths.shape[1] else np.zeros(len(df), dtype=bool)
+    df['max'] = np.nan
+    df['min'] = np.nan
+    df.loc[valid, 'max'] = np.nanmax(paths[valid], axis=1)
+    df.loc[valid, 'min'] = np.nanmin(paths[valid], axis=1)
+    if 'last_price' in df:
+        df['mfe'] = (100 * (df['max'] / df['last_price'] - 1)).round(2)
+        df['mae'] = (100 * (df['min'] / df['last_price'] - 1)).round(2)
+
+    # The first hit level decides
+    succeeded = df['success_date'].notnull() & (df['bust_date'].isnull() | (df['success_date'] < df['bust_date']))
+    df['status'] = ''
+    df.loc[succeeded, 'status'] = 'Succeeded'
+    df.loc[df['bust_date'].notnull() & ~succeeded, 'status'] = 'Busted'
+    return df
@@ -8,6 +8,9 @@ sys.path.insert(0, os.path.abspath('..'))
 import json
 import pandas as pd
 import libs.assets
+import libs.rebalance
+import libs.montecarlo
+import libs.rng
 import configs.alphaconf
 
 
@@ -79,59 +82,79 @@ class PORTFOLIO(object):
         self.value = round(self.money + self.df['Total'][-1:].values[0], 2)
         self.profit = round(self.value - self.initial_money, 2)
 
-    def walk(self):
+    def walk(self, sell_above=2, buy_below=-1):
         """
-        Simulate something
+        Simulate rebalancing, see libs.rebalance.simulate
+
+        Args:
+            sell_above: Weight over the share to sell an asset, %
+            buy_below: Weight under the share to buy an asset, %
+
+        Returns:
+            Rebalancing trajectories
         """
+        symbols = list(self.data.keys())
+        prices = self.df[symbols].values
+        counts = [self.data[symbol]['count'] for symbol in symbols]
+        shares = [self.data[symbol]['share'] for symbol in symbols]
 
-        symbols = self.data.keys()
-        money = 0
-
-        for index, row in self.df.iterrows():
-
-            total = 0
-            # Get total value of the portfolio
-            for symbol in symbols:
-                self.data[symbol]['value'] = round(row[symbol] * self.data[symbol]['count'], 2)
-                total += self.data[symbol]['value']
-
-            # Get current asset weight
-            for symbol in symbols:
-                self.data[symbol]['weight'] = round(100 * self.data[symbol]['value'] / total, 2)
-                self.data[symbol]['diff'] = self.data[symbol]['weight'] - self.data[symbol]['share']
-
-            # Rebalance?
-            for symbol in symbols:
-                if self.data[symbol]['diff'] > 2:
-                    print(symbol, row[symbol], self.data[symbol]['value'], self.data[symbol]['weight'],
-                          self.data[symbol]['share'], total)
-                    for symbol2 in symbols:
-                        if symbol == symbol2:
-                            continue
-                        if self.data[symbol2]['diff'] < -1:
-                            print(symbol2, self.data[symbol2]['diff'])
-
-                            # Sell
-                            amount = int(self.data[symbol]['value'] * self.data[symbol]['diff'] * 0.01 / row[symbol])
-                            if amount > 0:
-                                print(symbol, 'to sell:', amount)
-                                self.data[symbol]['count'] -= amount
-                                gain = amount * row[symbol]
-
-                                # Buy
-                                amount = int(gain / row[symbol2])
-                                print(symbol2, 'to buy:', amount)
-                                self.data[symbol2]['count'] += amount
-                                pay = amount * row[symbol2]
-
-                                money += gain - pay
-                                break
-                    else:
-                        continue
-                    break
-
-        profit = round(self.money + money + total - self.initial_money, 2)
+        result = libs.rebalance.simulate(prices, counts, shares, sell_above=sell_above, buy_below=buy_below)
+
+        for day, sell, amount, buy, bought in result.trades:
+            print(self.df.index[day], symbols[sell], 'to sell:', amount, symbols[buy], 'to buy:', bought)
+
+        weights = result.get_weights()
+        for i, symbol in enumerate(symbols):
+            self.data[symbol]['count'] = int(result.holdings[-1, i])
+            self.data[symbol]['value'] = result.values[-1, i]
+            self.data[symbol]['weight'] = weights[-1, i]
+            self.data[symbol]['diff'] = weights[-1, i] - self.data[symbol]['share']
+
+        profit = round(self.money + result.money + result.total[-1] - self.initial_money, 2)
         print(profit)
+        return result
+
+    def sweep(self, shares=None, sell_above=(1, 2, 3), buy_below=(-0.5, -1, -2), workers=1):
+        """
+        Rank rebalancing configurations by profit, see libs.rebalance.sweep
+
+        Args:
+            shares: List of share vectors in the order assets were added, the current shares by default
+            sell_above: Weights over the share to sell an asset, %
+            buy_below: Weights under the share to buy an asset, %
+            workers: Processes
+
+        Returns:
+            DataFrame with profit, max drawdown, turnover and trades of every configuration
+        """
+        symbols = list(self.data.keys())
+        if shares is None:
+            shares = [[self.data[symbol]['share'] for symbol in symbols]]
+        return libs.rebalance.sweep(self.df[symbols].values, shares, sell_above=sell_above, buy_below=buy_below,
+                                    money=self.initial_money, workers=workers)
+
+    def get_bust_chance(self, sims=10000, bust=0.1, goal=0.1, horizon=0, block=5, chunk=1000, seed=None):
+        """
+        Monte-Carlo of the portfolio as it is held now, see libs.montecarlo.simulate_portfolio
+
+        Args:
+            seed: Seed of the simulation, see libs.rng, a new one by default
+
+        Returns:
+            MCRESULT, stats have bust and goal chances, VaR and CVaR of the final result
+        """
+        symbols = list(self.data.keys())
+        prices = self.df[symbols]
+        returns = (prices / prices.shift(1) - 1).iloc[1:].values
+
+        # Current asset weights, the rest is money
+        last = prices.ffill().iloc[-1].values
+        values = last * [self.data[symbol]['count'] for symbol in symbols]
+        weights = values / (values.sum() + self.money)
+
+        return libs.montecarlo.simulate_portfolio(returns, weights, sims=sims, bust=bust, goal=goal,
+                                                  horizon=horizon, block=block, chunk=chunk,
+                                                  rng=libs.rng.get_generator(seed, self.name))
 
     def print_stats(self):
         if 'Total' in self.df:
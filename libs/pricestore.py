@@ -0,0 +1,140 @@
+"""
+Binary price store
+One memory-mapped NumPy file of bar records per source, board and symbol instead of a CSV,
+loading copies typed date/OHLCV columns without any text parsing.
+Dates are stored as datetime64[D], prices and volumes as float64
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import json
+import numpy as np
+import pandas as pd
+import libs.framecache
+
+
+def get_dtype(columns):
+    """Record of a bar, the date and a float64 field per column"""
+    return np.dtype([('date', 'datetime64[D]')] + [(column, 'f8') for column in columns])
+
+
+class PRICESTORE(object):
+    """Price store"""
+
+    def __init__(self, basedir='store'):
+        self.basedir = basedir
+
+    def path(self, source, board, symbol):
+        return os.path.join(self.basedir, source, board, symbol + '.npy')
+
+    def get_key(self, source, board, symbol):
+        return os.path.abspath(self.basedir), source, board, symbol
+
+    def age(self, source, board, symbol):
+        """Seconds since the last save, None if the symbol is not stored"""
+        filepath = self.path(source, board, symbol)
+        if not os.path.isfile(filepath):
+            return None
+        return time.time() - os.path.getmtime(filepath)
+
+    def save(self, source, board, symbol, df):
+        """
+        Save prices
+
+        Args:
+            df: Prices with a date column or a date index, other columns must be numeric
+        """
+        if 'date' not in df.columns:
+            df = df.reset_index()
+        columns = [column for column in df.columns if column != 'date']
+        data = np.empty(len(df), dtype=get_dtype(columns))
+        data['date'] = pd.to_datetime(df['date']).values.astype('datetime64[D]')
+        for column in columns:
+            data[column] = df[column].values
+
+        filepath = self.path(source, board, symbol)
+        if not os.path.isdir(os.path.dirname(filepath)):
+            os.makedirs(os.path.dirname(filepath))
+
+        # Column names are a part of the record, a single file is replaced at once
+        tmppath = filepath + '.tmp'
+        with open(tmppath, 'wb') as outfile:
+            np.save(outfile, data)
+        os.replace(tmppath, filepath)
+        libs.framecache.frames.discard(self.get_key(source, board, symbol))
+
+    def append(self, source, board, symbol, df):
+        """
+        Append new bars, a stored bar of the same date is replaced by the new one
+
+        Returns:
+            All stored bars with a date column
+        """
+        if 'date' not in df.columns:
+            df = df.reset_index()
+        df = df.assign(date=pd.to_datetime(df['date']))
+
+        stored = self.load(source, board, symbol)
+        if stored is not None:
+            df = pd.concat([stored, df], ignore_index=True, sort=False)
+            df = df.drop_duplicates(subset='date', keep='last')
+            df = df.sort_values('date').reset_index(drop=True)
+
+        self.save(source, board, symbol, df)
+        return df
+
+    def get_start(self, source, board, symbol):
+        """Date the stored history was fetched since, None if it is unknown"""
+        filepath = self.path(source, board, symbol).replace('.npy', '.meta.json')
+        if not os.path.isfile(filepath):
+            return None
+        with open(filepath) as infile:
+            return pd.Timestamp(json.load(infile)['start'])
+
+    def set_start(self, source, board, symbol, start):
+        """Keep the date a whole history was fetched since, appended bars do not change it"""
+        filepath = self.path(source, board, symbol).replace('.npy', '.meta.json')
+        with open(filepath + '.tmp', 'w') as outfile:
+            json.dump({'start': pd.Timestamp(start).strftime('%Y-%m-%d')}, outfile)
+        os.replace(filepath + '.tmp', filepath)
+
+    def last_date(self, source, board, symbol):
+        """Date of the last stored bar, None if the symbol is not stored"""
+        filepath = self.path(source, board, symbol)
+        if not os.path.isfile(filepath):
+            return None
+        data = np.load(filepath, mmap_mode='r')
+        if len(data) == 0:
+            return None
+        return pd.Timestamp(data['date'][-1])
+
+    def load(self, source, board, symbol, index=False):
+        """
+        Load prices
+
+        Args:
+            index: Return dates as the index instead of a date column
+
+        Returns:
+            DataFrame, None if the symbol is not stored
+        """
+        filepath = self.path(source, board, symbol)
+        if not os.path.isfile(filepath):
+            return None
+
+        # Frames loaded before are reused until the file is saved again
+        key = self.get_key(source, board, symbol)
+        stat = os.stat(filepath)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        df = libs.framecache.frames.get(key, stamp=stamp)
+        if df is None:
+            data = np.load(filepath, mmap_mode='r')
+            df = pd.DataFrame({column: np.array(data[column]) for column in data.dtype.names[1:]},
+                              columns=list(data.dtype.names[1:]))
+            df.insert(0, 'date', data['date'].astype('datetime64[ns]'))
+            libs.framecache.frames.put(key, df, stamp=stamp)
+        if index:
+            df = df.set_index('date')
+        return df
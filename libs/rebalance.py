@@ -0,0 +1,193 @@
+"""
+Portfolio rebalancing simulator
+Same rules as PORTFOLIO.walk on a price matrix: an asset with weight more than sell_above percent
+over its share is partly sold and the gain buys the first asset with weight under buy_below,
+one trade a day at most
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import itertools
+import functools
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+
+class RBRESULT(object):
+    """Rebalancing trajectories"""
+
+    def __init__(self, holdings, values, total, cash, trades):
+        self.holdings = holdings  # Counts after the trade of the day
+        self.values = values  # Value of every asset before the trade of the day
+        self.total = total  # Portfolio value before the trade of the day
+        self.cash = cash  # Trades balance after the trade of the day
+        self.trades = trades  # Day, sold asset, amount, bought asset, amount
+        self.money = cash[-1] if len(cash) else 0
+
+    def get_weights(self):
+        return np.round(100 * self.values / self.total[:, None], 2)
+
+
+def get_day(prices, counts, shares):
+    """Rounded values, total, weights and weight differences of days with the same counts"""
+    values = np.round(prices * counts, 2)
+
+    # Sequential sum, the same as adding assets one by one
+    total = np.cumsum(values, axis=1)[:, -1]
+    weights = np.round(100 * values / total[:, None], 2)
+    return values, total, weights - shares
+
+
+def simulate(prices, counts, shares, sell_above=2, buy_below=-1):
+    """
+    Simulate rebalancing
+
+    Args:
+        prices: Days x assets array, NaN if an asset has no price
+        counts: Initial asset counts
+        shares: Target asset shares, %
+        sell_above: Weight over the share to sell an asset, %
+        buy_below: Weight under the share to buy an asset, %, less than sell_above
+
+    Returns:
+        RBRESULT
+    """
+    if sell_above <= buy_below:
+        # An asset could be sold and bought on the same day
+        raise ValueError('sell_above {} must be over buy_below {}'.format(sell_above, buy_below))
+    prices = np.asarray(prices, dtype=float)
+    counts = np.array(counts, dtype=np.int64)
+    shares = np.asarray(shares, dtype=float)
+    days = len(prices)
+
+    holdings = np.empty(prices.shape, dtype=np.int64)
+    values = np.empty(prices.shape)
+    total = np.empty(days)
+    cash = np.empty(days)
+    trades = list()
+    money = 0
+
+    # Days are checked in growing chunks while counts are the same, a trade restarts from the next day
+    day = 0
+    chunk = 8
+    while day < days:
+        end = min(day + chunk, days)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chunk_values, chunk_total, diffs = get_day(prices[day:end], counts, shares)
+            amounts = np.trunc(chunk_values * diffs * 0.01 / prices[day:end])
+            below = diffs < buy_below
+            sellers = (diffs > sell_above) & (amounts > 0) & below.any(axis=1)[:, None]
+
+        triggered = np.flatnonzero(sellers.any(axis=1))
+        last = triggered[0] + 1 if len(triggered) else end - day
+        holdings[day:day + last] = counts
+        values[day:day + last] = chunk_values[:last]
+        total[day:day + last] = chunk_total[:last]
+        cash[day:day + last] = money
+
+        if len(triggered):
+            i = triggered[0]
+            row = prices[day + i]
+            sell = np.flatnonzero(sellers[i])[0]
+            buy = np.flatnonzero(below[i])[0]
+
+            # Sell
+            amount = int(amounts[i, sell])
+            counts[sell] -= amount
+            gain = amount * row[sell]
+
+            # Buy
+            bought = int(gain / row[buy])
+            counts[buy] += bought
+            pay = bought * row[buy]
+
+            money += gain - pay
+            holdings[day + i] = counts
+            cash[day + i] = money
+            trades.append((day + i, sell, amount, buy, bought))
+            chunk = 8
+        else:
+            chunk = min(chunk * 2, 1024)
+        day += last
+
+    return RBRESULT(holdings, values, total, cash, trades)
+
+
+def get_counts(prices, shares, money=100000):
+    """Initial counts and cash left, assets are bought at the first prices like PORTFOLIO.add does"""
+    counts = list()
+    cash = money
+    for price, share in zip(prices[0], shares):
+        price = float(round(price, 2))
+        count = int(money * (share / 100) / price)
+        counts.append(count)
+        cash = round(cash - round(count * price, 2), 2)
+    return counts, cash
+
+
+def get_stats(prices, shares, sell_above=2, buy_below=-1, money=100000):
+    """
+    Simulate rebalancing of a configuration
+
+    Returns:
+        Profit, max drawdown %, turnover % of the initial money and trades count
+    """
+    counts, cash = get_counts(prices, shares, money=money)
+    result = simulate(prices, counts, shares, sell_above=sell_above, buy_below=buy_below)
+
+    profit = round(cash + result.money + result.total[-1] - money, 2)
+    # Values before the trade of the day, the trades balance before it is the one after the previous day
+    value = cash + np.concatenate([[0], result.cash[:-1]]) + result.total
+    peak = np.fmax.accumulate(value)
+    drawdown = round(100 * np.nanmax(1 - value / peak), 2)
+    sold = sum(amount * prices[day, sell] for day, sell, amount, buy, bought in result.trades)
+    turnover = round(100 * sold / money, 2)
+    return profit, drawdown, turnover, len(result.trades)
+
+
+# Price matrix of a sweep worker, set once per process
+sweep_prices = None
+
+
+def init_sweep(prices):
+    global sweep_prices
+    sweep_prices = prices
+
+
+def check_configuration(configuration, money=100000):
+    shares, sell_above, buy_below = configuration
+    return get_stats(sweep_prices, shares, sell_above=sell_above, buy_below=buy_below, money=money)
+
+
+def sweep(prices, shares, sell_above=(2,), buy_below=(-1,), money=100000, workers=1):
+    """
+    Simulate rebalancing for every combination of shares and thresholds
+
+    Args:
+        prices: Days x assets array
+        shares: List of share vectors, %
+        sell_above: Weights over the share to sell an asset, %
+        buy_below: Weights under the share to buy an asset, %
+        money: Initial money
+        workers: Processes, the price matrix is passed to each of them once
+
+    Returns:
+        DataFrame of configurations ranked by profit
+    """
+    prices = np.asarray(prices, dtype=float)
+    configurations = list(itertools.product([tuple(vector) for vector in shares], sell_above, buy_below))
+
+    if workers > 1:
+        chunksize = max(1, len(configurations) // (workers * 4))
+        with multiprocessing.Pool(processes=workers, initializer=init_sweep, initargs=(prices,)) as pool:
+            stats = pool.map(functools.partial(check_configuration, money=money), configurations,
+                             chunksize=chunksize)
+    else:
+        init_sweep(prices)
+        stats = [check_configuration(configuration, money=money) for configuration in configurations]
+
+    df = pd.DataFrame(configurations, columns=['shares', 'sell_above', 'buy_below'])
+    df[['profit', 'drawdown', 'turnover', 'trades']] = pd.DataFrame(stats, index=df.index)
+    return df.sort_values(['profit', 'drawdown'], ascending=[False, True]).reset_index(drop=True)
@@ -0,0 +1,111 @@
+"""
+Recommendation store
+Results of every check are kept in a single SQLite file indexed by symbol, date and datatype
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import json
+import sqlite3
+import pandas as pd
+import libs.outcomes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    datatype TEXT NOT NULL,
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS recommendations_symbol ON recommendations (symbol, date, datatype, source);
+CREATE INDEX IF NOT EXISTS recommendations_date ON recommendations (datatype, source, date);
+"""
+
+
+class RECSTORE(object):
+    """Recommendations of all dates"""
+
+    def __init__(self, path=os.path.join('recommendations', 'recommendations.db')):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def append(self, results, date, datatype='m', source='moex'):
+        """
+        Store results of a check in one transaction, a result of the same symbol and date is replaced
+
+        Args:
+            results: List of ASSET.get_results() dicts
+            date: Check date
+        """
+        date = pd.Timestamp(date).strftime('%Y-%m-%d')
+        rows = [(date, datatype, source, symbol, json.dumps(fields, default=float))
+                for result in results for symbol, fields in result.items()]
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO recommendations (date, datatype, source, symbol, data) '
+                                        'VALUES (?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def append_frame(self, df):
+        """Store a table of libs.outcomes.load_recommendations"""
+        count = 0
+        for (date, datatype, source), group in df.groupby(['date', 'datatype', 'source']):
+            fields = group.drop(columns=['date', 'datatype', 'source']).set_index('symbol')
+            results = [{symbol: row.dropna().to_dict()} for symbol, row in fields.iterrows()]
+            count += self.append(results, date, datatype=datatype, source=source)
+        return count
+
+    def import_json(self, dirpath='recommendations'):
+        """Store recommendation files of older versions"""
+        return self.append_frame(libs.outcomes.load_recommendations(dirpath))
+
+    def query(self, symbol=None, start=None, end=None, datatype=None, source=None):
+        """
+        Recommendations, all of them by default
+
+        Args:
+            symbol: Symbol or list of symbols
+            start: First date
+            end: Last date
+
+        Returns:
+            DataFrame with date, symbol, datatype and source columns and a column per recommendation field
+        """
+        conditions = list()
+        params = list()
+        if symbol is not None:
+            symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+            conditions.append('symbol IN (' + ', '.join('?' * len(symbols)) + ')')
+            params += symbols
+        for column, value in (('datatype', datatype), ('source', source)):
+            if value is not None:
+                conditions.append(column + ' = ?')
+                params.append(value)
+        if start is not None:
+            conditions.append('date >= ?')
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            conditions.append('date <= ?')
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+
+        sql = 'SELECT date, symbol, datatype, source, data FROM recommendations'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        rows = self.connection.execute(sql + ' ORDER BY date, id', params).fetchall()
+
+        df = pd.DataFrame([dict(json.loads(data), date=date, symbol=symbol, datatype=datatype, source=source)
+                           for date, symbol, datatype, source, data in rows])
+        if df.empty:
+            return pd.DataFrame(columns=['date', 'symbol', 'datatype', 'source', 'stop_loss', 'exit_price'])
+        df['date'] = pd.to_datetime(df['date'])
+        columns = ['date', 'symbol', 'datatype', 'source']
+        return df[columns + [column for column in df.columns if column not in columns]]
@@ -0,0 +1,34 @@
+"""
+Random streams of simulations
+A run has a single seed, every symbol draws from its own stream derived from it,
+so results are reproducible and do not depend on the order or the process symbols are simulated in
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import zlib
+import numpy as np
+
+
+def get_seed(seed=None):
+    """The seed or a new one from the OS entropy"""
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    return seed
+
+
+def get_generator(seed=None, key=''):
+    """
+    Independent stream of a symbol
+
+    Args:
+        seed: Seed of the run, a new one by default
+        key: Symbol or any other name, the stream is the same for the same seed and key
+
+    Returns:
+        numpy Generator
+    """
+    sequence = np.random.SeedSequence(get_seed(seed), spawn_key=(zlib.crc32(str(key).encode()),))
+    return np.random.Generator(np.random.PCG64(sequence))
+
@@ -0,0 +1,88 @@
+"""
+Resident service
+Methods of an object are served over HTTP, the object and everything it keeps in memory live between requests
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import io
+import ast
+import json
+import functools
+import contextlib
+import traceback
+import http.server
+import urllib.parse
+import pandas as pd
+
+
+def parse_argument(value):
+    """Python literal of a query argument, a list if it has commas, the string otherwise"""
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        if ',' in value:
+            return value.split(',')
+        return value
+
+
+class HANDLER(http.server.BaseHTTPRequestHandler):
+    """GET /<method>?<argument>=<value>&... runs the method and responds with its output and returned value"""
+
+    def __init__(self, target, methods, *args, **kwargs):
+        self.target = target
+        self.methods = methods
+        super().__init__(*args, **kwargs)
+
+    def respond(self, status, text):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        method = url.path.strip('/')
+        if method not in self.methods:
+            self.respond(404, 'Unknown method ' + method + ', served: ' + ', '.join(self.methods) + '\n')
+            return
+        kwargs = {name: parse_argument(value) for name, value in urllib.parse.parse_qsl(url.query)}
+
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                value = getattr(self.target, method)(**kwargs)
+        except (Exception, SystemExit):
+            # A failed request must not stop the service
+            self.respond(500, output.getvalue() + traceback.format_exc())
+            return
+        if value is not None:
+            output.write((value.to_string() if isinstance(value, pd.DataFrame) else json.dumps(value, default=str))
+                         + '\n')
+        self.respond(200, output.getvalue())
+
+
+def get_server(target, methods, host='127.0.0.1', port=0):
+    """
+    Server of the target methods, requests are handled one by one
+
+    Args:
+        target: Object to serve
+        methods: Names of the served methods
+        port: Port, any free one by default, see server.server_port
+    """
+    return http.server.HTTPServer((host, port), functools.partial(HANDLER, target, methods))
+
+
+def serve(target, methods, host='127.0.0.1', port=8765):
+    """Serve the target until Ctrl+C"""
+    server = get_server(target, methods, host=host, port=port)
+    print('Serving on http://{}:{}'.format(host, server.server_port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
@@ -7,24 +7,21 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath('..'))
 import pandas as pd
-from alpha_vantage.timeseries import TimeSeries
 # from fbprophet import Prophet
-import talib
-import pandas_datareader as pdr
+import libs.datacore
 import logging
 from datetime import datetime, timedelta
 from pprint import pprint
 logging.getLogger('fbprophet').setLevel(logging.WARNING)
 
 
-class RESOURCE(object):
+class RESOURCE(libs.datacore.DATACORE):
     """Single resource"""
 
-    def __init__(self, symbol='', price_header='Adjusted close'):
-        self.symbol = symbol
+    def __init__(self, symbol='', price_header='Adjusted close', cachebase=''):
+        super().__init__(symbol=symbol, cachebase=cachebase)
         self.prices = dict()
         self.history = dict()
-        self.df = None
 
         self.price_header = price_header
 
@@ -34,125 +31,44 @@ class RESOURCE(object):
         self.turn_weight = 2
 
     def fix_alpha_columns(self):
-        df = self.prices
-        df = df.rename(index=str, columns={'3. low': 'Low'})
-        df = df.rename(index=str, columns={'2. high': 'High'})
-        df = df.rename(index=str, columns={'1. open': 'Open'})
-        df = df.rename(index=str, columns={'4. close': 'Close'})
-        df = df.rename(index=str, columns={'6. volume': 'Volume'})
-        df = df.rename(index=str, columns={'5. adjusted close': 'Adjusted close'})
-
-        self.prices = df
-        self.df = df.reset_index()
+        self.prices = libs.datacore.fix_alpha_columns(self.prices)
+        self.df = self.prices.reset_index()
 
     def fix_alpha_history_columns(self):
-        df = self.history
-        df = df.rename(index=str, columns={'3. low': 'Low'})
-        df = df.rename(index=str, columns={'2. high': 'High'})
-        df = df.rename(index=str, columns={'1. open': 'Open'})
-        df = df.rename(index=str, columns={'4. close': 'Close'})
-        df = df.rename(index=str, columns={'6. volume': 'Volume'})
-        df = df.rename(index=str, columns={'5. adjusted close': 'Adjusted close'})
-        self.history = df
+        self.history = libs.datacore.fix_alpha_columns(self.history)
         self.prices = self.history.tail(200)
 
-    def fetch_alpha(self, key='demo', size='compact', timeout=5):
-        ts = TimeSeries(key=key, output_format='pandas')
-        retry = 0
-        while True:
-            try:
-                data, meta_data = ts.get_daily_adjusted(symbol=self.symbol, outputsize=size)
-                break
-            except:
-                retry += 1
-                if retry > 10:
-                    exit('Can not fetch ' + self.symbol)
-                time.sleep(timeout)
-                continue
-        return data
-
-    def get_history_from_alpha(self, key='demo', cachedir='history', cacheage=3600*24*365*10):
-        if not os.path.isdir(cachedir):
-            os.mkdir(cachedir)
-        filename = self.symbol + '.csv'
-        filepath = os.path.join(cachedir, filename)
-        if os.path.isfile(filepath):
-            age = time.time() - os.path.getmtime(filepath)
-            if age > cacheage:
-                os.remove(filepath)
-            else:
-                data = pd.read_csv(filepath, index_col='date')
-                self.history = data
-                return data
-
-        data = self.fetch_alpha(key=key, size='full')
-        data.to_csv(filepath)
+    def get_history_from_alpha(self, key='', cachedir=None, cacheage=3600*24*365*10, bars=365*5):
+        """All stored bars, the full history is fetched once to the same store as get_prices_from_alpha uses"""
+        if key:
+            self.key = key
+        self.cacheage = cacheage
+        data = self.load('alpha', cachedir=cachedir, bars=bars).set_index('date')
 
         self.history = data
         return data
 
-    def get_prices_from_alpha(self, key='', cachedir='cache', cacheage=3600*8):
-        if not os.path.isdir(cachedir):
-            os.mkdir(cachedir)
-        filename = self.symbol + '.csv'
-        filepath = os.path.join(cachedir, filename)
-        if os.path.isfile(filepath):
-            age = time.time() - os.path.getmtime(filepath)
-            if age > cacheage:
-                os.remove(filepath)
-            else:
-                data = pd.read_csv(filepath, index_col='date')
-                self.prices = data
-                return data
-
-        data = self.fetch_alpha(key=key, size='compact')
-        data.to_csv(filepath)
+    def get_prices_from_alpha(self, key='', cachedir=None, cacheage=3600*8, bars=100):
+        if key:
+            self.key = key
+        self.cacheage = cacheage
+        data = self.load('alpha', cachedir=cachedir, bars=bars).set_index('date').tail(bars)
 
         self.prices = data
         return data
 
-    def fetch_moex(self, days=100, timeout=1):
-
-        date_N_days_ago =datetime.now() - timedelta(days=days)
-        start = date_N_days_ago.strftime('%m/%d/%Y')
-
-        df = pdr.get_data_moex(self.symbol, pause=timeout, start=start)
-        df = df.reset_index()
-        df = df.query('BOARDID == "TQBR"')
-
-        filtered = pd.DataFrame()
-        filtered['date'] = df['TRADEDATE']
-        filtered['Open'] = df['OPEN']
-        filtered['Low'] = df['LOW']
-        filtered['High'] = df['HIGH']
-        filtered['Close'] = df['CLOSE']
-        filtered['Volume'] = df['VOLUME']
-
-        return filtered
-
-    def get_prices_from_moex(self, cachedir='cache-m', cacheage=3600*24*8, timeout=3, days=100):
-        if not os.path.isdir(cachedir):
-            os.mkdir(cachedir)
-        filename = self.symbol + '.csv'
-        filepath = os.path.join(cachedir, filename)
-        if os.path.isfile(filepath):
-            age = time.time() - os.path.getmtime(filepath)
-            if age > cacheage:
-                os.remove(filepath)
-            else:
-                data = pd.read_csv(filepath, index_col='date')
-                self.prices = data.tail(days)
-                self.history = data
-                return data
-
-        data = self.fetch_moex(days=days, timeout=timeout)
-        filepath = os.path.join(cachedir, filename)
-        data.to_csv(filepath)
-
-        time.sleep(timeout)
+    def get_prices_from_moex(self, cachedir=None, cacheage=3600*24*8, days=100):
+        self.cacheage = cacheage
+        data = self.load('moex', cachedir=cachedir, days=days)
 
+        data = data[data['date'] >= datetime.now() - timedelta(days=days)].set_index('date')
+        self.prices = data.tail(days)
+        self.history = data
         return data
 
+    def get_frame(self):
+        return self.prices
+
     def get_prophet_prediction(self, periods=30):
 
         dfraw = self.prices
@@ -183,18 +99,12 @@ class RESOURCE(object):
     def get_ema_last(self, period=20, name=''):
         if not name:
             name = self.price_header
-        pricedata = self.prices
-        p = pricedata[name].values
-        p = p.astype(float)
-        output = talib.EMA(p, timeperiod=period)
-        return output[-1]
+        return self.get_indicator('EMA', column=name, timeperiod=period)[-1]
 
     def get_sma_last(self, period=20, name=''):
         if not name:
             name = self.price_header
-        pricedata = self.prices
-        output = talib.SMA(pricedata[name].values, timeperiod=period)
-        return output[-1]
+        return self.get_indicator('SMA', column=name, timeperiod=period)[-1]
 
     def max_close_to_may(self, indicator='EMA', x=50, y=100):
         indicator = indicator.lower()
@@ -254,11 +164,7 @@ class RESOURCE(object):
     def get_rsi_last(self, period=5, name=''):
         if not name:
             name = self.price_header
-        pricedata = self.prices
-        p = pricedata[name].values
-        p = p.astype(float)
-        output = talib.RSI(p, timeperiod=period)
-        return output[-1]
+        return self.get_indicator('RSI', column=name, timeperiod=period)[-1]
 
     def rsi_bellow_x(self, period=5, x=40):
         rsi = self.get_rsi_last(period=period)
@@ -296,18 +202,9 @@ class RESOURCE(object):
 
     def price_bellow_kc(self):
         rez = 0
-        low = self.prices['Low'].values
-        low = low.astype(float)
-        high = self.prices['High'].values
-        high = high.astype(float)
-        close = self.prices[self.price_header].values
-        close = close.astype(float)
-        output = talib.ATR(high, low, close, timeperiod=10)
-        atr = output[-1]
-        output = talib.EMA(close, timeperiod=20)
-        ema = output[-1]
-        output = talib.EMA(close, timeperiod=50)
-        ema50 = output[-1]
+        atr = self.get_indicator('ATR', column=self.price_header, timeperiod=10)[-1]
+        ema = self.get_indicator('EMA', column=self.price_header, timeperiod=20)[-1]
+        ema50 = self.get_indicator('EMA', column=self.price_header, timeperiod=50)[-1]
         price = self.get_last_price()
         kc = ema - 1.4 * atr
         if price < kc and ema > ema50:
@@ -319,16 +216,8 @@ class RESOURCE(object):
 
     def price_above_kc(self):
         rez = 0
-        low = self.prices['Low'].values
-        low = low.astype(float)
-        high = self.prices['High'].values
-        high = high.astype(float)
-        close = self.prices[self.price_header].values
-        close = close.astype(float)
-        output = talib.ATR(high, low, close, timeperiod=10)
-        atr = output[-1]
-        output = talib.EMA(close, timeperiod=20)
-        ema = output[-1]
+        atr = self.get_indicator('ATR', column=self.price_header, timeperiod=10)[-1]
+        ema = self.get_indicator('EMA', column=self.price_header, timeperiod=20)[-1]
         price = self.get_last_price()
         kc = ema + 1.4 * atr
 
@@ -341,9 +230,7 @@ class RESOURCE(object):
 
     def macd_hist_close_zero(self):
         rez = 0
-        close = self.prices[self.price_header].values
-        close = close.astype(float)
-        macd, macdsign, macdhist = talib.MACD(close)
+        macd, macdsign, macdhist = self.get_indicator('MACD', column=self.price_header)
         macd = macd[-1]
         macdsign = macdsign[-1]
         macdhist = macdhist[-1]
@@ -357,14 +244,9 @@ class RESOURCE(object):
 
     def macd_uptrend(self):
         rez = 0
-        close = self.prices[self.price_header].values
-        close = close.astype(float)
-        macd, macdsign, macdhist = talib.MACD(close)
-        output = talib.EMA(macd, timeperiod=20)
-        ema20 = output[-1]
-
-        output = talib.EMA(macd, timeperiod=5)
-        ema5 = output[-1]
+        macd, macdsign, macdhist = self.get_indicator('MACD', column=self.price_header)
+        ema20 = self.get_indicator('EMA', column=('MACD', self.price_header, 0), timeperiod=20)[-1]
+        ema5 = self.get_indicator('EMA', column=('MACD', self.price_header, 0), timeperiod=5)[-1]
 
         macd = macd[-1]
         macdsign = macdsign[-1]
@@ -377,16 +259,8 @@ class RESOURCE(object):
 
     def is_anomaly(self):
         rez = False
-        low = self.prices['Low'].values
-        low = low.astype(float)
-        high = self.prices['High'].values
-        high = high.astype(float)
-        close = self.prices[self.price_header].values
-        close = close.astype(float)
-        output = talib.ATR(high, low, close, timeperiod=10)
-        atr = output[-1]
-        output = talib.EMA(close, timeperiod=20)
-        ema = output[-1]
+        atr = self.get_indicator('ATR', column=self.price_header, timeperiod=10)[-1]
+        ema = self.get_indicator('EMA', column=self.price_header, timeperiod=20)[-1]
         price = self.get_last_price()
 
         if price < (ema - 2 * atr):
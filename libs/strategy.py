@@ -1,220 +1,140 @@
 """
 Trade strategies
+Strategies take an optional indicator cache of the frame, so indicators are shared between strategies
 """
 
 import sys
 import os
 sys.path.insert(0, os.path.abspath('..'))
-import talib
 from pprint import pprint
 import pandas as pd
+import libs.indicatorcache
 
 
-def max_close_to_may(df, pricetype='Adjusted close', indicator='EMA', x=50, y=200):
-    price = df[pricetype].values
-    method = getattr(talib, indicator)
+def get_cache(df, cache=None):
+    if cache is None:
+        cache = libs.indicatorcache.INDICATORCACHE(df)
+    return cache
 
-    output = method(price, timeperiod=x)
-    EMAx = pd.Series(output, name='MAx')
-    df = df.join(EMAx)
 
-    output = method(price, timeperiod=y)
-    EMAy = pd.Series(output, name='MAy')
-    df = df.join(EMAy)
+def get_series(df, values):
+    return pd.Series(values, index=df.index)
 
-    df['buy'] = (df['MAx'] > df['MAy']) & (df['MAx'] - df['MAy']) < (df[pricetype] * 0.01)
 
-    df.pop('MAx')
-    df.pop('MAy')
+def max_close_to_may(df, pricetype='Adjusted close', indicator='EMA', x=50, y=200, cache=None):
+    cache = get_cache(df, cache)
+    MAx = get_series(df, cache.get(indicator, column=pricetype, timeperiod=x))
+    MAy = get_series(df, cache.get(indicator, column=pricetype, timeperiod=y))
 
-    return df
+    return df.assign(buy=(MAx > MAy) & (MAx - MAy) < (df[pricetype] * 0.01))
 
 
-def ema50_close_to_ema200(df, pricetype='Adjusted close'):
-    return max_close_to_may(df, pricetype=pricetype, indicator='EMA', x=50, y=200)
+def ema50_close_to_ema200(df, pricetype='Adjusted close', cache=None):
+    return max_close_to_may(df, pricetype=pricetype, indicator='EMA', x=50, y=200, cache=cache)
 
 
-def ema50_close_to_ema100(df, pricetype='Adjusted close'):
-    return max_close_to_may(df, pricetype=pricetype, indicator='EMA', x=50, y=100)
+def ema50_close_to_ema100(df, pricetype='Adjusted close', cache=None):
+    return max_close_to_may(df, pricetype=pricetype, indicator='EMA', x=50, y=100, cache=cache)
 
 
-def ema20_close_to_ema50(df, pricetype='Adjusted close'):
-    return max_close_to_may(df, pricetype=pricetype, indicator='EMA', x=20, y=50)
+def ema20_close_to_ema50(df, pricetype='Adjusted close', cache=None):
+    return max_close_to_may(df, pricetype=pricetype, indicator='EMA', x=20, y=50, cache=cache)
 
 
-def price_above_ma(df, pricetype='Adjusted close', indicator='SMA', period=100):
-    price = df[pricetype].values
-    method = getattr(talib, indicator)
-    output = method(price, timeperiod=period)
-    MA = pd.Series(output, name='MA')
-    df = df.join(MA)
+def price_above_ma(df, pricetype='Adjusted close', indicator='SMA', period=100, cache=None):
+    cache = get_cache(df, cache)
+    MA = get_series(df, cache.get(indicator, column=pricetype, timeperiod=period))
 
-    df['buy'] = df[pricetype] > df['MA']
+    return df.assign(buy=df[pricetype] > MA)
 
-    df.pop('MA')
 
-    return df
+def price_above_sma200(df, pricetype='Adjusted close', cache=None):
+    return price_above_ma(df, pricetype=pricetype, indicator='SMA', period=200, cache=cache)
 
 
-def price_above_sma200(df, pricetype='Adjusted close'):
-    return price_above_ma(df, pricetype=pricetype, indicator='SMA', period=200)
+def price_above_ema200(df, pricetype='Adjusted close', cache=None):
+    return price_above_ma(df, pricetype=pricetype, indicator='EMA', period=200, cache=cache)
 
 
-def price_above_ema200(df, pricetype='Adjusted close'):
-    return price_above_ma(df, pricetype=pricetype, indicator='EMA', period=200)
+def price_above_ema100(df, pricetype='Adjusted close', cache=None):
+    return price_above_ma(df, pricetype=pricetype, indicator='EMA', period=100, cache=cache)
 
 
-def price_above_ema100(df, pricetype='Adjusted close'):
-    return price_above_ma(df, pricetype=pricetype, indicator='EMA', period=100)
+def price_above_ema50(df, pricetype='Adjusted close', cache=None):
+    return price_above_ma(df, pricetype=pricetype, indicator='EMA', period=50, cache=cache)
 
 
-def price_above_ema50(df, pricetype='Adjusted close'):
-    return price_above_ma(df, pricetype=pricetype, indicator='EMA', period=50)
+def rsi_bellow_x(df, pricetype='Adjusted close', indicator='RSI', period=5, x=40, cache=None):
+    cache = get_cache(df, cache)
+    RSI = get_series(df, cache.get(indicator, column=pricetype, timeperiod=period))
 
+    return df.assign(buy=RSI < x)
 
-def rsi_bellow_x(df, pricetype='Adjusted close', indicator='RSI', period=5, x=40):
-    price = df[pricetype].values
-    method = getattr(talib, indicator)
-    output = method(price, timeperiod=period)
-    rsi = pd.Series(output, name='RSI')
-    df = df.join(rsi)
 
-    df['buy'] = df['RSI'] < x
+def rsi5_bellow_40(df, pricetype='Adjusted close', cache=None):
+    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=5, x=40, cache=cache)
 
-    df.pop('RSI')
 
-    return df
+def rsi14_bellow_40(df, pricetype='Adjusted close', cache=None):
+    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=14, x=40, cache=cache)
 
 
-def rsi5_bellow_40(df, pricetype='Adjusted close'):
-    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=5, x=40)
+def rsi14_bellow_30(df, pricetype='Adjusted close', cache=None):
+    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=14, x=30, cache=cache)
 
 
-def rsi14_bellow_40(df, pricetype='Adjusted close'):
-    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=14, x=40)
+def rsi_above_x(df, pricetype='Adjusted close', indicator='RSI', period=5, x=60, cache=None):
+    cache = get_cache(df, cache)
+    RSI = get_series(df, cache.get(indicator, column=pricetype, timeperiod=period))
 
+    return df.assign(buy=RSI > x)
 
-def rsi14_bellow_30(df, pricetype='Adjusted close'):
-    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=14, x=30)
 
+def rsi14_above_60(df, pricetype='Adjusted close', cache=None):
+    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=14, x=60, cache=cache)
 
-def rsi_above_x(df, pricetype='Adjusted close', indicator='RSI', period=5, x=60):
-    price = df[pricetype].values
-    method = getattr(talib, indicator)
-    output = method(price, timeperiod=period)
-    rsi = pd.Series(output, name='RSI')
-    df = df.join(rsi)
 
-    df['buy'] = df['RSI'] > x
+def rsi14_above_70(df, pricetype='Adjusted close', cache=None):
+    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=14, x=70, cache=cache)
 
-    df.pop('RSI')
 
-    return df
+def price_bellow_kc(df, pricetype='Adjusted close', cache=None):
+    cache = get_cache(df, cache)
+    ATR = get_series(df, cache.get('ATR', column=pricetype, timeperiod=10))
+    EMA = get_series(df, cache.get('EMA', column=pricetype, timeperiod=20))
+    EMA50 = get_series(df, cache.get('EMA', column=pricetype, timeperiod=50))
 
+    KC_low = EMA - 1.4 * ATR
 
-def rsi14_above_60(df, pricetype='Adjusted close'):
-    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=14, x=60)
+    return df.assign(buy=(df['Close'] < KC_low) & (EMA > EMA50))
 
 
-def rsi14_above_70(df, pricetype='Adjusted close'):
-    return rsi_bellow_x(df, pricetype=pricetype, indicator='RSI', period=14, x=70)
+def price_above_kc(df, pricetype='Adjusted close', cache=None):
+    cache = get_cache(df, cache)
+    ATR = get_series(df, cache.get('ATR', column=pricetype, timeperiod=10))
+    EMA = get_series(df, cache.get('EMA', column=pricetype, timeperiod=20))
 
+    KC_high = EMA + 1.4 * ATR
 
-def price_bellow_kc(df, pricetype='Adjusted close'):
-    low = df['Low'].values
-    high = df['High'].values
-    close = df[pricetype].values
-    output = talib.ATR(high, low, close, timeperiod=10)
-    atr = pd.Series(output, name='ATR')
-    df = df.join(atr)
+    return df.assign(buy=df['Close'] > KC_high)
 
-    output = talib.EMA(close, timeperiod=20)
-    ema = pd.Series(output, name='EMA')
-    df = df.join(ema)
 
-    output = talib.EMA(close, timeperiod=50)
-    ema = pd.Series(output, name='EMA50')
-    df = df.join(ema)
+def macd_hist_close_zero(df, pricetype='Adjusted close', cache=None):
+    cache = get_cache(df, cache)
+    macd, macdsignal, macdhist = cache.get('MACD', column=pricetype)
+    MACD_Hist = get_series(df, macdhist)
 
-    df['KC_low'] = df['EMA'] - 1.4 * df['ATR']
+    return df.assign(buy=abs(MACD_Hist) < 0.075 * df[pricetype])
 
-    df['buy'] = (df['Close'] < df['KC_low']) & (df['EMA'] > df['EMA50'])
 
-    df.pop('EMA')
-    df.pop('EMA50')
-    df.pop('ATR')
-    df.pop('KC_low')
+def macd_uptrend(df, pricetype='Adjusted close', cache=None):
+    cache = get_cache(df, cache)
+    macd, macdsignal, macdhist = cache.get('MACD', column=pricetype)
+    MACD = get_series(df, macd)
+    MACD_Sign = get_series(df, macdsignal)
 
-    return df
+    # EMA of the MACD line
+    MACD_EMA20 = get_series(df, cache.get('EMA', column=('MACD', pricetype, 0), timeperiod=20))
+    MACD_EMA5 = get_series(df, cache.get('EMA', column=('MACD', pricetype, 0), timeperiod=5))
 
-
-def price_above_kc(df, pricetype='Adjusted close'):
-    low = df['Low'].values
-    high = df['High'].values
-    close = df[pricetype].values
-    output = talib.ATR(high, low, close, timeperiod=10)
-    atr = pd.Series(output, name='ATR')
-    df = df.join(atr)
-
-    output = talib.EMA(close, timeperiod=20)
-    ema = pd.Series(output, name='EMA')
-    df = df.join(ema)
-
-    df['KC_high'] = df['EMA'] + 1.4 * df['ATR']
-
-    df['buy'] = df['Close'] > df['KC_high']
-
-    df.pop('EMA')
-    df.pop('ATR')
-    df.pop('KC_high')
-
-    return df
-
-
-def macd_hist_close_zero(df, pricetype='Adjusted close'):
-    close = df[pricetype].values
-    macd, macdsignal, macdhist = talib.MACD(close)
-    ma = pd.Series(macdhist, name='MACD_Hist')
-    df = df.join(ma)
-    ma = pd.Series(macd, name='MACD')
-    df = df.join(ma)
-    ma = pd.Series(macdsignal, name='MACD_Sign')
-    df = df.join(ma)
-
-    df['buy'] = abs(df['MACD_Hist']) < 0.075 * df[pricetype]
-
-    df.pop('MACD_Hist')
-    df.pop('MACD')
-    df.pop('MACD_Sign')
-
-    return df
-
-
-def macd_uptrend(df, pricetype='Adjusted close'):
-    close = df[pricetype].values
-    macd, macdsignal, macdhist = talib.MACD(close)
-    ma = pd.Series(macdhist, name='MACD_Hist')
-    df = df.join(ma)
-    ma = pd.Series(macd, name='MACD')
-    df = df.join(ma)
-    ma = pd.Series(macdsignal, name='MACD_Sign')
-    df = df.join(ma)
-
-    close = df['MACD'].values
-    output = talib.EMA(close, timeperiod=20)
-    ema20 = pd.Series(output, name='MACD_EMA20')
-    df = df.join(ema20)
-
-    output = talib.EMA(close, timeperiod=5)
-    ema5 = pd.Series(output, name='MACD_EMA5')
-    df = df.join(ema5)
-
-    df['buy'] = (df['MACD'] >= df['MACD_Sign']) & (df['MACD_EMA5'] > df['MACD_EMA20'])
-
-    df.pop('MACD_Hist')
-    df.pop('MACD')
-    df.pop('MACD_Sign')
-    df.pop('MACD_EMA5')
-    df.pop('MACD_EMA20')
-
-    return df
+    return df.assign(buy=(MACD >= MACD_Sign) & (MACD_EMA5 > MACD_EMA20))
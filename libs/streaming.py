@@ -0,0 +1,374 @@
+"""
+Streaming indicators
+Seeded from history once, then updated bar by bar in O(1),
+values are the same as TA-Lib ones for the same bars
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import copy
+import json
+import collections
+import numpy as np
+import pandas as pd
+
+
+class SMA(object):
+    """Simple moving average of Close"""
+
+    def __init__(self, period=20):
+        self.period = period
+        self.window = collections.deque(maxlen=period)
+        self.total = 0.0
+
+    def columns(self):
+        return ['SMA' + str(self.period)]
+
+    def update(self, bar):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(bar['Close'])
+        self.total += bar['Close']
+        if len(self.window) < self.period:
+            return [np.nan]
+        return [self.total / self.period]
+
+    def get_state(self):
+        return {'period': self.period, 'window': list(self.window), 'total': self.total}
+
+    def set_state(self, state):
+        self.window = collections.deque(state['window'], maxlen=self.period)
+        self.total = state['total']
+
+
+class EMA(object):
+    """Exponential moving average, seeded with SMA of the first period values"""
+
+    def __init__(self, period=5, field='Close', name=''):
+        self.period = period
+        self.field = field
+        self.name = name or 'EMA' + str(period)
+        self.k = 2.0 / (period + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value = np.nan
+
+    def columns(self):
+        return [self.name]
+
+    def push(self, price):
+        self.count += 1
+        if self.count < self.period:
+            self.total += price
+        elif self.count == self.period:
+            self.value = (self.total + price) / self.period
+        else:
+            self.value = (price - self.value) * self.k + self.value
+        return self.value
+
+    def update(self, bar):
+        return [self.push(bar[self.field])]
+
+    def get_state(self):
+        return {'period': self.period, 'count': self.count, 'total': self.total, 'value': self.value}
+
+    def set_state(self, state):
+        self.count = state['count']
+        self.total = state['total']
+        self.value = state['value']
+
+
+class ATR(object):
+    """Average true range, Wilder smoothing"""
+
+    def __init__(self, period=5, name='ATR'):
+        self.period = period
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.close = np.nan
+        self.value = np.nan
+
+    def columns(self):
+        return [self.name]
+
+    def push(self, high, low, close):
+        self.count += 1
+        previous = self.close
+        self.close = close
+        if self.count == 1:
+            return self.value
+
+        tr = max(high, previous) - min(low, previous)
+        if self.count <= self.period:
+            self.total += tr
+        if self.count == self.period + 1:
+            self.value = (self.total + tr) / self.period
+        elif self.count > self.period + 1:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        return self.value
+
+    def update(self, bar):
+        return [self.push(bar['High'], bar['Low'], bar['Close'])]
+
+    def get_state(self):
+        return {'period': self.period, 'count': self.count, 'total': self.total, 'close': self.close,
+                'value': self.value}
+
+    def set_state(self, state):
+        self.count = state['count']
+        self.total = state['total']
+        self.close = state['close']
+        self.value = state['value']
+
+
+class RSI(object):
+    """Relative strength index, Wilder smoothing"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.count = 0
+        self.close = np.nan
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def columns(self):
+        return ['RSI' + str(self.period)]
+
+    def update(self, bar):
+        self.count += 1
+        previous = self.close
+        self.close = bar['Close']
+        if self.count == 1:
+            return [np.nan]
+
+        change = self.close - previous
+        gain = max(change, 0)
+        loss = max(-change, 0)
+        if self.count <= self.period + 1:
+            self.gain += gain / self.period
+            self.loss += loss / self.period
+            if self.count <= self.period:
+                return [np.nan]
+        else:
+            self.gain = (self.gain * (self.period - 1) + gain) / self.period
+            self.loss = (self.loss * (self.period - 1) + loss) / self.period
+
+        if self.gain + self.loss == 0:
+            return [0.0]
+        return [100 * self.gain / (self.gain + self.loss)]
+
+    def get_state(self):
+        return {'period': self.period, 'count': self.count, 'close': self.close, 'gain': self.gain, 'loss': self.loss}
+
+    def set_state(self, state):
+        self.count = state['count']
+        self.close = state['close']
+        self.gain = state['gain']
+        self.loss = state['loss']
+
+
+class MACD(object):
+    """MACD, signal and histogram, the fast EMA is seeded at the same bar as the slow one like TA-Lib does"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(period=fast)
+        self.slow = EMA(period=slow)
+        self.signal = EMA(period=signal)
+        self.window = collections.deque(maxlen=fast)
+
+    def columns(self):
+        return ['MACD', 'MACD_Sign', 'MACD_Hist']
+
+    def update(self, bar):
+        close = bar['Close']
+        slow = self.slow.push(close)
+        if np.isnan(slow):
+            self.window.append(close)
+            return [np.nan] * 3
+
+        if self.fast.count == 0:
+            self.window.append(close)
+            for price in self.window:
+                fast = self.fast.push(price)
+        else:
+            fast = self.fast.push(close)
+
+        macd = fast - slow
+        signal = self.signal.push(macd)
+        if np.isnan(signal):
+            return [np.nan] * 3
+        return [macd, signal, macd - signal]
+
+    def get_state(self):
+        return {'fast': self.fast.get_state(), 'slow': self.slow.get_state(), 'signal': self.signal.get_state(),
+                'window': list(self.window)}
+
+    def set_state(self, state):
+        self.fast.set_state(state['fast'])
+        self.slow.set_state(state['slow'])
+        self.signal.set_state(state['signal'])
+        self.window = collections.deque(state['window'], maxlen=self.window.maxlen)
+
+
+class KC(object):
+    """Keltner channel, EMA -/+ multiplier * ATR"""
+
+    def __init__(self, period=5, multiplier=2):
+        self.multiplier = multiplier
+        self.ema = EMA(period=period)
+        self.atr = ATR(period=period)
+
+    def columns(self):
+        return ['KC_LOW', 'KC_HIGH']
+
+    def update(self, bar):
+        ema = self.ema.update(bar)[0]
+        atr = self.atr.update(bar)[0]
+        return [ema - self.multiplier * atr, ema + self.multiplier * atr]
+
+    def get_state(self):
+        return {'multiplier': self.multiplier, 'ema': self.ema.get_state(), 'atr': self.atr.get_state()}
+
+    def set_state(self, state):
+        self.ema.set_state(state['ema'])
+        self.atr.set_state(state['atr'])
+
+
+def get_bar(row):
+    return {'High': float(row['High']), 'Low': float(row['Low']), 'Close': float(row['Close'])}
+
+
+def find_bar(df, dates, bar):
+    """Position of an unchanged persisted bar in prices, None if it is missing or changed"""
+    found = dates[dates == pd.Timestamp(bar['date'])]
+    if len(found) == 1 and get_bar(df.loc[found.index[0]]) == {field: bar[field] for field in ['High', 'Low', 'Close']}:
+        return dates.index.get_loc(found.index[0])
+    return None
+
+
+class INDICATORS(object):
+    """
+    Set of streaming indicators of a symbol
+
+    Indicator states and calculated columns are persisted as <path>.json and <path>.npy,
+    a next run of prices with the same first bar calculates bars after the last persisted one only.
+    States before the last bar are persisted as well, a changed last bar is calculated again from them.
+    Prices of another first bar are calculated from the start, so values depend on the prices only
+    """
+
+    def __init__(self, indicators, path=None):
+        self.initial = copy.deepcopy(indicators)
+        self.indicators = indicators
+        self.path = path
+        self.columns = [column for indicator in indicators for column in indicator.columns()]
+
+    def get_initial(self):
+        """States of fresh indicators, persisted ones are reused only if parameters are the same"""
+        return [indicator.get_state() for indicator in self.initial]
+
+    def load(self):
+        """Returns calculated columns and the persisted state, None if nothing is persisted"""
+        if not self.path or not os.path.isfile(self.path + '.json') or not os.path.isfile(self.path + '.npy'):
+            return None, None
+        with open(self.path + '.json') as infile:
+            state = json.load(infile)
+        if state['columns'] != self.columns or json.dumps(state['initial']) != json.dumps(self.get_initial()):
+            return None, None
+        for indicator, indicator_state in zip(self.indicators, state['indicators']):
+            indicator.set_state(indicator_state)
+
+        data = np.load(self.path + '.npy')
+        df = pd.DataFrame(data[:, 1:], columns=self.columns)
+        df.insert(0, 'date', data[:, 0].astype('int64').astype('datetime64[D]').astype('datetime64[ns]'))
+        df = df[df['date'] <= pd.Timestamp(state['bar']['date'])]
+        return df, state
+
+    def save(self, df, bar, first, previous=None):
+        state = dict()
+        state['columns'] = self.columns
+        state['initial'] = self.get_initial()
+        state['first'] = first
+        state['bar'] = bar
+        state['indicators'] = [indicator.get_state() for indicator in self.indicators]
+        state['previous'] = previous
+
+        data = np.empty((len(df), len(self.columns) + 1))
+        data[:, 0] = df['date'].values.astype('datetime64[D]').astype('int64')
+        data[:, 1:] = df[self.columns].values
+
+        if not os.path.isdir(os.path.dirname(self.path)):
+            os.makedirs(os.path.dirname(self.path))
+
+        # Columns first, the state marks the last calculated bar
+        with open(self.path + '.npy.tmp', 'wb') as outfile:
+            np.save(outfile, data)
+        os.replace(self.path + '.npy.tmp', self.path + '.npy')
+        with open(self.path + '.json.tmp', 'w') as outfile:
+            json.dump(state, outfile)
+        os.replace(self.path + '.json.tmp', self.path + '.json')
+
+    def run(self, df):
+        """
+        Calculate indicators of prices
+
+        Args:
+            df: Prices with date, High, Low and Close columns
+
+        Returns:
+            DataFrame of indicator columns, same index as the prices
+        """
+        dates = pd.to_datetime(df['date'])
+        calculated, state = self.load()
+
+        # Continue prices of the same first bar from the last persisted bar if it is unchanged or from the bar
+        # before it if only the last bar is changed, MOEX updates the bar of the trading day,
+        # otherwise calculate everything again
+        start = 0
+        first = get_bar(df.iloc[0]) if len(df) else None
+        if first is not None:
+            first['date'] = str(dates.iloc[0].date())
+        if calculated is not None and (not state.get('first') or state['first'] != first):
+            calculated = None
+        if calculated is not None:
+            position = find_bar(df, dates, state['bar'])
+            previous = state.get('previous')
+            if position is None and previous is not None:
+                position = find_bar(df, dates, previous['bar'])
+                if position is not None:
+                    for indicator, indicator_state in zip(self.indicators, previous['indicators']):
+                        indicator.set_state(indicator_state)
+                    calculated = calculated[calculated['date'] <= pd.Timestamp(previous['bar']['date'])]
+            if position is not None:
+                start = position + 1
+            else:
+                calculated = None
+        if calculated is None:
+            self.indicators = copy.deepcopy(self.initial)
+            calculated = pd.DataFrame(columns=['date'] + self.columns)
+
+        rows = list()
+        previous = None
+        for i in range(start, len(df)):
+            if i == len(df) - 1 and i > 0:
+                previous = {'bar': get_bar(df.iloc[i - 1]),
+                            'indicators': copy.deepcopy([indicator.get_state() for indicator in self.indicators])}
+                previous['bar']['date'] = str(dates.iloc[i - 1].date())
+            bar = get_bar(df.iloc[i])
+            values = list()
+            for indicator in self.indicators:
+                values += indicator.update(bar)
+            rows.append([dates.iloc[i]] + values)
+
+        if rows:
+            new = pd.DataFrame(rows, columns=['date'] + self.columns)
+            calculated = pd.concat([calculated, new], ignore_index=True) if len(calculated) else new
+            if self.path:
+                bar['date'] = str(dates.iloc[-1].date())
+                self.save(calculated, bar, first, previous=previous)
+
+        result = pd.DataFrame({'date': dates}).merge(calculated, on='date', how='left')
+        result.index = df.index
+        return result[self.columns]
+
@@ -6,6 +6,33 @@ import pandas as pd
 import numpy as np
 
 
+def true_range(df):
+    """True range of every bar, the first bar has zero range
+
+    :param df: pandas.DataFrame
+    :return: numpy.ndarray
+    """
+    high = df['High'].values
+    low = df['Low'].values
+    close = df['Close'].values
+    TR = np.zeros(len(df))
+    TR[1:] = np.maximum(high[1:], close[:-1]) - np.minimum(low[1:], close[:-1])
+    return TR
+
+
+def directional_movement(df):
+    """Positive and negative directional movement between bars, one value less than bars
+
+    :param df: pandas.DataFrame
+    :return: (numpy.ndarray, numpy.ndarray)
+    """
+    UpMove = np.diff(df['High'].values)
+    DoMove = -np.diff(df['Low'].values)
+    UpD = np.where((UpMove > DoMove) & (UpMove > 0), UpMove, 0)
+    DoD = np.where((DoMove > UpMove) & (DoMove > 0), DoMove, 0)
+    return UpD, DoD
+
+
 def moving_average(df, n):
     """Calculate the moving average for the given data.
     
@@ -63,13 +90,7 @@ def average_true_range(df, n):
     :param n: 
     :return: pandas.DataFrame
     """
-    i = 0
-    TR_l = [0]
-    while i < df.index[-1]:
-        TR = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        TR_l.append(TR)
-        i = i + 1
-    TR_s = pd.Series(TR_l)
+    TR_s = pd.Series(true_range(df))
     ATR = pd.Series(TR_s.ewm(span=n, min_periods=n).mean(), name='ATR')
     df = df.join(ATR)
     return df
@@ -145,12 +166,10 @@ def trix(df, n):
     EX1 = df['Close'].ewm(span=n, min_periods=n).mean()
     EX2 = EX1.ewm(span=n, min_periods=n).mean()
     EX3 = EX2.ewm(span=n, min_periods=n).mean()
-    i = 0
-    ROC_l = [np.nan]
-    while i + 1 <= df.index[-1]:
-        ROC = (EX3[i + 1] - EX3[i]) / EX3[i]
-        ROC_l.append(ROC)
-        i = i + 1
+    EX3 = EX3.values
+    ROC_l = np.empty(len(EX3))
+    ROC_l[0] = np.nan
+    ROC_l[1:] = (EX3[1:] - EX3[:-1]) / EX3[:-1]
     Trix = pd.Series(ROC_l, name='Trix_' + str(n))
     df = df.join(Trix)
     return df
@@ -164,30 +183,9 @@ def average_directional_movement_index(df, n, n_ADX):
     :param n_ADX: 
     :return: pandas.DataFrame
     """
-    i = 0
-    UpI = []
-    DoI = []
-    while i + 1 <= df.index[-1]:
-        UpMove = df.loc[i + 1, 'High'] - df.loc[i, 'High']
-        DoMove = df.loc[i, 'Low'] - df.loc[i + 1, 'Low']
-        if UpMove > DoMove and UpMove > 0:
-            UpD = UpMove
-        else:
-            UpD = 0
-        UpI.append(UpD)
-        if DoMove > UpMove and DoMove > 0:
-            DoD = DoMove
-        else:
-            DoD = 0
-        DoI.append(DoD)
-        i = i + 1
-    i = 0
-    TR_l = [0]
-    while i < df.index[-1]:
-        TR = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        TR_l.append(TR)
-        i = i + 1
-    TR_s = pd.Series(TR_l)
+    # Directional movement is not padded, so it is one bar ahead of the true range
+    UpI, DoI = directional_movement(df)
+    TR_s = pd.Series(true_range(df))
     ATR = pd.Series(TR_s.ewm(span=n, min_periods=n).mean())
     UpI = pd.Series(UpI)
     DoI = pd.Series(DoI)
@@ -242,18 +240,11 @@ def vortex_indicator(df, n):
     :param n: 
     :return: pandas.DataFrame
     """
-    i = 0
-    TR = [0]
-    while i < df.index[-1]:
-        Range = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        TR.append(Range)
-        i = i + 1
-    i = 0
-    VM = [0]
-    while i < df.index[-1]:
-        Range = abs(df.loc[i + 1, 'High'] - df.loc[i, 'Low']) - abs(df.loc[i + 1, 'Low'] - df.loc[i, 'High'])
-        VM.append(Range)
-        i = i + 1
+    TR = true_range(df)
+    high = df['High'].values
+    low = df['Low'].values
+    VM = np.zeros(len(df))
+    VM[1:] = np.abs(high[1:] - low[:-1]) - np.abs(low[1:] - high[:-1])
     VI = pd.Series(pd.Series(VM).rolling(n).sum() / pd.Series(TR).rolling(n).sum(), name='Vortex')
     df = df.join(VI)
     return df
@@ -300,25 +291,9 @@ def rsi(df, n):
     :param n:
     :return: pandas.DataFrame
     """
-    i = 0
-    UpI = [0]
-    DoI = [0]
-    while i + 1 <= df.index[-1]:
-        UpMove = df.loc[i + 1, 'High'] - df.loc[i, 'High']
-        DoMove = df.loc[i, 'Low'] - df.loc[i + 1, 'Low']
-        if UpMove > DoMove and UpMove > 0:
-            UpD = UpMove
-        else:
-            UpD = 0
-        UpI.append(UpD)
-        if DoMove > UpMove and DoMove > 0:
-            DoD = DoMove
-        else:
-            DoD = 0
-        DoI.append(DoD)
-        i = i + 1
-    UpI = pd.Series(UpI)
-    DoI = pd.Series(DoI)
+    UpD, DoD = directional_movement(df)
+    UpI = pd.Series(np.concatenate([[0], UpD]))
+    DoI = pd.Series(np.concatenate([[0], DoD]))
     PosDI = pd.Series(UpI.ewm(span=n, min_periods=n).mean())
     NegDI = pd.Series(DoI.ewm(span=n, min_periods=n).mean())
     RSI = pd.Series(100.0 * PosDI / (PosDI + NegDI), name='RSI')
@@ -333,25 +308,9 @@ def relative_strength_index(df, n):
     :param n: 
     :return: pandas.DataFrame
     """
-    i = 0
-    UpI = [0]
-    DoI = [0]
-    while i + 1 <= df.index[-1]:
-        UpMove = df.loc[i + 1, 'High'] - df.loc[i, 'High']
-        DoMove = df.loc[i, 'Low'] - df.loc[i + 1, 'Low']
-        if UpMove > DoMove and UpMove > 0:
-            UpD = UpMove
-        else:
-            UpD = 0
-        UpI.append(UpD)
-        if DoMove > UpMove and DoMove > 0:
-            DoD = DoMove
-        else:
-            DoD = 0
-        DoI.append(DoD)
-        i = i + 1
-    UpI = pd.Series(UpI)
-    DoI = pd.Series(DoI)
+    UpD, DoD = directional_movement(df)
+    UpI = pd.Series(np.concatenate([[0], UpD]))
+    DoI = pd.Series(np.concatenate([[0], DoD]))
     PosDI = pd.Series(UpI.ewm(span=n, min_periods=n).mean())
     NegDI = pd.Series(DoI.ewm(span=n, min_periods=n).mean())
     RSI = pd.Series(100.0 * PosDI / (PosDI + NegDI), name='RSI_' + str(n))
@@ -414,14 +373,10 @@ def money_flow_index(df, n):
     :return: pandas.DataFrame
     """
     PP = (df['High'] + df['Low'] + df['Close']) / 3
-    i = 0
-    PosMF = [0]
-    while i < df.index[-1]:
-        if PP[i + 1] > PP[i]:
-            PosMF.append(PP[i + 1] * df.loc[i + 1, 'Volume'])
-        else:
-            PosMF.append(0)
-        i = i + 1
+    pp = PP.values
+    volume = df['Volume'].values
+    PosMF = np.zeros(len(df))
+    PosMF[1:] = np.where(pp[1:] > pp[:-1], pp[1:] * volume[1:], 0)
     PosMF = pd.Series(PosMF)
     TotMF = PP * df['Volume']
     MFR = pd.Series(PosMF / TotMF)
@@ -437,16 +392,10 @@ def on_balance_volume(df, n):
     :param n: 
     :return: pandas.DataFrame
     """
-    i = 0
-    OBV = [0]
-    while i < df.index[-1]:
-        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] > 0:
-            OBV.append(df.loc[i + 1, 'Volume'])
-        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] == 0:
-            OBV.append(0)
-        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] < 0:
-            OBV.append(-df.loc[i + 1, 'Volume'])
-        i = i + 1
+    change = np.diff(df['Close'].values)
+    volume = df['Volume'].values
+    OBV = np.zeros(len(df))
+    OBV[1:] = np.sign(change) * volume[1:]
     OBV = pd.Series(OBV)
     OBV_ma = pd.Series(OBV.rolling(n, min_periods=n).mean(), name='OBV_' + str(n))
     df = df.join(OBV_ma)
@@ -535,15 +484,11 @@ def ultimate_oscillator(df):
     :param df: pandas.DataFrame
     :return: pandas.DataFrame
     """
-    i = 0
-    TR_l = [0]
-    BP_l = [0]
-    while i < df.index[-1]:
-        TR = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        TR_l.append(TR)
-        BP = df.loc[i + 1, 'Close'] - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        BP_l.append(BP)
-        i = i + 1
+    TR_l = true_range(df)
+    low = df['Low'].values
+    close = df['Close'].values
+    BP_l = np.zeros(len(df))
+    BP_l[1:] = close[1:] - np.minimum(low[1:], close[:-1])
     UltO = pd.Series((4 * pd.Series(BP_l).rolling(7).sum() / pd.Series(TR_l).rolling(7).sum()) + (
                 2 * pd.Series(BP_l).rolling(14).sum() / pd.Series(TR_l).rolling(14).sum()) + (
                                  pd.Series(BP_l).rolling(28).sum() / pd.Series(TR_l).rolling(28).sum()),
@@ -558,17 +503,9 @@ def donchian_channel(df, n):
     :param n:
     :return: pandas.DataFrame
     """
-    i = 0
-    dc_l = []
-    while i < n - 1:
-        dc_l.append(0)
-        i += 1
-
-    i = 0
-    while i + n - 1 < df.index[-1]:
-        dc = max(df['High'].ix[i:i + n - 1]) - min(df['Low'].ix[i:i + n - 1])
-        dc_l.append(dc)
-        i += 1
+    # Range of n bars ending at every bar but the last one, after n - 1 zeros
+    dc = (df['High'].rolling(n).max() - df['Low'].rolling(n).min()).values
+    dc_l = np.concatenate([np.zeros(n - 1), dc[n - 1:len(df) - 1]])
 
     donchian_chan = pd.Series(dc_l, name='Donchian_' + str(n))
     donchian_chan = donchian_chan.shift(n - 1)
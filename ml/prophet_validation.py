@@ -19,9 +19,9 @@ import matplotlib.pyplot as plt
 
 sybmol = 'ABBV'
 
-res = sl.RESOURCE(symbol=sybmol)
-res.get_prices_from_alpha(key=configs.alphaconf.key, cacheage=3600*24*1, cachedir='..\cache')
-res.get_history_from_alpha(key=configs.alphaconf.key, cacheage=3600*24, cachedir='..\history')
+res = sl.RESOURCE(symbol=sybmol, cachebase='..')
+res.get_prices_from_alpha(key=configs.alphaconf.key, cacheage=3600*24*1)
+res.get_history_from_alpha(key=configs.alphaconf.key, cacheage=3600*24)
 res.fix_alpha_columns()
 res.fix_alpha_history_columns()
 
@@ -22,14 +22,14 @@ if datatype == 'm':
 else:
     price_type = 'Adjusted close'
 
-res = sl.RESOURCE(symbol=sybmol)
+res = sl.RESOURCE(symbol=sybmol, cachebase='..')
 if datatype == 'a':
-    res.get_prices_from_alpha(key=configs.alphaconf.key, cacheage=3600*24*1, cachedir='..\cache')
-    res.get_history_from_alpha(key=configs.alphaconf.key, cacheage=3600*24, cachedir='..\history')
+    res.get_prices_from_alpha(key=configs.alphaconf.key, cacheage=3600*24*1)
+    res.get_history_from_alpha(key=configs.alphaconf.key, cacheage=3600*24)
     res.fix_alpha_columns()
     res.fix_alpha_history_columns()
 else:
-    res.history = res.get_prices_from_moex(days=365 * 5, cachedir=os.path.join('..', 'history-m'))
+    res.history = res.get_prices_from_moex(days=365 * 5)
 
 # Prepare data for the Prophet
 
@@ -3,13 +3,21 @@ https://pythonprogramming.net/monte-carlo-simulator-python/
 https://pypi.org/project/pandas-montecarlo/
 """
 
-import random
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
 import matplotlib.pyplot as plt
+import libs.rng
+
+# Set a number to repeat a run
+seed = libs.rng.get_seed()
+print('Seed:', seed)
+rng = libs.rng.get_generator(seed)
 
 
 # let us go ahead and change this to return a simple win/loss
 def rollDice():
-    roll = random.randint(1, 100)
+    roll = rng.integers(1, 101)
 
     if roll == 100:
         print(roll, 'roll was 100, you lose. What are the odds?! Play again!')
@@ -11,19 +11,16 @@ sys.path.insert(0, os.path.abspath('..'))
 import pandas as pd
 import matplotlib.pyplot as plt
 import libs.futures
-import pandas_montecarlo
 from pprint import pprint
 import math
 import numpy as np
 
 symbol = 'GMKN'  # 'SiZ8'  # 'SBER'  # 'BRZ8'
 
-futures = libs.futures.FUTURES(symbol=symbol, boardid='TQBR')  # boardid='TQBR'
-futures.get_data_from_moex(cachedir=os.path.join('..', 'cache-m'))
+futures = libs.futures.FUTURES(symbol=symbol, boardid='TQBR', cachebase='..')  # boardid='TQBR'
+futures.get_data_from_moex()
 
-futures.get_atr(period=5)
-futures.get_ema(period=5)
-futures.get_kc()
+futures.get_indicators(period=5)
 
 futures.df.pop('Open')
 futures.df.pop('High')
@@ -48,23 +45,17 @@ print('Bust:', bust)
 print('StopLoss:', round(futures.df.Close[-1:].values[0]*(1-bust), 2))
 print()
 
-bust_chance, goal_chance = futures.get_bust_chance(bust=bust, sims=10000)
-print('Bust chance:', round(bust_chance, 2))
-print('Goal chance:', round(goal_chance, 2))
+# Chances and reward-risk ratio of every goal from one simulation
+goals = [i * 0.1 for i in range(1, 10)]
+curve = futures.get_reward_risk_curve(goals, bust=bust, sims=100000)
+print(curve)
 print()
 
-# Reward-risk ratio
-for i in range(1, 10):
-    goal = i * 0.1
-    futures.df['RewardRiskRatio'] = (goal_chance/i) * goal * futures.df['Close'] / \
-        (bust_chance * (futures.df['Close'] - futures.df['StopLoss']))
-    if futures.df['RewardRiskRatio'].mean() > 2:
-        print('Reward-Risk ratio:', futures.df['RewardRiskRatio'].mean())
-        print('Goal:', goal)
-        break
-
-if goal > 0.1:
-    bust_chance, goal_chance = futures.get_bust_chance(bust=bust, goal=goal)
-    print('Bust chance:', round(bust_chance, 2))
-    print('Goal chance:', round(goal_chance, 2))
+passed = curve[curve['reward_risk_ratio'] > 2]
+if len(passed):
+    goal = passed.index[0]
+    print('Reward-Risk ratio:', passed['reward_risk_ratio'].iloc[0])
+    print('Goal:', goal)
+    print('Bust chance:', round(passed['bust_chance'].iloc[0], 2))
+    print('Goal chance:', round(passed['goal_chance'].iloc[0], 2))
     print()
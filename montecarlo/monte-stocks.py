@@ -40,24 +40,19 @@ for item in watchdata:
 
     print(symbol)
 
-    futures = libs.futures.FUTURES(symbol=symbol, boardid='TQBR')
+    futures = libs.futures.FUTURES(symbol=symbol, boardid='TQBR', cachebase='..')
     if datatype == 'm':
-        futures.get_data_from_moex(cachedir=os.path.join('..', 'cache-m'))
+        futures.get_data_from_moex()
     else:
-        futures.get_prices_from_alpha(key=key, cachedir=os.path.join('..', 'cache'))
+        futures.get_prices_from_alpha(key=key)
         futures.fix_alpha_columns()
 
-    futures.get_atr(period=5)
-    futures.get_ema(period=5)
+    futures.get_indicators(period=5)
 
     # Calculate trend
-    futures.get_ema(period=20)
-
     trend = futures.detect_trend()
     print('Trend:', trend)
 
-    futures.get_kc()
-
     anomalies = futures.count_anomalies()
     if anomalies > 0:
         print('Anomaly detected', anomalies)
@@ -85,31 +80,29 @@ for item in watchdata:
     print('StopLoss:', stop_loss)
     print()
 
-    bust_chance, goal_chance = futures.get_bust_chance(bust=bust, sims=10000, goal=min_goal)
+    # Chances and reward-risk ratio of every goal from one simulation
+    goals = [i * min_goal for i in range(1, 5)]
+    curve = futures.get_reward_risk_curve(goals, bust=bust, sims=100000)
+    bust_chance = curve['bust_chance'].iloc[0]
     print('Bust chance:', round(bust_chance, 2))
-    print('Goal chance:', round(goal_chance, 2))
+    print('Goal chance:', round(curve['goal_chance'].iloc[0], 2))
     print()
 
-    # Reward-risk ratio
-    for i in range(1, 5):
-        goal = i * min_goal
-        if bust_chance < 0.001:
-            bust_chance = 0.001
-        futures.df['RewardRiskRatio'] = (goal_chance/i) * goal * futures.df['Close'] / \
-            (bust_chance * (futures.df['Close'] - futures.df['StopLoss']))
-        if futures.df['RewardRiskRatio'].mean() > min_RewardRiskRatio:
-            break
-
-    print('Reward-Risk ratio:', futures.df['RewardRiskRatio'].mean())
+    # The lowest goal with enough reward-risk ratio
+    passed = curve[curve['reward_risk_ratio'] > min_RewardRiskRatio]
+    goal = passed.index[0] if len(passed) else goals[-1]
+    goal_chance = curve.loc[goal, 'goal_chance']
+    reward_risk_ratio = curve.loc[goal, 'reward_risk_ratio']
+
+    print('Reward-Risk ratio:', reward_risk_ratio)
     print('Goal:', goal)
     print('Exit price:', round(futures.df.Close[-1:].values[0] * (1 + goal), 2))
     print()
 
     if goal > min_goal:
         print('RewardRiskRatio is to low')
-        # bust_chance, goal_chance = futures.get_bust_chance(bust=bust, goal=goal)
-        # print('Goal chance:', round(goal_chance, 2))
-        # print()
+        print('Goal chance:', round(goal_chance, 2))
+        print()
     else:
         results[symbol] = collections.OrderedDict()
         results[symbol]['last_price'] = float(round(futures.df.Close[-1:].values[0], 2))
@@ -119,7 +112,7 @@ for item in watchdata:
         results[symbol]['goal_chance'] = round(goal_chance, 2)
         results[symbol]['bust'] = round(bust, 2)
         results[symbol]['bust_chance'] = round(bust_chance, 2)
-        results[symbol]['reward_risk_ratio'] = round(futures.df['RewardRiskRatio'].mean(), 2)
+        results[symbol]['reward_risk_ratio'] = round(reward_risk_ratio, 2)
         results[symbol]['trend'] = trend
         results[symbol]['anomalies'] = float(anomalies)
 
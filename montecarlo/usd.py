@@ -13,15 +13,15 @@ import matplotlib.pyplot as plt
 import libs.futures
 
 symbol = 'USD000UTSTOM'
-futures = libs.futures.FUTURES(symbol=symbol, boardid='CETS', volumefield='VOLRUR')
-futures.get_data_from_moex(cachedir=os.path.join('..', 'cache-m'))
+futures = libs.futures.FUTURES(symbol=symbol, boardid='CETS', volumefield='VOLRUR', cachebase='..')
+futures.get_data_from_moex()
 # futures.plot()
 df_usd = futures.df
 print(df_usd.tail(10))
 
 symbol = 'SiZ8'
-futures = libs.futures.FUTURES(symbol=symbol)
-futures.get_data_from_moex(cachedir=os.path.join('..', 'cache-m'))
+futures = libs.futures.FUTURES(symbol=symbol, cachebase='..')
+futures.get_data_from_moex()
 df_si = futures.df
 
 print(df_si.tail(10))
@@ -0,0 +1,102 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import json
+import tempfile
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import libs.fetcher
+import libs.pricestore
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves ISS board history pages from tests/iss, no trades at other dates"""
+
+    requests = list()
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        board = url.path.split('/')[-2]
+        FixtureHandler.requests.append(params['date'])
+
+        filepath = os.path.join('iss', '{}-{}-{}.json'.format(board, params['date'], params.get('start', 0)))
+        if os.path.isfile(filepath):
+            with open(filepath, 'rb') as infile:
+                data = infile.read()
+        else:
+            data = json.dumps({
+                'history': {'columns': ['BOARDID', 'TRADEDATE', 'SECID'], 'data': []},
+                'history.cursor': {'columns': ['INDEX', 'TOTAL', 'PAGESIZE'], 'data': [[0, 0, 100]]},
+            }).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BoardTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        cls.url = 'http://127.0.0.1:{}/iss'.format(cls.server.server_address[1])
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        libs.fetcher.set_rate('moex', 1000, 1000)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        FixtureHandler.requests = list()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = libs.pricestore.PRICESTORE(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_board_pages(self):
+        df = libs.fetcher.fetch_moex_board('TQBR', date='2018-11-30', url=self.url)
+        self.assertListEqual(list(df['SECID']), ['SBER', 'GAZP', 'LKOH'])
+
+    def test_update_board(self):
+        updated = libs.fetcher.update_board(self.store, boardid='TQBR', start='2018-11-29', till='2018-12-02',
+                                            url=self.url)
+        self.assertListEqual(sorted(updated), ['GAZP', 'LKOH', 'SBER'])
+
+        # Two pages for every trading date, weekends are skipped
+        self.assertEqual(len(FixtureHandler.requests), 4)
+
+        df = self.store.load('moex', 'TQBR', 'SBER')
+        self.assertListEqual(list(df['date'].dt.strftime('%Y-%m-%d')), ['2018-11-29', '2018-11-30'])
+        self.assertListEqual(list(df['Close']), [202.01, 203.2])
+        self.assertListEqual(list(df.columns), ['date', 'Open', 'Low', 'High', 'Close', 'Volume'])
+
+    def test_update_symbols(self):
+        updated = libs.fetcher.update_board(self.store, boardid='TQBR', start='2018-11-30', till='2018-11-30',
+                                            symbols=['SBER'], url=self.url)
+        self.assertListEqual(updated, ['SBER'])
+        self.assertIsNone(self.store.load('moex', 'TQBR', 'GAZP'))
+
+    def test_requests(self):
+        # 5 trading dates of 3 TQBR pages and a page of every symbol
+        self.assertEqual(libs.fetcher.board_requests('TQBR', '2018-11-26', till='2018-11-30'), 15)
+        self.assertEqual(libs.fetcher.symbol_requests('2018-11-26', till='2018-11-30'), 1)
+        self.assertEqual(libs.fetcher.symbol_requests('2018-01-01', till='2018-12-31'), 3)
+
+    def test_no_trades(self):
+        updated = libs.fetcher.update_board(self.store, boardid='TQBR', start='2018-12-03', till='2018-12-04',
+                                            url=self.url)
+        self.assertListEqual(updated, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
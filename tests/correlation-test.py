@@ -0,0 +1,53 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import numpy as np
+import pandas as pd
+import libs.correlation
+
+
+class CorrelationTests(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        dates = pd.bdate_range('2018-01-01', periods=250)
+        self.closes = pd.DataFrame(np.cumsum(np.random.randn(250, 30), axis=0) + 100, index=dates,
+                                   columns=['S' + str(i) for i in range(30)])
+
+    def test_matrix(self):
+        for method in ['pearson', 'spearman']:
+            expected = self.closes.corr(method=method)
+            pd.testing.assert_frame_equal(libs.correlation.get_matrix(self.closes, method=method), expected)
+
+    def test_gaps(self):
+        closes = self.closes.copy()
+        closes.iloc[:10, 3] = np.nan
+        pd.testing.assert_frame_equal(libs.correlation.get_matrix(closes), closes.corr())
+
+    def test_align(self):
+        closes = self.closes[['S0', 'S1']].copy()
+        closes.iloc[5, 1] = np.nan
+        self.assertEqual(len(libs.correlation.align(closes)), len(closes) - 1)
+        filled = libs.correlation.align(closes, how='ffill')
+        self.assertEqual(filled.iloc[5, 1], closes.iloc[4, 1])
+
+    def test_beta(self):
+        returns = libs.correlation.get_returns(self.closes)
+        returns.iloc[:10, 2] = np.nan
+        beta = libs.correlation.get_beta(returns, 'S0')
+
+        for column in ['S1', 'S2']:
+            pair = returns[['S0', column]].dropna()
+            covariance = np.cov(pair[column], pair['S0'])
+            self.assertAlmostEqual(beta[column], covariance[0, 1] / covariance[1, 1])
+
+        rolling = libs.correlation.get_rolling_beta(returns, 'S0', window=20)
+        self.assertAlmostEqual(rolling['S1'].iloc[-1], libs.correlation.get_beta(returns.tail(20), 'S0')['S1'])
+
+        rolling = libs.correlation.get_rolling_correlation(self.closes, 'S0', window=20)
+        self.assertAlmostEqual(rolling['S1'].iloc[-1], self.closes.tail(20).corr().loc['S0', 'S1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import tempfile
+import pandas as pd
+import talib
+import libs.datacore
+import libs.futures
+import libs.stockslib as sl
+
+
+class DataCoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.prices = pd.read_csv('MSFT.csv', index_col='date')
+        core = libs.datacore.DATACORE(symbol='MSFT', source='alpha', cachebase=self.tmpdir.name)
+        core.get_store().append('alpha', 'daily', 'MSFT', self.prices)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_shared_store(self):
+        futures = libs.futures.FUTURES(symbol='MSFT', cachebase=self.tmpdir.name)
+        futures.get_prices_from_alpha(bars=50)
+        futures.fix_alpha_columns()
+
+        res = sl.RESOURCE(symbol='MSFT', cachebase=self.tmpdir.name)
+        res.get_prices_from_alpha(bars=50)
+        res.fix_alpha_columns()
+
+        self.assertEqual(len(futures.df), 50)
+        self.assertListEqual(list(futures.df['Close']), list(res.prices['Close']))
+        self.assertEqual(res.get_last_price(), 107.56)
+
+    def test_short_store(self):
+        core = libs.datacore.DATACORE(symbol='MSFT', source='alpha', cachebase=self.tmpdir.name)
+        older = self.prices.head(50).copy()
+        older.index = pd.Index(pd.bdate_range(end='2000-01-03', periods=50).strftime('%Y-%m-%d'), name='date')
+        sizes = list()
+
+        async def afetch_alpha(key='demo', size='compact'):
+            sizes.append(size)
+            return pd.concat([older, self.prices])
+
+        # The store is fresh but shorter than the history
+        core.afetch_alpha = afetch_alpha
+        self.assertEqual(len(core.load(bars=100)), 100)
+        self.assertEqual(len(core.load(bars=150)), 150)
+        self.assertListEqual(sizes, ['full'])
+
+    def test_young_symbol(self):
+        # 40 bars of history, less than the requested days
+        core = libs.datacore.DATACORE(symbol='YOUNG', source='moex', cachebase=self.tmpdir.name)
+        bars = libs.datacore.fix_alpha_columns(self.prices.tail(40)).reset_index()
+        bars['date'] = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=40)
+        starts = list()
+
+        async def afetch_moex(days=100, start=None):
+            starts.append(start)
+            return bars[['date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+
+        core.afetch_moex = afetch_moex
+        for i in range(3):
+            self.assertEqual(len(core.load(days=100)), 40)
+        self.assertEqual(len(starts), 1)
+
+        # Expired bars are updated since the last one
+        core.cacheage = 0
+        core.load(days=100)
+        self.assertListEqual(starts[1:], [bars['date'].iloc[-1]])
+
+    def test_last_ema(self):
+        core = libs.datacore.DATACORE(symbol='MSFT', source='alpha', cachebase=self.tmpdir.name)
+        close = libs.datacore.fix_alpha_columns(self.prices)['Close'].values
+        self.assertAlmostEqual(core.get_last_ema(period=50), talib.EMA(close, timeperiod=50)[-1], places=4)
+
+        # A new bar is pushed to the stored state
+        bar = self.prices.tail(1).copy()
+        bar.index = pd.Index(['2099-01-04'], name='date')
+        bar['4. close'] = 110.0
+        core.get_store().append('alpha', 'daily', 'MSFT', bar)
+        close = list(close) + [110.0]
+        self.assertAlmostEqual(core.get_last_ema(period=50), talib.EMA(pd.Series(close).values, timeperiod=50)[-1],
+                               places=4)
+
+    def test_indicators(self):
+        res = sl.RESOURCE(symbol='MSFT')
+        res.prices = libs.datacore.fix_alpha_columns(self.prices)
+        close = res.prices['Adjusted close'].values
+        self.assertAlmostEqual(res.get_ema_last(period=20), talib.EMA(close, timeperiod=20)[-1])
+
+        # Calculated once per frame
+        res.get_ema_last(period=20)
+        res.price_above_kc()
+        self.assertEqual(res.indicators.misses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import json
+import time
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import libs.fetcher
+
+
+COLUMNS = ['BOARDID', 'TRADEDATE', 'SECID', 'OPEN', 'LOW', 'HIGH', 'CLOSE', 'VOLUME']
+DATES = ['2018-11-26', '2018-11-27', '2018-11-28', '2018-11-29', '2018-11-30']
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves ISS history by pages of two rows and Alpha Vantage daily prices"""
+
+    delay = 0
+    requests = 0
+    failures = 0
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        time.sleep(self.delay)
+        StubHandler.requests += 1
+
+        # The first failures requests of /status/<code> get the code
+        if url.path.startswith('/status/') and StubHandler.failures > 0:
+            StubHandler.failures -= 1
+            self.send_error(int(url.path.split('/')[-1]))
+            return
+
+        if url.path.startswith('/iss/history/'):
+            symbol = url.path.split('/')[-1].replace('.json', '')
+            board = url.path.split('/')[-3]
+            start = int(params.get('start', 0))
+            rows = [[board, date, symbol, 1, 1, 2, 1.5 + i, 100] for i, date in enumerate(DATES)]
+            body = {
+                'history': {'columns': COLUMNS, 'data': rows[start:start + 2]},
+                'history.cursor': {'columns': ['INDEX', 'TOTAL', 'PAGESIZE'], 'data': [[start, len(rows), 2]]},
+            }
+        elif url.path == '/note' and StubHandler.failures > 0:
+            # The first failures requests get the per minute rate limit note
+            StubHandler.failures -= 1
+            body = {'Note': 'Our standard API call frequency is 5 calls per minute'}
+        elif url.path == '/information':
+            body = {'Information': 'Our standard API rate limit is 25 requests per day'}
+        elif url.path in ['/query', '/note'] or url.path.startswith('/status/'):
+            series = dict()
+            for i, date in enumerate(reversed(DATES)):
+                series[date] = {column: str(i) for column in libs.fetcher.ALPHA_COLUMNS}
+            body = {'Meta Data': {}, 'Time Series (Daily)': series}
+        else:
+            self.send_error(404)
+            return
+
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetcherTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.url = 'http://127.0.0.1:{}'.format(cls.server.server_address[1])
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        StubHandler.delay = 0
+        StubHandler.requests = 0
+        StubHandler.failures = 0
+        libs.fetcher.set_rate('moex', 1000, 1000)
+        libs.fetcher.set_rate('alpha', 1000, 1000)
+
+    def test_moex_pages(self):
+        df = libs.fetcher.fetch_moex('SBER', boardid='TQBR', url=self.url + '/iss')
+        self.assertListEqual(list(df['TRADEDATE']), DATES)
+        self.assertEqual(set(df['BOARDID']), {'TQBR'})
+
+    def test_alpha(self):
+        df = libs.fetcher.fetch_alpha('MSFT', url=self.url + '/query')
+        self.assertEqual(df.index.name, 'date')
+        self.assertListEqual(list(df.index.strftime('%Y-%m-%d')), DATES)
+        self.assertListEqual(list(df.columns), libs.fetcher.ALPHA_COLUMNS)
+
+    def test_concurrent(self):
+        StubHandler.delay = 0.2
+        started = time.time()
+        frames = libs.fetcher.run([libs.fetcher.afetch_alpha(symbol, url=self.url + '/query')
+                                   for symbol in ['A', 'B', 'C', 'D', 'E']])
+        self.assertEqual(len(frames), 5)
+        self.assertLess(time.time() - started, 0.8)
+
+    def test_rate_limit(self):
+        libs.fetcher.set_rate('alpha', 20, 1)
+        started = time.time()
+        libs.fetcher.run([libs.fetcher.afetch_alpha(symbol, url=self.url + '/query')
+                          for symbol in ['A', 'B', 'C', 'D', 'E', 'F']])
+        self.assertGreaterEqual(time.time() - started, 0.25)
+
+    def test_retries(self):
+        # Rate limit and server errors are retried with a backoff
+        for code in [429, 503]:
+            StubHandler.requests = 0
+            StubHandler.failures = 2
+            started = time.time()
+            data = libs.fetcher.run([libs.fetcher.get_json('alpha', self.url + '/status/' + str(code),
+                                                           backoff=0.1)])[0]
+            self.assertIn('Time Series (Daily)', data)
+            self.assertEqual(StubHandler.requests, 3)
+            self.assertGreaterEqual(time.time() - started, 0.3)
+
+        # Client errors fail at once
+        StubHandler.requests = 0
+        StubHandler.failures = 2
+        with self.assertRaises(IOError):
+            libs.fetcher.run([libs.fetcher.get_json('alpha', self.url + '/status/404', backoff=0.1)])
+        self.assertEqual(StubHandler.requests, 1)
+
+    def test_messages(self):
+        # A rate limit note passes by waiting
+        StubHandler.requests = 0
+        StubHandler.failures = 2
+        data = libs.fetcher.run([libs.fetcher.get_json('alpha', self.url + '/note', backoff=0.1)])[0]
+        self.assertIn('Time Series (Daily)', data)
+        self.assertEqual(StubHandler.requests, 3)
+
+        # The daily quota information does not
+        StubHandler.requests = 0
+        with self.assertRaises(IOError):
+            libs.fetcher.run([libs.fetcher.get_json('alpha', self.url + '/information', backoff=0.1)])
+        self.assertEqual(StubHandler.requests, 1)
+
+    def test_token_bucket(self):
+        bucket = libs.fetcher.TOKENBUCKET(rate=10, capacity=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import tempfile
+import pandas as pd
+import libs.framecache
+import libs.pricestore
+
+
+class FrameCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.prices = pd.read_csv('MSFT.csv', index_col='date')
+        self.size = int(self.prices.memory_usage(index=True, deep=True).sum())
+
+    def test_lru(self):
+        cache = libs.framecache.FRAMECACHE(maxbytes=self.size * 2)
+        cache.put('A', self.prices)
+        cache.put('B', self.prices)
+        self.assertIsNotNone(cache.get('A'))
+
+        # B is the least recently used one
+        cache.put('C', self.prices)
+        self.assertIsNone(cache.get('B'))
+        self.assertIsNotNone(cache.get('A'))
+        self.assertIsNotNone(cache.get('C'))
+        self.assertEqual(cache.size, self.size * 2)
+
+    def test_stamp(self):
+        cache = libs.framecache.FRAMECACHE()
+        cache.put('A', self.prices, stamp=1)
+        self.assertIsNone(cache.get('A', stamp=2))
+        self.assertIsNone(cache.get('A', stamp=1))
+
+    def test_copy(self):
+        cache = libs.framecache.FRAMECACHE()
+        cache.put('A', self.prices)
+        df = cache.get('A')
+        df.iloc[0, 0] = 0
+        self.assertNotEqual(cache.get('A').iloc[0, 0], 0)
+
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = libs.pricestore.PRICESTORE(tmpdir)
+            store.save('alpha', 'daily', 'MSFT', self.prices.head(50))
+            hits = libs.framecache.frames.hits
+            store.load('alpha', 'daily', 'MSFT')
+            df = store.load('alpha', 'daily', 'MSFT', index=True)
+            self.assertEqual(libs.framecache.frames.hits, hits + 1)
+            self.assertEqual(len(df), 50)
+
+            # Saved frame is loaded again
+            df = store.append('alpha', 'daily', 'MSFT', self.prices)
+            self.assertEqual(len(store.load('alpha', 'daily', 'MSFT')), len(self.prices))
+
+
+if __name__ == '__main__':
+    unittest.main()
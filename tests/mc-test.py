@@ -0,0 +1,100 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import numpy as np
+import libs.montecarlo
+import libs.rng
+
+
+class MonteCarloTests(unittest.TestCase):
+    def test_flat_returns(self):
+        mc = libs.montecarlo.simulate(np.zeros(50), sims=100, bust=0.1, goal=0.1)
+        self.assertEqual(mc.data.shape, (100, 50))
+        self.assertEqual(mc.stats['bust'], 0)
+        self.assertEqual(mc.stats['goal'], 0)
+
+    def test_growing_returns(self):
+        mc = libs.montecarlo.simulate(np.full(50, 0.01), sims=100, bust=0.1, goal=0.1)
+        self.assertEqual(mc.stats['bust'], 0)
+        self.assertEqual(mc.stats['goal'], 1)
+        # 1.01 ** 10 is the first day above +10%
+        self.assertEqual(mc.stats['goal_day'], 9)
+
+    def test_goal_after_bust(self):
+        mc = libs.montecarlo.simulate([-0.2, 0.5], sims=1000, bust=0.1, goal=0.1, horizon=1)
+        self.assertAlmostEqual(mc.stats['bust'] + mc.stats['goal'], 1)
+
+    def test_first_hit(self):
+        mask = np.array([[False, True, True], [False, False, False]])
+        self.assertListEqual(list(libs.montecarlo.first_hit(mask)), [1, -1])
+
+    def test_portfolio(self):
+        returns = np.full((50, 2), 0.01)
+        mc = libs.montecarlo.simulate_portfolio(returns, [0.5, 0.5], sims=250, chunk=100, goal=0.1)
+        self.assertEqual(mc.data.shape, (100, 50))
+        self.assertEqual(mc.stats['goal'], 1)
+        self.assertEqual(mc.stats['goal_day'], 9)
+        self.assertAlmostEqual(mc.stats['var'], -(1.01 ** 50 - 1))
+        self.assertAlmostEqual(mc.stats['cvar'], -(1.01 ** 50 - 1))
+
+    def test_portfolio_joint_days(self):
+        # Opposite assets, a day drawn with both returns does not change the portfolio
+        returns = np.array([[0.1, -0.1], [-0.1, 0.1], [0.05, -0.05]])
+        mc = libs.montecarlo.simulate_portfolio(returns, [0.5, 0.5], sims=1000, horizon=1, block=1)
+        self.assertTrue(np.allclose(mc.data[:, 0], 0))
+
+        # Half of the money is cash
+        mc = libs.montecarlo.simulate_portfolio(np.full((10, 1), 0.1), [0.5], sims=10, horizon=1)
+        self.assertTrue(np.allclose(mc.data[:, 0], 0.05))
+
+    def test_chunked(self):
+        np.random.seed(1)
+        returns = np.random.normal(0, 0.02, 250)
+        mc = libs.montecarlo.simulate_chunked(returns, sims=5000, chunk=700, tolerance=0, sample=5000)
+        self.assertEqual(mc.data.shape, (700, 250))
+        self.assertEqual(mc.stats['sims'], 5000)
+
+        # Same paths at once
+        chunked = libs.montecarlo.simulate_chunked(returns, sims=1000, chunk=300, tolerance=0, sample=1000,
+                                                   rng=libs.rng.get_generator(2))
+        mc = libs.montecarlo.simulate(returns, sims=1000, rng=libs.rng.get_generator(2))
+        for key in mc.stats:
+            self.assertAlmostEqual(chunked.stats[key], mc.stats[key])
+
+    def test_early_stop(self):
+        mc = libs.montecarlo.simulate_chunked(np.zeros(50), sims=10 ** 9, chunk=1000, tolerance=0.005)
+        self.assertEqual(mc.stats['bust'], 0)
+        self.assertLess(mc.stats['sims'], 10 ** 6)
+        self.assertLess(mc.stats['bust_interval'], 0.005)
+
+    def test_reservoir(self):
+        running = libs.montecarlo.MCSTATS(sample=1000)
+        for start in range(0, 100000, 1000):
+            total = np.arange(start, start + 1000, dtype=float)
+            running.update(total, total, np.full(1000, -1), np.full(1000, -1))
+        self.assertAlmostEqual(running.get_stats()['median'] / 50000, 1, delta=0.1)
+
+    def test_streams(self):
+        returns = np.random.normal(0, 0.02, 100)
+        first = libs.montecarlo.simulate(returns, rng=libs.rng.get_generator(42, 'SBER'))
+        second = libs.montecarlo.simulate(returns, rng=libs.rng.get_generator(42, 'SBER'))
+        other = libs.montecarlo.simulate(returns, rng=libs.rng.get_generator(42, 'GAZP'))
+        self.assertTrue(np.array_equal(first.data, second.data))
+        self.assertFalse(np.array_equal(first.data, other.data))
+
+    def test_levels(self):
+        returns = np.random.normal(0, 0.02, 100)
+        busts, goals = libs.montecarlo.simulate_levels(returns, [0.1, 0.2], [0.05, 0.1, 0.2], sims=1000, chunk=300,
+                                                       rng=libs.rng.get_generator(3))
+        self.assertEqual(goals.shape, (2, 3))
+        for j, bust in enumerate([0.05, 0.1, 0.2]):
+            for i, goal in enumerate([0.1, 0.2]):
+                mc = libs.montecarlo.simulate(returns, sims=1000, bust=bust, goal=goal, rng=libs.rng.get_generator(3))
+                self.assertAlmostEqual(busts[j], mc.stats['bust'])
+                self.assertAlmostEqual(goals[i, j], mc.stats['goal'])
+
+
+if __name__ == '__main__':
+    unittest.main()
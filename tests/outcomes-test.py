@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import json
+import tempfile
+import pandas as pd
+import libs.outcomes
+
+
+class OutcomesTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        recommendations = {
+            'a-alpha-2018-11-05.json': [{'MSFT': {'last_price': 10, 'stop_loss': 9, 'exit_price': 11}},
+                                        {'KO': {'last_price': 10, 'stop_loss': 9, 'exit_price': 11}}],
+            'a-alpha-2018-11-07.json': [{'MSFT': {'last_price': 12, 'stop_loss': 11.5, 'exit_price': 13}}],
+            'ms-moex-2018-11-05.json': [{'SBER': {'last_price': 200, 'stop_loss': 180, 'exit_price': 220}}],
+        }
+        for filename, data in recommendations.items():
+            with open(os.path.join(self.tmpdir.name, filename), 'w') as outfile:
+                json.dump(data, outfile)
+
+        dates = pd.bdate_range('2018-11-05', periods=5)
+        self.closes = pd.DataFrame({'MSFT': [10, 10.5, 12, 11, 13.5],
+                                    'KO': [10, 9.5, 8.5, None, 8]}, index=dates)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_load(self):
+        df = libs.outcomes.load_recommendations(self.tmpdir.name, prefix='a-alpha-')
+        self.assertEqual(len(df), 3)
+        self.assertListEqual(list(df.columns[:2]), ['date', 'symbol'])
+        self.assertEqual(df['date'].iloc[-1], pd.Timestamp('2018-11-07'))
+        self.assertTrue(libs.outcomes.load_recommendations(self.tmpdir.name, prefix='m-moex-').empty)
+
+    def test_evaluate(self):
+        recommendations = libs.outcomes.load_recommendations(self.tmpdir.name)
+        df = libs.outcomes.evaluate(recommendations, self.closes).set_index(['symbol', 'date'])
+
+        msft = df.loc[('MSFT', pd.Timestamp('2018-11-05'))]
+        self.assertEqual(msft['status'], 'Succeeded')
+        self.assertEqual(msft['success_date'], pd.Timestamp('2018-11-07'))
+        self.assertEqual(msft['success_days'], 2)
+        self.assertEqual(msft['success_count'], 2)
+        self.assertEqual(msft['mfe'], 35)
+
+        # Busted on the next day after the recommendation, an earlier price above the exit is not counted
+        msft = df.loc[('MSFT', pd.Timestamp('2018-11-07'))]
+        self.assertEqual(msft['status'], 'Busted')
+        self.assertEqual(msft['bust_days'], 1)
+        self.assertEqual(msft['max'], 13.5)
+
+        ko = df.loc[('KO', pd.Timestamp('2018-11-05'))]
+        self.assertEqual(ko['status'], 'Busted')
+        self.assertEqual(ko['bust_count'], 2)
+        self.assertEqual(ko['mae'], -20)
+
+        # No prices of the symbol
+        sber = df.loc[('SBER', pd.Timestamp('2018-11-05'))]
+        self.assertEqual(sber['status'], '')
+        self.assertTrue(pd.isnull(sber['max']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import tempfile
+import numpy as np
+import pandas as pd
+import libs.pricestore
+
+
+class PriceStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = libs.pricestore.PRICESTORE(self.tmpdir.name)
+        self.prices = pd.read_csv('MSFT.csv', index_col='date')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_missing(self):
+        self.assertIsNone(self.store.age('alpha', 'daily', 'MSFT'))
+        self.assertIsNone(self.store.load('alpha', 'daily', 'MSFT'))
+
+    def test_roundtrip(self):
+        self.store.save('alpha', 'daily', 'MSFT', self.prices)
+        self.assertLess(self.store.age('alpha', 'daily', 'MSFT'), 60)
+
+        df = self.store.load('alpha', 'daily', 'MSFT', index=True)
+        self.assertListEqual(list(df.columns), list(self.prices.columns))
+        self.assertListEqual(list(df.index.strftime('%Y-%m-%d')), list(self.prices.index))
+        self.assertTrue((df.values == self.prices.values).all())
+
+    def test_dtype(self):
+        self.store.save('alpha', 'daily', 'MSFT', self.prices)
+        data = np.load(self.store.path('alpha', 'daily', 'MSFT'))
+        self.assertEqual(data.dtype['date'], np.dtype('datetime64[D]'))
+        self.assertEqual(data.dtype['4. close'], np.float64)
+        self.assertEqual(data.dtype['6. volume'], np.float64)
+
+    def test_date_column(self):
+        self.store.save('moex', 'TQBR', 'MSFT', self.prices.reset_index())
+        df = self.store.load('moex', 'TQBR', 'MSFT')
+        self.assertEqual(df.columns[0], 'date')
+        self.assertEqual(len(df), len(self.prices))
+
+    def test_append(self):
+        self.store.save('alpha', 'daily', 'MSFT', self.prices.head(60))
+        self.assertEqual(str(self.store.last_date('alpha', 'daily', 'MSFT').date()), self.prices.index[59])
+
+        new = self.prices.iloc[50:].copy()
+        new.iloc[9, 0] = 1
+        df = self.store.append('alpha', 'daily', 'MSFT', new)
+        self.assertEqual(len(df), len(self.prices))
+        self.assertEqual(df.iloc[59, 1], 1)
+        self.assertEqual(str(self.store.last_date('alpha', 'daily', 'MSFT').date()), self.prices.index[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import numpy as np
+import pandas as pd
+import libs.rebalance
+
+
+def loop_walk(df, data):
+    """Row by row rebalancing of PORTFOLIO.walk, returns trades balance, the last total and values before trades"""
+    symbols = data.keys()
+    money = 0
+    values = list()
+
+    for index, row in df.iterrows():
+
+        total = 0
+        for symbol in symbols:
+            data[symbol]['value'] = round(row[symbol] * data[symbol]['count'], 2)
+            total += data[symbol]['value']
+        values.append(money + total)
+
+        for symbol in symbols:
+            data[symbol]['weight'] = round(100 * data[symbol]['value'] / total, 2)
+            data[symbol]['diff'] = data[symbol]['weight'] - data[symbol]['share']
+
+        for symbol in symbols:
+            if data[symbol]['diff'] > 2:
+                for symbol2 in symbols:
+                    if symbol == symbol2:
+                        continue
+                    if data[symbol2]['diff'] < -1:
+                        amount = int(data[symbol]['value'] * data[symbol]['diff'] * 0.01 / row[symbol])
+                        if amount > 0:
+                            data[symbol]['count'] -= amount
+                            gain = amount * row[symbol]
+                            amount = int(gain / row[symbol2])
+                            data[symbol2]['count'] += amount
+                            pay = amount * row[symbol2]
+                            money += gain - pay
+                            break
+                else:
+                    continue
+                break
+
+    return money, total, values
+
+
+class RebalanceTests(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(1)
+        days, assets = 1500, 5
+        returns = np.random.normal(0.0003, 0.015, (days, assets))
+        prices = 100 * np.cumprod(1 + returns, axis=0)
+        self.df = pd.DataFrame(prices, columns=['A', 'B', 'C', 'D', 'E'],
+                               index=pd.bdate_range('2014-01-01', periods=days))
+        self.shares = [20, 10, 30, 20, 20]
+        self.counts = [int(100000 * share / 100 / price) for share, price in zip(self.shares, prices[0])]
+
+    def check(self, df):
+        data = {symbol: {'count': count, 'share': share}
+                for symbol, count, share in zip(df.columns, self.counts, self.shares)}
+        money, total, values = loop_walk(df, data)
+
+        result = libs.rebalance.simulate(df.values, self.counts, self.shares)
+        self.assertGreater(len(result.trades), 10)
+        self.assertEqual(result.money, money)
+        self.assertEqual(result.total[-1], total)
+        self.assertListEqual(list(result.holdings[-1]), [data[symbol]['count'] for symbol in df.columns])
+        self.assertListEqual(list(result.get_weights()[-1]), [data[symbol]['weight'] for symbol in df.columns])
+
+    def test_walk(self):
+        self.check(self.df)
+
+    def test_missing_prices(self):
+        df = self.df.copy()
+        df.iloc[100:110, 1] = np.nan
+        self.check(df)
+
+    def test_drawdown(self):
+        # A trade on the peak leaves a lot of cash, the expensive asset is bought by whole shares only
+        df = pd.DataFrame({'A': [1, 1.1, 1], 'B': [1000, 1000, 1000]})
+        shares = [50, 50]
+        counts, cash = libs.rebalance.get_counts(df.values, shares)
+        data = {symbol: {'count': count, 'share': share} for symbol, count, share in zip(df.columns, counts, shares)}
+        money, total, values = loop_walk(df, data)
+        self.assertGreater(money, 100)
+
+        value = cash + np.array(values)
+        drawdown = round(100 * np.max(1 - value / np.maximum.accumulate(value)), 2)
+        self.assertEqual(libs.rebalance.get_stats(df.values, shares)[1], drawdown)
+
+    def test_band(self):
+        with self.assertRaises(ValueError):
+            libs.rebalance.simulate(self.df.values, self.counts, self.shares, sell_above=-1, buy_below=2)
+        with self.assertRaises(ValueError):
+            libs.rebalance.sweep(self.df.values, [self.shares], sell_above=[1], buy_below=[1])
+
+    def test_sweep(self):
+        shares = [self.shares, [20, 20, 20, 20, 20]]
+        df = libs.rebalance.sweep(self.df.values, shares, sell_above=[1, 2], buy_below=[-1, -2])
+        self.assertEqual(len(df), 8)
+        self.assertTrue(df['profit'].is_monotonic_decreasing)
+
+        # Same profit as walk of the default configuration
+        counts, cash = libs.rebalance.get_counts(self.df.values, self.shares)
+        self.assertListEqual(counts, self.counts)
+        result = libs.rebalance.simulate(self.df.values, counts, self.shares)
+        row = df[(df['shares'] == tuple(self.shares)) & (df['sell_above'] == 2) & (df['buy_below'] == -1)]
+        self.assertEqual(row['profit'].iloc[0], round(cash + result.money + result.total[-1] - 100000, 2))
+        self.assertEqual(row['trades'].iloc[0], len(result.trades))
+
+        pooled = libs.rebalance.sweep(self.df.values, shares, sell_above=[1, 2], buy_below=[-1, -2], workers=2)
+        pd.testing.assert_frame_equal(pooled, df)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+import libs.recstore
+
+
+class RecStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = libs.recstore.RECSTORE(os.path.join(self.tmpdir.name, 'recommendations.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_query(self):
+        results = [{'SBER': {'last_price': 200.0, 'stop_loss': np.float64(180.5), 'exit_price': 220.0, 'seed': 7}},
+                   {'GAZP': {'last_price': 150.0, 'stop_loss': 140.0, 'exit_price': 165.0, 'seed': 7}}]
+        self.assertEqual(self.store.append(results, '2018-11-05', datatype='ms', source='moex'), 2)
+        self.store.append(results[:1], '2018-11-06', datatype='ms', source='moex')
+        self.store.append(results[:1], '2018-11-06', datatype='me', source='moex')
+
+        df = self.store.query(symbol='SBER', datatype='ms')
+        self.assertListEqual(list(df['date']), [pd.Timestamp('2018-11-05'), pd.Timestamp('2018-11-06')])
+        self.assertEqual(df['stop_loss'].iloc[0], 180.5)
+        self.assertEqual(len(self.store.query(start='2018-11-06')), 2)
+        self.assertEqual(len(self.store.query(end='2018-11-05')), 2)
+        self.assertTrue(self.store.query(symbol=['LKOH']).empty)
+
+        # The same day check replaces results
+        results[0]['SBER']['exit_price'] = 230.0
+        self.store.append(results[:1], '2018-11-05', datatype='ms', source='moex')
+        df = self.store.query(symbol='SBER', end='2018-11-05')
+        self.assertListEqual(list(df['exit_price']), [230.0])
+
+    def test_import(self):
+        with open(os.path.join(self.tmpdir.name, 'a-alpha-2018-11-07.json'), 'w') as outfile:
+            json.dump([{'MSFT': {'stop_loss': 81.86, 'exit_price': 118.49}},
+                       {'KO': {'stop_loss': 44.0, 'exit_price': 54.02}}], outfile)
+        with open(os.path.join(self.tmpdir.name, 'm-2018-11-07.json'), 'w') as outfile:
+            json.dump({}, outfile)
+
+        self.assertEqual(self.store.import_json(self.tmpdir.name), 2)
+        df = self.store.query(datatype='a', source='alpha')
+        self.assertListEqual(sorted(df['symbol']), ['KO', 'MSFT'])
+        self.assertEqual(df.set_index('symbol').loc['KO', 'exit_price'], 54.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
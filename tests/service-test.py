@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import threading
+import urllib.error
+import urllib.request
+import libs.service
+
+
+class TARGET(object):
+    def __init__(self):
+        self.calls = 0
+
+    def scan(self, symbols=None, sims=1000):
+        self.calls += 1
+        print('Scanned', symbols)
+        return {'sims': sims, 'calls': self.calls}
+
+    def fail(self):
+        raise IOError('Can not fetch MSFT')
+
+    def stop(self):
+        exit('Can not fetch MSFT')
+
+
+class ServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.target = TARGET()
+        self.server = libs.service.get_server(self.target, ['scan', 'fail', 'stop'], port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}/'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.url + path, timeout=5) as response:
+                return response.status, response.read().decode()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read().decode()
+
+    def test_parse_argument(self):
+        self.assertEqual(libs.service.parse_argument('10'), 10)
+        self.assertEqual(libs.service.parse_argument('MSFT'), 'MSFT')
+        self.assertListEqual(libs.service.parse_argument('MSFT,AAPL'), ['MSFT', 'AAPL'])
+
+    def test_responses(self):
+        status, text = self.get('scan?symbols=MSFT,AAPL&sims=10')
+        self.assertEqual(status, 200)
+        self.assertEqual(text, "Scanned ['MSFT', 'AAPL']\n" + '{"sims": 10, "calls": 1}\n')
+
+        self.assertEqual(self.get('nope')[0], 404)
+        status, text = self.get('fail')
+        self.assertEqual(status, 500)
+        self.assertIn('Can not fetch MSFT', text)
+
+        # The target is resident, exit() of a request does not stop the server
+        self.assertEqual(self.get('stop')[0], 500)
+        self.assertEqual(self.get('scan')[1], 'Scanned None\n{"sims": 1000, "calls": 2}\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import pandas as pd
+import libs.strategy
+import libs.indicatorcache
+
+STRATEGIES = ['ema50_close_to_ema200', 'ema50_close_to_ema100', 'ema20_close_to_ema50', 'price_above_sma200',
+              'price_above_ema200', 'price_above_ema100', 'price_above_ema50', 'rsi5_bellow_40', 'rsi14_bellow_40',
+              'rsi14_bellow_30', 'rsi14_above_60', 'rsi14_above_70', 'price_bellow_kc', 'price_above_kc',
+              'macd_hist_close_zero', 'macd_uptrend']
+
+
+class StrategyTests(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.read_csv('MSFT.csv').rename(columns={'2. high': 'High', '3. low': 'Low', '4. close': 'Close',
+                                                          '5. adjusted close': 'Adjusted close'})
+
+    def test_shared_cache(self):
+        cache = libs.indicatorcache.INDICATORCACHE(self.df)
+        for name in STRATEGIES:
+            strategy = getattr(libs.strategy, name)
+            expected = strategy(self.df, pricetype='Adjusted close')
+            pd.testing.assert_frame_equal(strategy(self.df, pricetype='Adjusted close', cache=cache), expected)
+
+        # Unique indicators only: EMA 20/50/100/200, SMA200, RSI 5/14, ATR10, MACD and two EMAs of MACD
+        self.assertEqual(cache.misses, 11)
+        self.assertNotIn('buy', self.df.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import tempfile
+import numpy as np
+import pandas as pd
+import talib
+import libs.streaming
+
+
+class COUNTED(libs.streaming.EMA):
+    """EMA counting bars it is updated with"""
+
+    updates = 0
+
+    def update(self, bar):
+        COUNTED.updates += 1
+        return super().update(bar)
+
+
+class StreamingTests(unittest.TestCase):
+    def setUp(self):
+        df = pd.read_csv('MSFT.csv')
+        self.df = pd.DataFrame({'date': pd.to_datetime(df['date']), 'High': df['2. high'], 'Low': df['3. low'],
+                                'Close': df['4. close']})
+
+    def run_indicators(self, indicators, path=None):
+        return libs.streaming.INDICATORS(indicators, path=path).run(self.df)
+
+    def assertSeries(self, actual, expected):
+        self.assertTrue(np.allclose(actual, expected, equal_nan=True))
+
+    def test_talib(self):
+        high, low, close = self.df['High'].values, self.df['Low'].values, self.df['Close'].values
+        df = self.run_indicators([libs.streaming.SMA(20), libs.streaming.EMA(5), libs.streaming.ATR(5),
+                                  libs.streaming.RSI(14), libs.streaming.MACD(), libs.streaming.KC(5, 2)])
+
+        self.assertSeries(df['SMA20'], talib.SMA(close, timeperiod=20))
+        self.assertSeries(df['EMA5'], talib.EMA(close, timeperiod=5))
+        self.assertSeries(df['ATR'], talib.ATR(high, low, close, timeperiod=5))
+        self.assertSeries(df['RSI14'], talib.RSI(close, timeperiod=14))
+
+        macd, signal, hist = talib.MACD(close)
+        self.assertSeries(df['MACD'], macd)
+        self.assertSeries(df['MACD_Sign'], signal)
+        self.assertSeries(df['MACD_Hist'], hist)
+
+        ema = talib.EMA(close, timeperiod=5)
+        atr = talib.ATR(high, low, close, timeperiod=5)
+        self.assertSeries(df['KC_LOW'], ema - 2 * atr)
+        self.assertSeries(df['KC_HIGH'], ema + 2 * atr)
+
+    def test_persisted(self):
+        indicators = lambda: [COUNTED(5), libs.streaming.ATR(5), libs.streaming.MACD()]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'MSFT.indicators')
+            full = self.df
+            self.df = full.head(60)
+            self.run_indicators(indicators(), path=path)
+
+            # Only new bars are calculated, the persisted ones are kept
+            COUNTED.updates = 0
+            self.df = full.head(80)
+            df = self.run_indicators(indicators(), path=path)
+            self.assertEqual(COUNTED.updates, 20)
+            self.assertSeries(df, libs.streaming.INDICATORS(indicators()).run(full.head(80)))
+
+            # A shifted window is calculated as a fresh one
+            self.df = full.iloc[10:90]
+            df = self.run_indicators(indicators(), path=path)
+            self.assertSeries(df, libs.streaming.INDICATORS(indicators()).run(full.iloc[10:90]))
+
+            # A changed first bar is calculated again from the start
+            self.df = full.iloc[10:90].copy()
+            self.df.loc[10, 'Close'] += 1
+            df = self.run_indicators(indicators(), path=path)
+            self.assertSeries(df, libs.streaming.INDICATORS(indicators()).run(self.df))
+
+    def test_last_bar(self):
+        indicators = lambda: [COUNTED(5), libs.streaming.ATR(5), libs.streaming.MACD()]
+        changed = self.df.head(60).copy()
+        changed.loc[59, 'Close'] += 1
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'MSFT.indicators')
+            full = self.df
+            self.df = full.head(60)
+            self.run_indicators(indicators(), path=path)
+
+            # The refetched last bar continues from the states before it
+            COUNTED.updates = 0
+            self.df = changed
+            df = self.run_indicators(indicators(), path=path)
+            self.assertEqual(COUNTED.updates, 1)
+            self.assertSeries(df, libs.streaming.INDICATORS(indicators()).run(changed))
+
+            # The next bar continues from the changed one
+            extended = pd.concat([changed, full.iloc[60:61]])
+            self.df = extended
+            df = self.run_indicators(indicators(), path=path)
+            self.assertSeries(df, libs.streaming.INDICATORS(indicators()).run(extended))
+
+
+if __name__ == '__main__':
+    unittest.main()
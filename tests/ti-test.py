@@ -0,0 +1,262 @@
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import numpy as np
+import pandas as pd
+import libs.technical_indicators as ti
+
+
+# Row by row reference implementations, vectorized ones must give the same output
+
+
+def loop_average_true_range(df, n):
+    i = 0
+    TR_l = [0]
+    while i < df.index[-1]:
+        TR = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
+        TR_l.append(TR)
+        i = i + 1
+    TR_s = pd.Series(TR_l)
+    ATR = pd.Series(TR_s.ewm(span=n, min_periods=n).mean(), name='ATR')
+    df = df.join(ATR)
+    return df
+
+
+def loop_trix(df, n):
+    EX1 = df['Close'].ewm(span=n, min_periods=n).mean()
+    EX2 = EX1.ewm(span=n, min_periods=n).mean()
+    EX3 = EX2.ewm(span=n, min_periods=n).mean()
+    i = 0
+    ROC_l = [np.nan]
+    while i + 1 <= df.index[-1]:
+        ROC = (EX3[i + 1] - EX3[i]) / EX3[i]
+        ROC_l.append(ROC)
+        i = i + 1
+    Trix = pd.Series(ROC_l, name='Trix_' + str(n))
+    df = df.join(Trix)
+    return df
+
+
+def loop_average_directional_movement_index(df, n, n_ADX):
+    i = 0
+    UpI = []
+    DoI = []
+    while i + 1 <= df.index[-1]:
+        UpMove = df.loc[i + 1, 'High'] - df.loc[i, 'High']
+        DoMove = df.loc[i, 'Low'] - df.loc[i + 1, 'Low']
+        if UpMove > DoMove and UpMove > 0:
+            UpD = UpMove
+        else:
+            UpD = 0
+        UpI.append(UpD)
+        if DoMove > UpMove and DoMove > 0:
+            DoD = DoMove
+        else:
+            DoD = 0
+        DoI.append(DoD)
+        i = i + 1
+    i = 0
+    TR_l = [0]
+    while i < df.index[-1]:
+        TR = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
+        TR_l.append(TR)
+        i = i + 1
+    TR_s = pd.Series(TR_l)
+    ATR = pd.Series(TR_s.ewm(span=n, min_periods=n).mean())
+    UpI = pd.Series(UpI)
+    DoI = pd.Series(DoI)
+    PosDI = pd.Series(UpI.ewm(span=n, min_periods=n).mean() / ATR)
+    NegDI = pd.Series(DoI.ewm(span=n, min_periods=n).mean() / ATR)
+    ADX = pd.Series((abs(PosDI - NegDI) / (PosDI + NegDI)).ewm(span=n_ADX, min_periods=n_ADX).mean(),
+                    name='ADX_' + str(n) + '_' + str(n_ADX))
+    df = df.join(ADX)
+    return df
+
+
+def loop_vortex_indicator(df, n):
+    i = 0
+    TR = [0]
+    while i < df.index[-1]:
+        Range = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
+        TR.append(Range)
+        i = i + 1
+    i = 0
+    VM = [0]
+    while i < df.index[-1]:
+        Range = abs(df.loc[i + 1, 'High'] - df.loc[i, 'Low']) - abs(df.loc[i + 1, 'Low'] - df.loc[i, 'High'])
+        VM.append(Range)
+        i = i + 1
+    VI = pd.Series(pd.Series(VM).rolling(n).sum() / pd.Series(TR).rolling(n).sum(), name='Vortex')
+    df = df.join(VI)
+    return df
+
+
+def loop_rsi(df, n):
+    i = 0
+    UpI = [0]
+    DoI = [0]
+    while i + 1 <= df.index[-1]:
+        UpMove = df.loc[i + 1, 'High'] - df.loc[i, 'High']
+        DoMove = df.loc[i, 'Low'] - df.loc[i + 1, 'Low']
+        if UpMove > DoMove and UpMove > 0:
+            UpD = UpMove
+        else:
+            UpD = 0
+        UpI.append(UpD)
+        if DoMove > UpMove and DoMove > 0:
+            DoD = DoMove
+        else:
+            DoD = 0
+        DoI.append(DoD)
+        i = i + 1
+    UpI = pd.Series(UpI)
+    DoI = pd.Series(DoI)
+    PosDI = pd.Series(UpI.ewm(span=n, min_periods=n).mean())
+    NegDI = pd.Series(DoI.ewm(span=n, min_periods=n).mean())
+    RSI = pd.Series(100.0 * PosDI / (PosDI + NegDI), name='RSI')
+    df = df.join(RSI)
+    return df
+
+
+def loop_relative_strength_index(df, n):
+    i = 0
+    UpI = [0]
+    DoI = [0]
+    while i + 1 <= df.index[-1]:
+        UpMove = df.loc[i + 1, 'High'] - df.loc[i, 'High']
+        DoMove = df.loc[i, 'Low'] - df.loc[i + 1, 'Low']
+        if UpMove > DoMove and UpMove > 0:
+            UpD = UpMove
+        else:
+            UpD = 0
+        UpI.append(UpD)
+        if DoMove > UpMove and DoMove > 0:
+            DoD = DoMove
+        else:
+            DoD = 0
+        DoI.append(DoD)
+        i = i + 1
+    UpI = pd.Series(UpI)
+    DoI = pd.Series(DoI)
+    PosDI = pd.Series(UpI.ewm(span=n, min_periods=n).mean())
+    NegDI = pd.Series(DoI.ewm(span=n, min_periods=n).mean())
+    RSI = pd.Series(100.0 * PosDI / (PosDI + NegDI), name='RSI_' + str(n))
+    # df = df.join(RSI)
+    return RSI
+
+
+def loop_money_flow_index(df, n):
+    PP = (df['High'] + df['Low'] + df['Close']) / 3
+    i = 0
+    PosMF = [0]
+    while i < df.index[-1]:
+        if PP[i + 1] > PP[i]:
+            PosMF.append(PP[i + 1] * df.loc[i + 1, 'Volume'])
+        else:
+            PosMF.append(0)
+        i = i + 1
+    PosMF = pd.Series(PosMF)
+    TotMF = PP * df['Volume']
+    MFR = pd.Series(PosMF / TotMF)
+    MFI = pd.Series(MFR.rolling(n, min_periods=n).mean(), name='MFI_' + str(n))
+    df = df.join(MFI)
+    return df
+
+
+def loop_on_balance_volume(df, n):
+    i = 0
+    OBV = [0]
+    while i < df.index[-1]:
+        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] > 0:
+            OBV.append(df.loc[i + 1, 'Volume'])
+        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] == 0:
+            OBV.append(0)
+        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] < 0:
+            OBV.append(-df.loc[i + 1, 'Volume'])
+        i = i + 1
+    OBV = pd.Series(OBV)
+    OBV_ma = pd.Series(OBV.rolling(n, min_periods=n).mean(), name='OBV_' + str(n))
+    df = df.join(OBV_ma)
+    return df
+
+
+def loop_ultimate_oscillator(df):
+    i = 0
+    TR_l = [0]
+    BP_l = [0]
+    while i < df.index[-1]:
+        TR = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
+        TR_l.append(TR)
+        BP = df.loc[i + 1, 'Close'] - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
+        BP_l.append(BP)
+        i = i + 1
+    UltO = pd.Series((4 * pd.Series(BP_l).rolling(7).sum() / pd.Series(TR_l).rolling(7).sum()) + (
+                2 * pd.Series(BP_l).rolling(14).sum() / pd.Series(TR_l).rolling(14).sum()) + (
+                                 pd.Series(BP_l).rolling(28).sum() / pd.Series(TR_l).rolling(28).sum()),
+                     name='Ultimate_Osc')
+    df = df.join(UltO)
+    return df
+
+
+def loop_donchian_channel(df, n):
+    i = 0
+    dc_l = []
+    while i < n - 1:
+        dc_l.append(0)
+        i += 1
+
+    i = 0
+    while i + n - 1 < df.index[-1]:
+        dc = max(df['High'].loc[i:i + n - 1]) - min(df['Low'].loc[i:i + n - 1])
+        dc_l.append(dc)
+        i += 1
+
+    donchian_chan = pd.Series(dc_l, name='Donchian_' + str(n))
+    donchian_chan = donchian_chan.shift(n - 1)
+    return df.join(donchian_chan)
+
+
+class IndicatorsTests(unittest.TestCase):
+    def setUp(self):
+        df = pd.read_csv('MSFT.csv')
+        self.df = pd.DataFrame({'High': df['2. high'], 'Low': df['3. low'], 'Close': df['4. close'],
+                                'Volume': df['6. volume']})
+
+    def assertParity(self, expected, actual):
+        pd.testing.assert_frame_equal(pd.DataFrame(expected), pd.DataFrame(actual), check_dtype=False)
+
+    def test_average_true_range(self):
+        self.assertParity(loop_average_true_range(self.df, 14), ti.average_true_range(self.df, 14))
+
+    def test_trix(self):
+        self.assertParity(loop_trix(self.df, 5), ti.trix(self.df, 5))
+
+    def test_average_directional_movement_index(self):
+        self.assertParity(loop_average_directional_movement_index(self.df, 14, 6),
+                          ti.average_directional_movement_index(self.df, 14, 6))
+
+    def test_vortex_indicator(self):
+        self.assertParity(loop_vortex_indicator(self.df, 14), ti.vortex_indicator(self.df, 14))
+
+    def test_rsi(self):
+        self.assertParity(loop_rsi(self.df, 14), ti.rsi(self.df, 14))
+        self.assertParity(loop_relative_strength_index(self.df, 14), ti.relative_strength_index(self.df, 14))
+
+    def test_money_flow_index(self):
+        self.assertParity(loop_money_flow_index(self.df, 14), ti.money_flow_index(self.df, 14))
+
+    def test_on_balance_volume(self):
+        self.df.loc[10, 'Close'] = self.df.loc[9, 'Close']
+        self.assertParity(loop_on_balance_volume(self.df, 5), ti.on_balance_volume(self.df, 5))
+
+    def test_ultimate_oscillator(self):
+        self.assertParity(loop_ultimate_oscillator(self.df), ti.ultimate_oscillator(self.df))
+
+    def test_donchian_channel(self):
+        self.assertParity(loop_donchian_channel(self.df, 20), ti.donchian_channel(self.df, 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -60,22 +60,8 @@ if __name__ == "__main__":
     #     'FXRU'   # + 10%, Anti RUB devaluation
     # ]
 
-    data = dict()
-    data['USD/RUB'] = list()
-    data['Name'] = list()
-    for etf0 in etfs:
-        data['Name'].append(etf0)
-        data[etf0] = list()
-
-        for etf1 in etfs:
-            rez = round(adv.correlation(datatype1='me', symbol1=etf0, datatype2='me', symbol2=etf1), 1)
-            data[etf0].append(rez)
-
-        # USD/RUB correlation
-        rez = round(adv.correlation(datatype1='me', symbol1=etf0, datatype2='mc', symbol2='USD000UTSTOM'), 1)
-        data['USD/RUB'].append(rez)
-
-    df = pd.DataFrame(data)
+    # Every ETF is loaded once, USD/RUB correlation is the last column
+    df = adv.correlation_matrix(etfs, datatype='me', datatype2='mc', symbol2='USD000UTSTOM').round(1)
     print(df)
 
     # print('MOEX', adv.correlation(datatype2='ms', symbol2='MOEX'))
@@ -16,67 +16,34 @@ sys.path.insert(0, os.path.abspath('..'))
 import pandas as pd
 import configs.etf
 import libs.assets
+import libs.correlation
 import configs.alphaconf
-import numpy as np
-
-
-def calc_beta(df):
-    np_array = df.values
-    m = np_array[:, 0]  # market returns are column zero from numpy array
-    s = np_array[:, 1]  # stock returns are column one from numpy array
-    covariance = np.cov(s, m)  # Calculate covariance between stock and market
-    beta = covariance[0, 1]/covariance[1, 1]
-    return beta
 
 
 if __name__ == "__main__":
 
-    # Transform FXIT to USD
-    asset = libs.assets.ASSET(symbol='FXIT', source='moex', asset_type='etf', key=configs.alphaconf.key)
-    asset.get_data()
-    fxit_df = asset.df
-
-    asset = libs.assets.ASSET(symbol='USD000UTSTOM', source='moex', asset_type='currency', key=configs.alphaconf.key)
-    asset.get_data()
-    usdrub_df = asset.df
+    # Transform FXIT to USD at the USD/RUB close of the same date
+    fxit = libs.assets.ASSET(symbol='FXIT', source='moex', asset_type='etf', key=configs.alphaconf.key)
+    usdrub = libs.assets.ASSET(symbol='USD000UTSTOM', source='moex', asset_type='currency', key=configs.alphaconf.key)
+    closes = libs.correlation.get_closes([fxit, usdrub], names=['RUB', 'USDRUB'])
+    closes = libs.correlation.align(closes, how='ffill')
+    fxit_usd = round(closes['RUB'] / closes['USDRUB'], 2).rename('FXIT')
 
-    fxit_usd_df = pd.DataFrame()
-    fxit_usd_df[['date', 'RUB']] = fxit_df[['date', 'Close']]
-    fxit_usd_df['USD'] = round(fxit_usd_df['RUB'] / usdrub_df['Close'], 2)
-    fxit_usd_df['Close'] = fxit_usd_df['USD'].fillna(method='ffill')
-
-    # correlation = fxit_usd_df['RUB'].corr(fxit_usd_df['Close'])
+    # correlation = closes['RUB'].corr(fxit_usd)
     # print(correlation)
 
-    fxit_usd_df.drop(['RUB', 'USD'], axis=1, inplace=True)
-
-    data = dict()
-    data['Symbol'] = list()
-    data['Correlation'] = list()
-    data['Beta'] = list()
-
-    for symbol in configs.etf.XLK:
-
-        # Calculate correlation
-        asset = libs.assets.ASSET(symbol=symbol, source='alpha', asset_type='stock', key=configs.alphaconf.key)
-        asset.get_data()
-
-        df = pd.DataFrame()
-        df['A'] = fxit_usd_df['Close'].copy()
-        df['B'] = asset.df['Close'].copy()
-
-        correlation = df['A'].corr(df['B'])
-
-        # Calculate Beta
-
-        df_change = df.pct_change(1).dropna(axis=0)
+    assets = [libs.assets.ASSET(symbol=symbol, source='alpha', asset_type='stock', key=configs.alphaconf.key)
+              for symbol in configs.etf.XLK]
+    stocks = libs.correlation.get_closes(assets)
 
-        X = df_change['A']
-        y = df_change['B']
+    # MOEX and US trading calendars differ, a pair is compared at dates both were traded at
+    closes = pd.concat([fxit_usd, stocks], axis=1)
+    closes = closes[closes['FXIT'].notnull()]
+    returns = libs.correlation.get_returns(closes)
 
-        data['Symbol'].append(symbol)
-        data['Correlation'].append(round(correlation, 2))
-        data['Beta'].append(round(calc_beta(df_change), 2))
+    correlation = libs.correlation.get_correlation(closes, 'FXIT')
+    beta = libs.correlation.get_beta(returns, 'FXIT')
 
-    df_rez = pd.DataFrame(data)
+    df_rez = pd.DataFrame({'Symbol': correlation.index, 'Correlation': correlation.round(2).values,
+                           'Beta': beta[correlation.index].round(2).values})
     print(df_rez.sort_values('Correlation'))
@@ -34,5 +34,12 @@ if __name__ == "__main__":
     # print()
     # portfolio.walk()
 
+    # Thresholds and shares to tune rebalancing
+    # print(portfolio.sweep(shares=[[20, 10, 30, 20, 20], [20, 20, 20, 20, 20]], sell_above=[1, 2, 3, 5],
+    #                       buy_below=[-0.5, -1, -2], workers=4).head(10))
+
+    # mc = portfolio.get_bust_chance(sims=100000, bust=0.1, goal=0.2, horizon=250)
+    # print(mc.stats)
+
     # print(portfolio.df.head(5))
     # print(portfolio.df.tail(5))